@@ -0,0 +1,149 @@
+""":mod:`benchmarks.cast` --- compiled cast plans against linear dispatch
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Measure how fast :func:`yui.event.create_event` casts RTM payloads with
+memoized plans of :data:`yui.type.cast` and with old linear scan over
+casters.
+
+Synthetic payloads are used by default. Give path of recorded RTM frames
+(JSON Lines, optionally gzipped) to replay them instead.
+
+.. code-block:: bash
+
+   python -m benchmarks.cast [frames.jsonl.gz]
+
+"""
+
+import contextlib
+import gzip
+import json
+import sys
+import timeit
+from types import SimpleNamespace
+from typing import Dict, Iterator, List
+
+from yui.directory import Directory
+from yui.event import create_event
+from yui.type import BotLinkedNamespace, Caster, cast
+
+PAYLOADS: List[Dict] = [
+    {
+        'type': 'message',
+        'channel': 'C1',
+        'user': 'U1',
+        'text': 'hello world',
+        'ts': '1532950000.000100',
+        'event_ts': '1532950000.000100',
+    },
+    {
+        'type': 'message',
+        'subtype': 'message_changed',
+        'channel': 'C1',
+        'hidden': True,
+        'ts': '1532950001.000100',
+        'event_ts': '1532950001.000100',
+        'message': {
+            'type': 'message',
+            'user': 'U1',
+            'text': 'hello yui',
+            'ts': '1532950000.000100',
+            'edited': {'user': 'U1', 'ts': '1532950001.000000'},
+        },
+        'previous_message': {
+            'type': 'message',
+            'user': 'U1',
+            'text': 'hello world',
+            'ts': '1532950000.000100',
+        },
+    },
+    {
+        'type': 'user_typing',
+        'channel': 'C1',
+        'user': 'U2',
+    },
+    {
+        'type': 'presence_change',
+        'user': 'U2',
+        'presence': 'away',
+    },
+    {
+        'type': 'channel_marked',
+        'channel': 'C1',
+        'ts': '1532950000.000100',
+    },
+    {
+        'type': 'reaction_added',
+        'user': 'U2',
+        'reaction': 'thumbsup',
+        'item_user': 'U1',
+        'item': {
+            'type': 'message',
+            'channel': 'C1',
+            'ts': '1532950000.000100',
+        },
+        'event_ts': '1532950002.000100',
+    },
+    {
+        'type': 'pong',
+        'reply_to': 1,
+    },
+]
+
+
+def load_frames(path: str) -> List[Dict]:
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt') as f:  # type: ignore
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@contextlib.contextmanager
+def legacy_cast() -> Iterator[None]:
+    """Cast with scanning all casters on every call, like before."""
+
+    compiled = Caster.cast
+    Caster.cast = Caster.dispatch  # type: ignore
+    try:
+        yield
+    finally:
+        Caster.cast = compiled  # type: ignore
+
+
+def run(payloads: List[Dict]):
+    for payload in payloads:
+        event = create_event(payload)
+        # touch every field like eager handlers do
+        event.__dict__
+
+
+def measure(payloads: List[Dict]) -> float:
+    timer = timeit.Timer(lambda: run(payloads))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def main():
+    BotLinkedNamespace._bot = SimpleNamespace(  # type: ignore
+        directory=Directory(),
+    )
+    if len(sys.argv) > 1:
+        payloads = load_frames(sys.argv[1])
+    else:
+        payloads = PAYLOADS * 100
+
+    with legacy_cast():
+        legacy = measure(payloads)
+    cast.plans.clear()
+    compiled = measure(payloads)
+
+    print(f'{"mode":>10} {"usec/event":>12} {"events/sec":>12}')
+    for mode, elapsed in [('legacy', legacy), ('compiled', compiled)]:
+        per_event = elapsed / len(payloads)
+        print(
+            f'{mode:>10} {per_event * 1e6:>12.2f} '
+            f'{1 / per_event:>12.0f}'
+        )
+    print(f'speedup: {legacy / compiled:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
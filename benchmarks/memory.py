@@ -0,0 +1,156 @@
+""":mod:`benchmarks.memory` --- memory of directory on large workspace
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Measure memory which users and channels of a synthetic workspace take with
+compact models, compared with models which keep every field as attribute.
+
+.. code-block:: bash
+
+   python -m benchmarks.memory
+
+"""
+
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from yui.type import Namespace, PrivateChannel, PublicChannel, User
+
+USER_COUNT = 20000
+CHANNEL_COUNT = 2000
+GROUP_COUNT = 500
+MEMBER_COUNT = 50
+
+AVATAR = 'https://avatars.slack-edge.com/2018-01-01/{}_{:032x}_{}.png'
+
+
+def full_model(compact: type) -> type:
+    """Make model which keeps every field as attribute like before."""
+
+    return type(
+        f'Full{compact.__name__}',
+        (Namespace,),
+        {'__annotations__': dict(compact.__annotations__)},
+    )
+
+
+def make_user(i: int) -> Dict[str, Any]:
+    name = f'user{i}'
+    return {
+        'id': f'U{i:08d}',
+        'team_id': 'T00000001',
+        'name': name,
+        'deleted': False,
+        'color': '9f69e7',
+        'real_name': f'User {i}',
+        'tz': 'Asia/Seoul',
+        'tz_label': 'Korea Standard Time',
+        'tz_offset': 32400,
+        'profile': {
+            'avatar_hash': f'{i:012x}',
+            'title': '',
+            'phone': '',
+            'skype': '',
+            'real_name': f'User {i}',
+            'real_name_normalized': f'User {i}',
+            'display_name': name,
+            'display_name_normalized': name,
+            'status_text': '',
+            'status_emoji': '',
+            'first_name': 'User',
+            'last_name': str(i),
+            'email': f'{name}@example.com',
+            **{
+                f'image_{size}': AVATAR.format(i, i * 7919, size)
+                for size in (24, 32, 48, 72, 192, 512)
+            },
+            'team': 'T00000001',
+        },
+        'is_admin': False,
+        'is_owner': False,
+        'is_primary_owner': False,
+        'is_restricted': False,
+        'is_ultra_restricted': False,
+        'is_bot': False,
+        'updated': 1500000000 + i,
+        'is_app_user': False,
+        'has_2fa': False,
+        'locale': 'ko-KR',
+        'presence': 'away',
+    }
+
+
+def make_channel(prefix: str, i: int) -> Dict[str, Any]:
+    text = {
+        'value': f'Topic of channel {i}',
+        'creator': f'U{i:08d}',
+        'last_set': 1500000000 + i,
+    }
+    return {
+        'id': f'{prefix}{i:08d}',
+        'name': f'channel-{i}',
+        'name_normalized': f'channel-{i}',
+        'created': 1500000000 + i,
+        'creator': f'U{i:08d}',
+        'is_channel': prefix == 'C',
+        'is_group': prefix == 'G',
+        'is_archived': False,
+        'is_general': i == 0,
+        'is_member': True,
+        'members': [
+            f'U{(i + j) % USER_COUNT:08d}' for j in range(MEMBER_COUNT)
+        ],
+        'topic': text,
+        'purpose': text,
+        'previous_names': [],
+    }
+
+
+def measure(make: Callable[[], List]) -> int:
+    tracemalloc.start()
+    try:
+        items = make()  # noqa
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return size
+
+
+def main():
+    users = [make_user(i) for i in range(USER_COUNT)]
+    channels = [make_channel('C', i) for i in range(CHANNEL_COUNT)]
+    groups = [make_channel('G', i) for i in range(GROUP_COUNT)]
+    cases = [
+        ('users', User, users),
+        ('channels', PublicChannel, channels),
+        ('groups', PrivateChannel, groups),
+    ]
+    print(
+        f'{"kind":>8} {"count":>6} {"full MB":>9} {"compact MB":>11} '
+        f'{"ratio":>6} {"build usec":>11} {"hot nsec":>9} {"cold usec":>10}'
+    )
+    for kind, compact, payloads in cases:
+        full = full_model(compact)
+        full_size = measure(lambda: [full(**x) for x in payloads])
+        compact_size = measure(lambda: [compact(**x) for x in payloads])
+        build = timeit.timeit(
+            lambda: [compact(**x) for x in payloads],
+            number=1,
+        ) / len(payloads)
+        item = compact(**payloads[0])
+        hot = min(timeit.repeat(lambda: item.name, number=100000)) / 100000
+        cold_field = 'profile' if kind == 'users' else 'members'
+        cold = min(timeit.repeat(
+            lambda: getattr(item, cold_field),
+            number=1000,
+        )) / 1000
+        print(
+            f'{kind:>8} {len(payloads):>6} '
+            f'{full_size / 2 ** 20:>9.2f} {compact_size / 2 ** 20:>11.2f} '
+            f'{full_size / compact_size:>6.1f} {build * 1e6:>11.1f} '
+            f'{hot * 1e9:>9.1f} {cold * 1e6:>10.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+""":mod:`benchmarks.parser` --- scaling of option/argument parser
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Measure how :func:`yui.box.parse_option_and_arguments` scales with count of
+tokens and count of options.
+
+.. code-block:: bash
+
+   python -m benchmarks.parser
+
+"""
+
+import timeit
+from typing import List
+
+from yui.box import parse_option_and_arguments
+from yui.command import argument, option
+
+TOKEN_COUNTS = (10, 100, 1000, 10000)
+OPTION_COUNTS = (1, 10, 50)
+
+
+def make_command(option_count: int):
+    async def command(values: List[str]):
+        pass
+
+    for i in range(option_count):
+        command = option(f'--option-{i}', default='')(command)
+    return argument('values', nargs=-1)(command)
+
+
+def make_chunks(token_count: int, option_count: int) -> List[str]:
+    chunks: List[str] = []
+    while len(chunks) < token_count // 2:
+        i = len(chunks) // 2 % option_count
+        chunks.append(f'--option-{i}=value')
+    while len(chunks) < token_count:
+        chunks.append('value')
+    return chunks
+
+
+def main():
+    print(f'{"options":>8} {"tokens":>8} {"usec/call":>12} {"nsec/token":>12}')
+    for option_count in OPTION_COUNTS:
+        command = make_command(option_count)
+        for token_count in TOKEN_COUNTS:
+            chunks = make_chunks(token_count, option_count)
+            timer = timeit.Timer(
+                lambda: parse_option_and_arguments(command, chunks),
+            )
+            number, _ = timer.autorange()
+            elapsed = min(timer.repeat(repeat=3, number=number)) / number
+            print(
+                f'{option_count:>8} {token_count:>8} '
+                f'{elapsed * 1e6:>12.2f} '
+                f'{elapsed * 1e9 / token_count:>12.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -41,3 +41,13 @@ async def test_slack_api_groups_list():
         'exclude_archived': bool2str(True),
         'exclude_members': bool2str(True),
     }
+
+    await bot.api.groups.list(False, cursor='asdf1234', limit=200)
+    call = bot.call_queue.pop()
+    assert call.method == 'groups.list'
+    assert call.data == {
+        'exclude_archived': bool2str(False),
+        'exclude_members': bool2str(True),
+        'cursor': 'asdf1234',
+        'limit': '200',
+    }
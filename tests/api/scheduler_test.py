@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from yui.api.scheduler import (
+    Priority,
+    Scheduler,
+    TokenBucket,
+    current_priority,
+    priority,
+)
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=1, capacity=2)
+
+    assert bucket.delay(0) == 0
+    bucket.take(0)
+    bucket.take(0)
+    assert bucket.delay(0) == 1
+    assert bucket.delay(0.5) == 0.5
+    assert bucket.delay(1) == 0
+
+    bucket.pause(1, 5)
+    assert bucket.delay(1) == 5
+    assert bucket.delay(10) == 0
+
+
+def test_priority():
+    assert current_priority() == Priority.INTERACTIVE
+    with priority(Priority.BULK):
+        assert current_priority() == Priority.BULK
+    assert current_priority() == Priority.INTERACTIVE
+
+
+@pytest.mark.asyncio
+async def test_scheduler():
+    scheduler = Scheduler(tier_rates={'tier3': 6000})
+    done = []
+
+    await scheduler.acquire('chat.delete')
+    assert scheduler.depth('tier3') == 0
+    scheduler.get_bucket('tier3').tokens = 0
+
+    async def call(name, level):
+        with priority(level):
+            await scheduler.acquire('channels.info')
+        done.append(name)
+
+    bulk = [
+        asyncio.ensure_future(call(f'bulk{i}', Priority.BULK))
+        for i in range(3)
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.depth('tier3') == 3
+    assert scheduler.metrics.get_gauge('api_queue_depth', tier='tier3') == 3
+
+    await call('interactive', Priority.INTERACTIVE)
+    await asyncio.gather(*bulk)
+
+    assert done == ['interactive', 'bulk0', 'bulk1', 'bulk2']
+    assert scheduler.depth('tier3') == 0
+    summary = scheduler.metrics.get_summary(
+        'api_wait_seconds',
+        method='channels.info',
+        priority='bulk',
+    )
+    assert summary.count == 3
+    assert summary.max > 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_retry_after(event_loop):
+    scheduler = Scheduler()
+
+    scheduler.retry_after('chat.delete', 0.05)
+    assert scheduler.metrics.get('api_rate_limited', method='chat.delete') == 1
+
+    start = event_loop.time()
+    await scheduler.acquire('channels.info')
+    assert event_loop.time() - start >= 0.04
+
+    start = event_loop.time()
+    await scheduler.acquire('users.info')
+    assert event_loop.time() - start < 0.04
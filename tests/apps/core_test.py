@@ -0,0 +1,241 @@
+import pytest
+
+from yui.apps.core import (
+    channel_added,
+    channel_archived,
+    channel_closed,
+    channel_created,
+    channel_removed,
+    channel_renamed,
+    load_snapshot,
+    on_start,
+    reconcile_directory,
+    save_directory,
+    schedule_full_reconcile,
+)
+from yui.event import create_event
+from yui.type import DirectMessageChannel, PublicChannel, User
+
+from ..util import FakeBot
+
+
+@pytest.mark.asyncio
+async def test_channel_events(fx_config):
+    bot = FakeBot(fx_config)
+    bot.add_channel('C1', 'general')
+    bot.add_private_channel('G1', 'secret')
+    bot.add_dm('D1', 'U1')
+
+    event = create_event({
+        'type': 'channel_joined',
+        'channel': {
+            'id': 'C2',
+            'name': 'random',
+            'name_normalized': 'random',
+            'created': 1360782804,
+            'is_general': False,
+            'is_member': True,
+            'members': ['U1'],
+        },
+    }, lazy=True)
+    assert await channel_added(bot, event)
+    assert bot.channels[-1].id == 'C2'
+    assert bot.channels[-1].is_member
+
+    event = create_event({
+        'type': 'channel_rename',
+        'channel': {'id': 'C2', 'name': 'notice', 'created': 1360782804},
+    })
+    assert await channel_renamed(bot, event)
+    assert bot.directory.get_channel_by_name('notice').id == 'C2'
+    assert bot.directory.get_channel_by_name('random') is None
+
+    event = create_event({'type': 'group_archive', 'channel': 'G1'})
+    assert await channel_archived(bot, event)
+    assert bot.groups[0].is_archived
+
+    event = create_event({'type': 'channel_deleted', 'channel': 'C1'})
+    assert await channel_removed(bot, event)
+    assert [c.id for c in bot.channels] == ['C2']
+
+    event = create_event({'type': 'im_close', 'user': 'U1', 'channel': 'D1'})
+    assert await channel_closed(bot, event)
+    assert bot.ims[0].is_open is False
+
+    assert not bot.directory.stale
+    event = create_event({'type': 'channel_archive', 'channel': 'C3'})
+    assert await channel_archived(bot, event)
+    assert bot.directory.stale == {'channels'}
+
+    bot.directory.stale.clear()
+    event = create_event({
+        'type': 'channel_created',
+        'channel': {'id': 'C4', 'name': 'food', 'created': 1360782804},
+    }, lazy=True)
+    assert await channel_created(bot, event)
+    assert bot.directory.get_channel('C4') is None
+    assert bot.directory.stale == {'channels'}
+
+    assert bot.call_queue == []
+
+
+@pytest.mark.asyncio
+async def test_reconcile_directory(fx_config):
+    bot = FakeBot(fx_config)
+    bot.add_dm('D1', 'U1')
+
+    await reconcile_directory(bot)
+    assert bot.call_queue == []
+
+    @bot.response('im.list')
+    def im_list(data):
+        return {
+            'ok': True,
+            'ims': [{'id': 'D2', 'user': 'U2'}],
+        }
+
+    bot.directory.stale.update({'ims'})
+    await reconcile_directory(bot)
+    assert [call.method for call in bot.call_queue] == ['im.list']
+    assert bot.directory.get_dm('U2').id == 'D2'
+    assert bot.directory.get_dm('U1') is None
+    assert not bot.directory.stale
+
+    @bot.response('channels.list')
+    def channels_list(data):
+        return {
+            'ok': True,
+            'channels': [{'id': 'C1', 'name': 'general'}],
+        }
+
+    bot.call_queue.clear()
+    bot.directory.stale.update({'channels'})
+    await reconcile_directory(bot)
+    # reconcile does not call channels.info for each channel
+    assert [call.method for call in bot.call_queue] == ['channels.list']
+    assert bot.directory.get_channel_by_name('general').id == 'C1'
+
+    await schedule_full_reconcile(bot)
+    assert bot.directory.stale == {'channels', 'groups', 'ims', 'users'}
+
+
+@pytest.mark.asyncio
+async def test_on_start(fx_config):
+    fx_config.BOOTSTRAP_CONCURRENCY = 2
+    bot = FakeBot(fx_config)
+
+    @bot.response('channels.list')
+    def channels_list(data):
+        if data.get('cursor') == 'page2':
+            return {'ok': True, 'channels': [{'id': 'C3'}]}
+        return {
+            'ok': True,
+            'channels': [{'id': 'C1'}, {'id': 'C2'}],
+            'response_metadata': {'next_cursor': 'page2'},
+        }
+
+    @bot.response('channels.info')
+    def channels_info(data):
+        if data['channel'] == 'C2':
+            return {'ok': False, 'error': 'channel_not_found'}
+        return {
+            'ok': True,
+            'channel': {'id': data['channel'], 'name': data['channel']},
+        }
+
+    @bot.response('groups.list')
+    def groups_list(data):
+        return {'ok': True, 'groups': [{'id': 'G1'}]}
+
+    @bot.response('groups.info')
+    def groups_info(data):
+        return {'ok': True, 'group': {'id': 'G1', 'name': 'secret'}}
+
+    @bot.response('im.list')
+    def im_list(data):
+        return {'ok': True, 'ims': [{'id': 'D1', 'user': 'U1'}]}
+
+    @bot.response('users.list')
+    def users_list(data):
+        if data.get('cursor') == 'page2':
+            return {'ok': True, 'members': [{'id': 'U2', 'name': 'asuna'}]}
+        return {
+            'ok': True,
+            'members': [{'id': 'U1', 'name': 'kirito'}],
+            'response_metadata': {'next_cursor': 'page2'},
+        }
+
+    assert not bot.directory.is_ready()
+    assert await on_start(bot)
+    assert bot.directory.is_ready()
+
+    assert [c.id for c in bot.channels] == ['C1', 'C3']
+    assert [g.name for g in bot.groups] == ['secret']
+    assert [d.user for d in bot.ims] == ['U1']
+    assert sorted(bot.users) == ['U1', 'U2']
+    assert bot.directory.progress == {
+        'channels': 2,
+        'groups': 1,
+        'ims': 1,
+        'users': 2,
+    }
+    assert bot.directory.get_user_by_name('asuna').id == 'U2'
+
+    bot.call_queue.clear()
+    assert await on_start(bot)
+    assert bot.call_queue == []
+    assert bot.directory.stale == {'channels', 'groups', 'ims', 'users'}
+
+
+@pytest.mark.asyncio
+async def test_on_start_seeded(fx_config):
+    bot = FakeBot(fx_config)
+    bot.directory.seed({
+        'ok': True,
+        'channels': [{'id': 'C1', 'name': 'general'}],
+        'groups': [],
+        'ims': [],
+        'users': [{'id': 'U1', 'name': 'kirito'}],
+    })
+
+    assert await on_start(bot)
+    assert bot.call_queue == []
+    assert not bot.directory.stale
+    assert not bot.directory.seeded
+
+    assert await on_start(bot)
+    assert bot.call_queue == []
+    assert bot.directory.stale == {'channels', 'groups', 'ims', 'users'}
+
+
+@pytest.mark.asyncio
+async def test_directory_snapshot(fx_config, fx_tmpdir):
+    fx_config.DIRECTORY_SNAPSHOT_PATH = str(fx_tmpdir / 'directory.json.gz')
+    bot = FakeBot(fx_config)
+    assert not await load_snapshot(bot)
+
+    bot.directory.replace('channels', [
+        PublicChannel(
+            id='C1',
+            name='general',
+            topic={'value': 'hello', 'creator': 'U1', 'last_set': 0},
+        ),
+    ])
+    bot.directory.replace('groups', [])
+    bot.directory.replace('ims', [DirectMessageChannel(id='D1', user='U1')])
+    bot.directory.replace('users', [User(id='U1', name='kirito')])
+    await save_directory(bot)
+    assert bot.directory.saved_version == bot.directory.version
+
+    bot = FakeBot(fx_config)
+    assert await on_start(bot)
+    assert bot.call_queue == []
+    assert bot.directory.is_ready()
+    assert bot.directory.stale == {'channels', 'groups', 'ims', 'users'}
+    assert bot.directory.get_channel_by_name('general').topic.value == 'hello'
+    assert bot.directory.get_dm('U1').id == 'D1'
+    assert bot.directory.get_user_by_name('kirito').id == 'U1'
+
+    (fx_tmpdir / 'directory.json.gz').write_bytes(b'broken')
+    bot = FakeBot(fx_config)
+    assert not await load_snapshot(bot)
@@ -0,0 +1,45 @@
+import pytest
+
+from yui.apps.owner.profile import profile
+from yui.event import create_event
+
+from ...util import FakeBot
+
+
+@pytest.mark.asyncio
+async def test_profile_command(fx_config):
+    fx_config.OWNER_ID = 'U1'
+    bot = FakeBot(fx_config)
+    bot.add_channel('C1', 'general')
+    bot.add_user('U1', 'kirito')
+    bot.add_user('U2', 'PoH')
+
+    event = create_event({
+        'type': 'message',
+        'channel': 'C1',
+        'user': 'U1',
+    })
+
+    await profile(bot, event, 1, 5)
+
+    said = bot.call_queue.pop(0)
+    assert said.method == 'chat.postMessage'
+    assert said.data['channel'] == 'C1'
+    assert said.data['text'] == '1초 동안 프로파일링할게요!'
+    said = bot.call_queue.pop(0)
+    assert said.data['text'].startswith('```\n')
+    assert 'top 5 frames by own:' in said.data['text']
+
+    event = create_event({
+        'type': 'message',
+        'channel': 'C1',
+        'user': 'U2',
+    })
+
+    await profile(bot, event, 1, 5)
+
+    said = bot.call_queue.pop(0)
+    assert said.method == 'chat.postMessage'
+    assert said.data['channel'] == 'C1'
+    assert said.data['text'] == '<@PoH> 이 명령어는 아빠만 사용할 수 있어요!'
+    assert not bot.call_queue
@@ -0,0 +1,18 @@
+from yui.apps.shared.html import parse_html
+from yui.buffer import SharedBuffer
+
+HTML = '<html><head></head><body><p>키리토</p></body></html>'
+
+
+def test_parse_html():
+    assert parse_html(HTML).cssselect('p')[0].text == '키리토'
+    data = HTML.encode('euc-kr')
+    assert parse_html(data, 'euc-kr').cssselect('p')[0].text == '키리토'
+
+    buffer = SharedBuffer.create(data)
+    try:
+        with buffer.open() as f:
+            h = parse_html(f, 'euc-kr')
+        assert h.cssselect('p')[0].text == '키리토'
+    finally:
+        buffer.unlink()
@@ -0,0 +1,64 @@
+import pytest
+
+from yui.bench import BenchBot, percentile, replay
+from yui.box import Box
+from yui.event import Hello, Message
+
+
+def test_percentile():
+    assert percentile([], 50) == 0.0
+    values = [float(x) for x in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile(values, 100) == 100.0
+    assert percentile([1.0], 99) == 1.0
+
+
+@pytest.mark.asyncio
+async def test_replay(fx_config):
+    box = Box()
+    bot = BenchBot(fx_config, using_box=box)
+    said = []
+
+    @box.on(Hello)
+    async def on_hello():
+        pass
+
+    @box.on(Message)
+    async def on_message(bot, event):
+        if event.text == 'fail':
+            raise ValueError()
+        said.append(event.text)
+        await bot.say(event.channel, event.text)
+
+    frames = [
+        (0.0, {'type': 'hello'}),
+        (0.0, {'type': 'user_typing', 'user': 'U1'}),
+        (0.1, {'type': 'message', 'channel': 'C1', 'user': 'U1',
+               'text': 'hi', 'ts': '1.0'}),
+        (0.2, {'type': 'message', 'channel': 'C1', 'user': 'U1',
+               'text': 'fail', 'ts': '2.0'}),
+    ]
+    result = await replay(bot, frames)
+    assert result.frames == 4
+    assert result.events == 3
+    assert result.errors == 1
+    assert len(result.latencies) == 3
+    assert result.latencies == sorted(result.latencies)
+    assert result.api_calls['chat.postMessage'] == 1
+    assert result.seconds < 0.2
+    assert said == ['hi']
+    assert bot.metrics.get(
+        'handler_errors',
+        handler=on_message.__qualname__,
+    ) == 1
+    assert result.events_per_second == result.events / result.seconds
+    text = result.format()
+    assert 'frames: 4 (3 dispatched, 1 errors)' in text
+    assert 'api call: chat.postMessage x1' in text
+
+    result = await replay(bot, frames, pace=True)
+    assert result.seconds >= 0.2
+    assert result.errors == 1
+    assert len(result.latencies) == 3
+    assert said == ['hi', 'hi']
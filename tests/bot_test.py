@@ -7,6 +7,7 @@ import ujson
 from yui.api import SlackAPI
 from yui.bot import APICallError, Bot
 from yui.box import Box
+from yui.event import Hello, Message, create_event
 
 from .util import FakeImportLib
 
@@ -85,6 +86,7 @@ async def test_call(fx_config, response_mock):
 
     box = Box()
     bot = Bot(fx_config, using_box=box)
+    session = bot.session_pool.session
 
     res = await bot.call('test11')
     assert res['res'] == 'hello world!'
@@ -109,3 +111,176 @@ async def test_call(fx_config, response_mock):
 
     res = await bot.call('test3', token=token)
     assert res['res'] == 'hello world!'
+
+    assert bot.session_pool.session is session
+    await bot.session_pool.close()
+
+
+@pytest.mark.asyncio
+async def test_call_rate_limited(fx_config, response_mock):
+    response_mock.post(
+        'https://slack.com/api/chat.delete',
+        body=ujson.dumps({'ok': False, 'error': 'ratelimited'}),
+        headers={'content-type': 'application/json', 'Retry-After': '0'},
+        status=429,
+    )
+    response_mock.post(
+        'https://slack.com/api/chat.delete',
+        body=ujson.dumps({'ok': True}),
+        headers={'content-type': 'application/json'},
+        status=200,
+    )
+
+    bot = Bot(fx_config, using_box=Box())
+
+    res = await bot.call('chat.delete')
+    assert res['ok']
+    assert bot.metrics.get('api_rate_limited', method='chat.delete') == 1
+    assert bot.metrics.get(
+        'api_calls',
+        method='chat.delete',
+        status=429,
+    ) == 1
+    assert bot.metrics.get(
+        'api_calls',
+        method='chat.delete',
+        status=200,
+    ) == 1
+    assert bot.metrics.get_summary(
+        'api_call_seconds',
+        method='chat.delete',
+    ).count == 2
+    await bot.session_pool.close()
+
+
+@pytest.mark.asyncio
+async def test_process(fx_config):
+    fx_config.DISPATCH_WORKERS = 2
+    box = Box()
+    bot = Bot(fx_config, using_box=box)
+    done = []
+
+    @box.on(Message)
+    async def slow(event):
+        if event.text == 'slow':
+            await asyncio.sleep(0.1)
+        done.append((event.channel.id, event.text))
+
+    for channel, text in [
+        ('C1', 'slow'),
+        ('C1', 'first'),
+        ('C2', 'fast'),
+        ('C1', 'second'),
+    ]:
+        await bot.queue.put(create_event({
+            'type': 'message',
+            'channel': channel,
+            'text': text,
+        }))
+
+    task = asyncio.ensure_future(bot.process())
+    await asyncio.sleep(0.3)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert done == [
+        ('C2', 'fast'),
+        ('C1', 'slow'),
+        ('C1', 'first'),
+        ('C1', 'second'),
+    ]
+    summary = bot.metrics.get_summary(
+        'handler_seconds',
+        handler=slow.__qualname__,
+    )
+    assert summary.count == 4
+    assert summary.max >= 0.1
+
+
+@pytest.mark.asyncio
+async def test_process_error(fx_config):
+    fx_config.DISPATCH_WORKERS = 1
+    fx_config.LAZY_EVENTS = True
+    box = Box()
+    bot = Bot(fx_config, using_box=box)
+    done = []
+
+    async def say(*args, **kwargs):
+        raise APICallError('fail to report')
+
+    bot.say = say
+
+    @box.on(Message)
+    async def fail(event):
+        if event.text == 'fail':
+            raise ValueError(event.text)
+        done.append((event.channel.id, event.text))
+
+    # channel of malformed lazy event can not be cast
+    await bot.queue.put(create_event(
+        {'type': 'message', 'channel': None, 'text': 'malformed'},
+        lazy=True,
+    ))
+    for text in ['fail', 'first', 'fail', 'second']:
+        await bot.queue.put(create_event({
+            'type': 'message',
+            'channel': 'C1',
+            'text': text,
+        }))
+
+    task = asyncio.ensure_future(bot.process())
+    await asyncio.sleep(0.1)
+    assert not task.done()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert done == [('C1', 'first'), ('C1', 'second')]
+
+
+def test_collect_metrics(fx_config):
+    bot = Bot(fx_config, using_box=Box())
+    bot.directory.progress['users'] = 3
+
+    assert 'yui_directory_ready 0' in bot.metrics.render()
+    assert bot.metrics.get_gauge('directory_loaded', kind='users') == 3
+
+    for kind in ['channels', 'groups', 'ims', 'users']:
+        bot.directory.replace(kind, [])
+    bot.metrics.render()
+    assert bot.metrics.get_gauge('directory_ready') == 1
+    assert bot.metrics.get_gauge('directory_loaded', kind='users') == 0
+
+
+def test_make_event(fx_config):
+    box = Box()
+    bot = Bot(fx_config, using_box=box)
+
+    @box.on(Hello)
+    async def on_hello():
+        pass
+
+    assert isinstance(bot.make_event({'type': 'hello'}), Hello)
+    assert bot.make_event({'type': 'user_typing', 'user': 'U1'}) is None
+    assert bot.make_event({'ok': True, 'reply_to': 1}) is None
+    assert bot.metrics.get('events_received', type='hello') == 1
+    assert bot.metrics.get('events_dropped', type='hello') == 0
+    assert bot.metrics.get('events_received', type='user_typing') == 1
+    assert bot.metrics.get('events_dropped', type='user_typing') == 1
+    assert bot.metrics.get('events_dropped', type=None) == 1
+
+
+def test_make_event_lazy_channel(fx_config):
+    fx_config.LAZY_EVENTS = True
+    fx_config.CHANNELS = {}
+    box = Box()
+    bot = Bot(fx_config, using_box=box)
+
+    @box.on(Message)
+    async def on_message():
+        pass
+
+    # channel of lazy event is cast in make_event, not in dispatcher
+    with pytest.raises(Exception):
+        bot.make_event({'type': 'message', 'channel': None})
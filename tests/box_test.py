@@ -4,11 +4,21 @@ from typing import List, Set
 
 import pytest
 
-from yui.box import Box, Handler, parse_option_and_arguments
+from yui.box import (
+    Box,
+    CommandMappingHandler,
+    Handler,
+    compile_spec,
+    get_spec,
+    parse_message,
+    parse_option_and_arguments,
+)
 from yui.command import argument, option
 from yui.event import Hello, Message
 from yui.transform import str_to_date, value_range
 
+from .util import FakeBot
+
 
 def test_box_class():
     box = Box()
@@ -66,6 +76,124 @@ def test_box_class():
     assert box.crontabs[0].func == test4
 
 
+def test_box_get_handlers():
+    box = Box()
+
+    @box.on(Message)
+    async def on_message():
+        pass
+
+    @box.command('hello', ['hi'])
+    async def hello():
+        pass
+
+    @box.on(Hello)
+    async def on_hello():
+        pass
+
+    @box.on(Message, subtype='message_changed')
+    async def on_changed():
+        pass
+
+    @box.command('bye')
+    async def bye():
+        pass
+
+    @box.on(Message)
+    async def on_message2():
+        pass
+
+    def callbacks(event):
+        return [h.callback for h in box.get_handlers(event, '=')]
+
+    assert callbacks(Message(text='=hello world')) == [
+        on_message,
+        hello,
+        on_message2,
+    ]
+    assert callbacks(Message(text='=hi')) == [on_message, hello, on_message2]
+    assert callbacks(Message(text='=bye')) == [on_message, bye, on_message2]
+    assert callbacks(Message(text='hello')) == [on_message, on_message2]
+    assert callbacks(Message(
+        subtype='message_changed',
+        message={'text': '=hello'},
+    )) == [on_changed]
+    assert callbacks(Hello()) == [on_hello]
+
+    @box.on(Hello)
+    async def on_hello2():
+        pass
+
+    assert callbacks(Hello()) == [on_hello, on_hello2]
+
+    async def hey():
+        pass
+
+    box.register(Handler(
+        'hello',
+        None,
+        hey,
+        name='hey',
+        aliases=['yo', 'sup'],
+        is_command=True,
+    ))
+
+    assert callbacks(Hello()) == [on_hello, on_hello2, hey]
+
+
+def test_box_subscribes():
+    box = Box()
+
+    assert not box.subscribes('message')
+
+    @box.command('hello')
+    async def hello():
+        pass
+
+    @box.on(Hello)
+    async def on_hello():
+        pass
+
+    assert box.subscribes('message')
+    assert not box.subscribes('message', 'bot_message')
+    assert box.subscribes('hello')
+    assert not box.subscribes('user_typing')
+
+    class Mapping(CommandMappingHandler):
+        name = 'map'
+
+    box.register(Mapping())
+
+    assert box.subscribes('message', 'bot_message')
+    assert not box.subscribes('user_typing')
+
+
+def test_parse_message():
+    event = Message(text='=hello &lt;a&gt; "b c"')
+    parsed = parse_message(event)
+
+    assert parsed is parse_message(event)
+    assert parsed.call == '=hello'
+    assert parsed.args == '&lt;a&gt; "b c"'
+    assert parsed.raw == '<a> "b c"'
+    assert parsed.get_chunks(True) == ['<a>', 'b c']
+    assert parsed.get_chunks(False) == ['<a>', '"b', 'c"']
+    assert parsed.get_chunks(True) is parsed.get_chunks(True)
+    assert event == Message(text='=hello &lt;a&gt; "b c"')
+    assert '_parsed_message' not in repr(event)
+
+    parsed = parse_message(Message(text='=hello "a'))
+    with pytest.raises(ValueError):
+        parsed.get_chunks(True)
+
+    parsed = parse_message(Message(
+        subtype='message_changed',
+        message={'text': '=edited'},
+    ))
+    assert parsed.call == '=edited'
+    assert parsed.args == ''
+
+
 def test_handler_class():
     box = Box()
 
@@ -112,6 +240,66 @@ LONG"""
     )
 
 
+def test_prepare_kwargs(fx_config, fx_engine):
+    async def callback(bot):
+        pass
+
+    handler = Handler('message', None, callback)
+    bot = FakeBot(fx_config)
+    assert not hasattr(fx_config, 'DATABASE_ENGINE')  # no session is made
+
+    with handler.prepare_kwargs(
+        bot=bot,
+        event=None,
+        injectables={'bot'},
+    ) as kwargs:
+        assert kwargs == {'bot': bot}
+
+    fx_config.DATABASE_ENGINE = fx_engine
+    with handler.prepare_kwargs(
+        bot=bot,
+        event=None,
+        injectables={'sess'},
+    ) as kwargs:
+        assert kwargs['sess'].bind is fx_engine
+
+
+def test_compile_spec():
+    @option('--count', '-c', default=1)
+    @argument('names', nargs=-1)
+    async def test(bot, sess, raw, remain_chunks: List[str], count: int,
+                   names: List[str]):
+        pass
+
+    spec = compile_spec(test)
+    assert spec.params == {
+        'bot', 'sess', 'raw', 'remain_chunks', 'count', 'names',
+    }
+    assert spec.injectables == {'bot', 'sess', 'raw', 'remain_chunks'}
+    assert [o.type_ for o in spec.options] == [int, int]
+    assert [a.type_ for a in spec.arguments] == [List[str]]
+    assert not spec.remain_chunks_as_str
+    assert test.__options__[0].type_ is None
+    assert get_spec(test) is get_spec(test)
+
+    kw, remain_chunks = spec.parse(['-c', '3', 'a', 'b', 'c'])
+    assert kw == {'count': 3, 'names': ['a', 'b', 'c']}
+    assert not remain_chunks
+
+
+def test_parse_option_with_remain_chunks():
+    @option('--count', '-c', default=1)
+    @option('--quiet', '-q', is_flag=True)
+    @argument('name')
+    async def test(count: int, quiet: bool, name: str):
+        pass
+
+    chunks = ['-q', '--count=3', '--quiet=yes', 'world', '-c', '2']
+    kw, remain_chunks = parse_option_and_arguments(test, chunks)
+    assert kw == {'count': 3, 'quiet': True, 'name': 'yes'}
+    assert remain_chunks == ['world', '-c', '2']
+
+
 def test_parse_option_and_arguments():
     box = Box()
 
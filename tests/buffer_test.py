@@ -0,0 +1,61 @@
+import mmap
+import os
+
+import pytest
+
+from yui.buffer import (
+    SHARED_BUFFER_THRESHOLD,
+    SharedBuffer,
+    call_with_buffers,
+    share_large_bytes,
+)
+
+from .util import FakeBot
+
+
+def describe(data, *, tail):
+    return type(data).__name__, len(data), data[:3], tail
+
+
+def test_share_large_bytes():
+    large = b'abc' * SHARED_BUFFER_THRESHOLD
+    args, kwargs, buffers = share_large_bytes((large, b'small'), {'x': large})
+    try:
+        assert len(buffers) == 2
+        assert args[0] == buffers[0]
+        assert args[1] == b'small'
+        assert kwargs['x'] == buffers[1]
+        with buffers[0].open() as buffer:
+            assert isinstance(buffer, mmap.mmap)
+            assert buffer[:] == large
+            assert buffer.read(3) == b'abc'
+
+        assert call_with_buffers(describe, args[:1], {'tail': args[1]}) == (
+            'mmap',
+            len(large),
+            b'abc',
+            b'small',
+        )
+    finally:
+        for buffer in buffers:
+            buffer.unlink()
+    assert not any(os.path.exists(buffer.path) for buffer in buffers)
+    SharedBuffer('/nonexistent/yui-buffer', 0).unlink()
+
+
+@pytest.mark.asyncio
+async def test_run_in_other_process():
+    bot = FakeBot()
+    large = b'abc' * SHARED_BUFFER_THRESHOLD
+    assert await bot.run_in_other_process(describe, large, tail=1) == (
+        'mmap',
+        len(large),
+        b'abc',
+        1,
+    )
+    assert await bot.run_in_other_process(describe, b'abc', tail=1) == (
+        'bytes',
+        3,
+        b'abc',
+        1,
+    )
@@ -0,0 +1,138 @@
+from yui.directory import (
+    Directory,
+    INDEXED_FIELDS,
+    ITEM_TYPES,
+    IndexedDict,
+    IndexedList,
+    dump_items,
+    load_items,
+)
+from yui.type import DirectMessageChannel, PrivateChannel, PublicChannel, User
+
+
+def test_indexed_list():
+    channels = IndexedList(fields=('id', 'name'))
+    general = PublicChannel(id='C1', name='general')
+    random = PublicChannel(id='C2', name='random')
+    channels.append(general)
+    channels.extend([random, PublicChannel(id='C3', name='general')])
+
+    assert channels.find('id', 'C2') is random
+    assert channels.find('name', 'general') is general
+    assert channels.find('id', 'C4') is None
+
+    channels.remove(general)
+    assert channels.find('id', 'C1') is None
+    assert channels.find('name', 'general').id == 'C3'
+
+    channels[:] = [general]
+    assert channels == [general]
+    assert channels.find('id', 'C2') is None
+
+    general.name = 'notice'
+    channels.invalidate()
+    assert channels.find('name', 'notice') is general
+
+    channels.clear()
+    assert channels.find('id', 'C1') is None
+
+
+def test_indexed_dict():
+    users = IndexedDict(fields=('name',))
+    users['U1'] = User(id='U1', name='kirito')
+    assert users.find('name', 'kirito').id == 'U1'
+
+    users['U1'] = User(id='U1', name='kazuto')
+    assert users.find('name', 'kirito') is None
+    assert users.find('name', 'kazuto').id == 'U1'
+
+    del users['U1']
+    assert users.find('name', 'kazuto') is None
+
+
+def test_directory():
+    directory = Directory()
+    directory.channels.append(
+        PublicChannel(id='C1', name='général', name_normalized='general'),
+    )
+    directory.groups.append(PrivateChannel(id='G1', name='secret'))
+    directory.ims.append(DirectMessageChannel(id='D1', user='U1'))
+    directory.users['U1'] = User(id='U1', name='kirito')
+
+    assert directory.get_channel('C1').name == 'général'
+    assert directory.get_channel('G1').name == 'secret'
+    assert directory.get_channel('D1').user == 'U1'
+    assert directory.get_channel('C2') is None
+    assert directory.get_channel('X1') is None
+
+    assert directory.get_channel_by_name('général').id == 'C1'
+    assert directory.get_channel_by_name('general').id == 'C1'
+    assert directory.get_channel_by_name('secret').id == 'G1'
+    assert directory.get_channel_by_name('nothing') is None
+
+    assert directory.get_dm('U1').id == 'D1'
+    assert directory.get_user('U1').name == 'kirito'
+    assert directory.get_user_by_name('kirito').id == 'U1'
+    assert directory.get_user_by_name('asuna') is None
+
+    assert directory.update('C1', is_archived=True)
+    assert not directory.channels.dirty
+    assert directory.update('C1', name='général')
+    assert not directory.channels.dirty
+    assert directory.update('C1', name='notice')
+    assert directory.channels.dirty
+    assert directory.get_channel_by_name('notice').id == 'C1'
+
+
+def test_directory_seed():
+    directory = Directory()
+
+    assert not directory.seed({'ok': True, 'url': 'wss://example.com/'})
+    assert not directory.seeded
+    assert not directory.is_ready()
+
+    directory.stale.update({'channels', 'users'})
+    assert directory.seed({
+        'ok': True,
+        'url': 'wss://example.com/',
+        'channels': [{'id': 'C1', 'name': 'general'}],
+        'groups': [{'id': 'G1', 'name': 'secret'}],
+        'ims': [{'id': 'D1', 'user': 'U1'}],
+        'users': [{'id': 'U1', 'name': 'kirito'}],
+    })
+    assert directory.seeded
+    assert directory.is_ready()
+    assert not directory.stale
+    assert directory.get_channel_by_name('general').id == 'C1'
+    assert directory.get_channel('G1').name == 'secret'
+    assert directory.get_dm('U1').id == 'D1'
+    assert directory.get_user_by_name('kirito').id == 'U1'
+
+
+def test_directory_items():
+    directory = Directory()
+    directory.channels.append(PublicChannel(id='C1', name='general'))
+    directory.users['U1'] = User(id='U1', name='kirito')
+
+    items = directory.copy_items()
+    directory.channels.append(PublicChannel(id='C2', name='random'))
+    assert [c.id for c in items['channels']] == ['C1']
+
+    data = dump_items(items)
+    assert data['channels'][0]['name'] == 'general'
+    assert data['users'][0]['name'] == 'kirito'
+
+    directory = Directory()
+    directory.version = 3
+    directory.restore(load_items(data))
+    assert directory.is_ready()
+    assert directory.saved_version == directory.version
+    assert directory.get_channel_by_name('general').id == 'C1'
+    assert directory.get_user_by_name('kirito').id == 'U1'
+
+
+def test_indexed_fields_are_hot():
+    for kind, fields in INDEXED_FIELDS.items():
+        item = ITEM_TYPES[kind](**{field: 'x' for field in fields})
+        for field in fields:
+            assert item.__dict__[field] == 'x'
@@ -1,4 +1,12 @@
-from yui.event import Event, Hello, TeamMigrationStarted, create_event
+from yui.event import (
+    Event,
+    Hello,
+    Message,
+    TeamMigrationStarted,
+    create_event,
+)
+
+from .util import FakeBot
 
 
 def test_create_event():
@@ -13,3 +21,35 @@ def test_create_event():
     event = create_event({'type': 'not exists it'})
     assert type(event) == Event
     assert event.type == 'not exists it'
+
+
+def test_create_lazy_event(fx_config):
+    bot = FakeBot(fx_config)
+    bot.add_channel('C1', 'general')
+    user = bot.add_user('U1', 'item4')
+    payload = {
+        'type': 'message',
+        'channel': 'C1',
+        'user': 'U1',
+        'text': 'hello',
+        'ts': '1234.5678',
+    }
+
+    event = create_event(dict(payload), lazy=True)
+    assert type(event) == Message
+    assert event.type == 'message'
+    assert event.subtype is None
+    assert 'channel' not in event.__dict__
+    assert 'channel' in repr(event)
+
+    assert event.channel.name == 'general'
+    assert 'channel' in event.__dict__
+    assert 'user' not in event.__dict__
+    assert event.user is user
+    assert not hasattr(event, 'message')
+    assert event == create_event(dict(payload))
+    assert not hasattr(event, '_raw')
+
+    event = create_event({'type': 'message', 'subtype': 'bot_message'},
+                         lazy=True)
+    assert event.subtype == 'bot_message'
@@ -0,0 +1,199 @@
+import asyncio
+
+import aiohttp
+
+import pytest
+
+from yui.api.scheduler import TIER_RATES
+from yui.bot import Bot
+from yui.box import Box
+from yui.event import Message
+from yui.fakeslack import FakeSlack, make_workspace
+
+
+def test_make_workspace():
+    workspace = make_workspace(users=3, channels=2, groups=1)
+    assert [x['id'] for x in workspace['users']] == [
+        'U00000001',
+        'U00000002',
+        'U00000003',
+    ]
+    assert workspace['channels'][0]['name'] == 'general'
+    assert workspace['channels'][1]['members'] == [
+        'U00000001',
+        'U00000002',
+        'U00000003',
+    ]
+    assert len(workspace['groups']) == 1
+    assert workspace['ims'][2] == {'id': 'D00000003', 'user': 'U00000003'}
+
+
+@pytest.mark.asyncio
+async def test_fake_slack_api(unused_tcp_port):
+    slack = FakeSlack(workspace=make_workspace(users=5), seed=1)
+    runner = await slack.serve('127.0.0.1', unused_tcp_port)
+
+    async def call(session, method, **data):
+        async with session.post(slack.api_url + method, data=data) as res:
+            return res.status, await res.json()
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            status, result = await call(session, 'rtm.connect')
+            assert status == 200
+            assert result['url'] == f'ws://127.0.0.1:{unused_tcp_port}/rtm'
+            assert 'users' not in result
+            status, result = await call(session, 'rtm.start')
+            assert len(result['users']) == 5
+
+            status, result = await call(session, 'users.list', limit='2')
+            assert [x['id'] for x in result['members']] == [
+                'U00000001',
+                'U00000002',
+            ]
+            assert result['response_metadata']['next_cursor'] == '2'
+            status, result = await call(
+                session,
+                'users.list',
+                limit='2',
+                cursor='4',
+            )
+            assert [x['id'] for x in result['members']] == ['U00000005']
+            assert result['response_metadata']['next_cursor'] == ''
+
+            status, result = await call(session, 'users.info', user='U2')
+            assert result == {'ok': False, 'error': 'user_not_found'}
+            status, result = await call(
+                session,
+                'channels.info',
+                channel='C00000001',
+            )
+            assert result['channel']['name'] == 'general'
+
+            status, result = await call(
+                session,
+                'chat.postMessage',
+                channel='C00000001',
+                text='hi',
+                token='asdf',
+            )
+            assert result['ok']
+            assert slack.messages == [result['message']]
+            assert slack.messages[0]['text'] == 'hi'
+            assert 'token' not in slack.messages[0]
+
+            status, result = await call(session, 'unknown.method')
+            assert result == {'ok': False, 'error': 'unknown_method'}
+
+            slack.rate_limit_ratio = 1
+            slack.retry_after = 0.5
+            async with session.post(slack.api_url + 'im.list') as res:
+                assert res.status == 429
+                assert res.headers['Retry-After'] == '0.5'
+            assert slack.rate_limited['im.list'] == 1
+            assert slack.api_calls['users.list'] == 2
+    finally:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_fake_slack_bot(fx_config, unused_tcp_port):
+    slack = FakeSlack(
+        workspace=make_workspace(users=2, channels=1),
+        frames=[
+            (0.0, {'type': 'user_typing', 'user': 'U00000001'}),
+            (0.05, {
+                'type': 'message',
+                'channel': 'C00000001',
+                'user': 'U00000001',
+                'text': 'ping',
+                'ts': '1.0',
+            }),
+        ],
+        latency=0.01,
+        disconnect_after=0.3,
+    )
+    runner = await slack.serve('127.0.0.1', unused_tcp_port)
+    box = Box()
+
+    @box.on(Message)
+    async def pong(bot, event):
+        if event.text == 'ping':
+            await bot.say(event.channel, f'pong {event.user.name}')
+        return True
+
+    fx_config.SLACK_API_URL = slack.api_url
+    fx_config.RECEIVE_TIMEOUT = 5
+    # rtm.start is allowed once a minute
+    fx_config.API_TIER_RATES = {tier: 6000 for tier in TIER_RATES}
+    bot = Bot(fx_config, using_box=box)
+    assert bot.scheduler.tier_rates['post'] == 6000
+    bot.loop = asyncio.get_event_loop()
+    bot.session_pool.install()
+    session = bot.session_pool.session
+    tasks = [
+        asyncio.ensure_future(bot.receive()),
+        asyncio.ensure_future(bot.process()),
+    ]
+    try:
+        await asyncio.sleep(1)
+        # reconnection does not close session which others are using
+        assert not session.closed
+        assert bot.session_pool.session is session
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await bot.session_pool.close()
+        await runner.cleanup()
+
+    # last connection can be cut by end of test
+    reconnected = slack.connections - 1
+    assert reconnected >= 1
+    assert slack.api_calls['rtm.start'] >= slack.connections
+    assert slack.events_sent >= 2 * reconnected
+    assert len(slack.messages) >= reconnected
+    assert slack.messages[0]['channel'] == 'C00000001'
+    assert slack.messages[0]['text'] == 'pong user1'
+    assert bot.directory.get_user('U00000002').name == 'user2'
+    assert bot.metrics.get(
+        'api_calls',
+        method='chat.postMessage',
+        status=200,
+    ) == len(slack.messages)
+
+
+@pytest.mark.asyncio
+async def test_fake_slack_rtm(unused_tcp_port):
+    slack = FakeSlack(
+        workspace=make_workspace(users=2, channels=2),
+        texts=['a', 'b'],
+        event_rate=100,
+        seed=1,
+    )
+    runner = await slack.serve('127.0.0.1', unused_tcp_port)
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(
+                f'ws://127.0.0.1:{unused_tcp_port}/rtm',
+            ) as ws:
+                assert (await ws.receive_json()) == {'type': 'hello'}
+                for _ in range(5):
+                    event = await ws.receive_json()
+                    assert event['type'] == 'message'
+                    assert event['channel'] in {'C00000001', 'C00000002'}
+                    assert event['user'] in {'U00000001', 'U00000002'}
+                    assert event['text'] in {'a', 'b'}
+                assert slack.connections == 1
+                await slack.disconnect()
+                msg = await ws.receive()
+                while msg.type == aiohttp.WSMsgType.TEXT:
+                    msg = await ws.receive()
+                assert msg.type in {
+                    aiohttp.WSMsgType.CLOSE,
+                    aiohttp.WSMsgType.CLOSED,
+                }
+        assert slack.events_sent >= 5
+        assert not slack.websockets
+    finally:
+        await runner.cleanup()
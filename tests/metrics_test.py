@@ -0,0 +1,77 @@
+import aiohttp
+
+import pytest
+
+from yui.metrics import Metrics
+
+
+def test_metrics_counter():
+    metrics = Metrics()
+
+    assert metrics.get('events', type='hello') == 0
+
+    metrics.inc('events', type='hello')
+    metrics.inc('events', 2, type='hello')
+    metrics.inc('events', type='message')
+
+    assert metrics.get('events', type='hello') == 3
+    assert metrics.get('events', type='message') == 1
+    assert metrics.get('events') == 0
+
+
+def test_metrics_gauge_and_summary():
+    metrics = Metrics()
+
+    assert metrics.get_gauge('depth', tier='tier3') == 0
+    metrics.set('depth', 3, tier='tier3')
+    metrics.set('depth', 1, tier='tier3')
+    assert metrics.get_gauge('depth', tier='tier3') == 1
+
+    assert metrics.get_summary('wait').count == 0
+    metrics.observe('wait', 0.5, method='chat.delete')
+    metrics.observe('wait', 1.5, method='chat.delete')
+    summary = metrics.get_summary('wait', method='chat.delete')
+    assert summary.count == 2
+    assert summary.sum == 2.0
+    assert summary.max == 1.5
+
+
+def test_metrics_render():
+    metrics = Metrics()
+    metrics.inc('events', type='hello')
+    metrics.inc('events', 2, type='say "hi"\n')
+    metrics.add_collector(lambda: metrics.set('depth', 3))
+    metrics.observe('wait', 0.003, method='chat.delete')
+    metrics.observe('wait', 20, method='chat.delete')
+
+    lines = metrics.render().splitlines()
+    assert lines[:3] == [
+        '# TYPE yui_events_total counter',
+        'yui_events_total{type="hello"} 1',
+        'yui_events_total{type="say \\"hi\\"\\n"} 2',
+    ]
+    assert lines[3:5] == ['# TYPE yui_depth gauge', 'yui_depth 3']
+    assert lines[5] == '# TYPE yui_wait histogram'
+    assert 'yui_wait_bucket{method="chat.delete",le="0.001"} 0' in lines
+    assert 'yui_wait_bucket{method="chat.delete",le="0.005"} 1' in lines
+    assert 'yui_wait_bucket{method="chat.delete",le="10.0"} 1' in lines
+    assert 'yui_wait_bucket{method="chat.delete",le="+Inf"} 2' in lines
+    assert 'yui_wait_sum{method="chat.delete"} 20.003' in lines
+    assert lines[-1] == 'yui_wait_count{method="chat.delete"} 2'
+
+
+@pytest.mark.asyncio
+async def test_metrics_serve(unused_tcp_port):
+    metrics = Metrics()
+    metrics.inc('events', type='hello')
+    runner = await metrics.serve('127.0.0.1', unused_tcp_port)
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(
+                f'http://127.0.0.1:{unused_tcp_port}/metrics',
+            ) as resp:
+                assert resp.status == 200
+                assert resp.headers['Content-Type'].startswith('text/plain')
+                assert 'yui_events_total{type="hello"} 1' in await resp.text()
+    finally:
+        await runner.cleanup()
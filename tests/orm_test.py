@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool, QueuePool
+
+from yui.metrics import Metrics
+from yui.orm import (
+    AsyncDB,
+    EngineConfig,
+    WORKER_ENGINES,
+    get_pool_size,
+    init_worker,
+    subprocess_session_manager,
+)
+
+
+def test_get_pool_size():
+    engine = create_engine(
+        'sqlite://',
+        poolclass=QueuePool,
+        pool_size=3,
+        max_overflow=2,
+    )
+    assert get_pool_size(engine) == 5
+    assert get_pool_size(create_engine('sqlite://', poolclass=NullPool)) == 5
+
+
+@pytest.mark.asyncio
+async def test_async_db(fx_tmpdir):
+    engine = create_engine(f'sqlite:///{fx_tmpdir / "db.sqlite"}')
+    metrics = Metrics()
+    db = AsyncDB(engine, metrics=metrics)
+    threads = set()
+
+    def query(sess, value):
+        threads.add(threading.get_ident())
+        return sess.execute('SELECT :value', {'value': value}).scalar()
+
+    assert await db.run(query, 1) == 1
+    assert await db.run(query, value=2) == 2
+    assert threading.get_ident() not in threads
+    summary = metrics.get_summary('db_query_seconds', query=query.__qualname__)
+    assert summary.count == 2
+
+    def fail(sess):
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        await db.run(fail)
+    assert metrics.get_summary(
+        'db_query_seconds',
+        query=fail.__qualname__,
+    ).count == 1
+    db.executor.shutdown()
+    engine.dispose()
+
+
+def test_worker_engine(fx_tmpdir):
+    engine_config = EngineConfig(
+        url=f'sqlite:///{fx_tmpdir / "db.sqlite"}',
+        echo=False,
+    )
+    broken = EngineConfig(url='', echo=False)
+    init_worker(engine_config, broken)
+    engine = WORKER_ENGINES[engine_config]
+    assert engine.pool.checkedin() == 1
+    assert broken not in WORKER_ENGINES
+
+    for i in range(3):
+        with subprocess_session_manager(engine_config) as sess:
+            assert sess.bind is engine
+            assert sess.execute('SELECT 1').scalar() == 1
+    assert engine.pool.checkedin() == 1
+
+    init_worker()
+    assert not WORKER_ENGINES
+    engine.dispose()
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from yui.metrics import Metrics
+from yui.profiler import StallWatchdog, get_stack, sample
+
+
+def block(seconds):
+    time.sleep(seconds)
+
+
+def test_sample():
+    stopped = threading.Event()
+
+    def busy():
+        while not stopped.is_set():
+            block(0.001)
+
+    thread = threading.Thread(target=busy)
+    thread.start()
+    try:
+        profile = sample(thread.ident, 0.2, interval=0.001)
+    finally:
+        stopped.set()
+        thread.join()
+
+    assert profile.samples > 0
+    assert profile.seconds >= 0.2
+    frames = {name: count for (_, _, name), count in profile.total.items()}
+    assert frames['busy'] == profile.samples
+    assert frames['block'] > 0
+    top = profile.own.most_common(1)[0][0]
+    assert top[2] in {'block', 'busy'}
+    text = profile.format(3)
+    assert text.startswith(f'{profile.samples} samples in')
+    assert 'top 3 frames by own:' in text
+    assert 'profiler_test.py' in text
+
+    assert sample(-1, 0.01).format() == 'no samples'
+
+
+def test_get_stack():
+    assert 'test_get_stack' in get_stack(threading.get_ident())
+    assert get_stack(-1) == ''
+
+
+@pytest.mark.asyncio
+async def test_stall_watchdog():
+    metrics = Metrics()
+    watchdog = StallWatchdog(threshold=0.1, metrics=metrics)
+    heartbeat = watchdog.start()
+    try:
+        await asyncio.sleep(0.2)
+        assert not metrics.get('loop_stalls')
+
+        block(0.3)
+        await asyncio.sleep(0.1)
+        assert metrics.get('loop_stalls') == 1
+        assert metrics.get_summary('loop_lag_seconds').max >= 0.2
+    finally:
+        heartbeat.cancel()
+        watchdog.stop()
+    assert watchdog.thread is None
+
+    # tick is due after interval of 0.05s, so loop is late only by 0.07s
+    watchdog.last_tick = time.monotonic() - 0.12
+    assert watchdog.check() is None
+
+    watchdog.last_tick = time.monotonic() - 1
+    stack = watchdog.check()
+    assert 'test_stall_watchdog' in stack
+    assert watchdog.check() is None  # same stall is reported once
@@ -0,0 +1,50 @@
+import gzip
+
+from yui.recorder import RTMRecorder, SCRUBBED_EPOCH, read_recording, scrub
+
+
+def test_scrub():
+    started_at = 1_500_000_000.0
+    frame = {
+        'type': 'message',
+        'ts': '1500000001.000100',
+        'text': 'hi',
+        'message': {'ts': '1500000002.5', 'edited': {'ts': 'x'}},
+        'attachments': [{'ts': 1500000003}],
+    }
+    assert scrub(frame, started_at) == {
+        'type': 'message',
+        'ts': '{:.6f}'.format(SCRUBBED_EPOCH + 1.0001),
+        'text': 'hi',
+        'message': {
+            'ts': '{:.6f}'.format(SCRUBBED_EPOCH + 2.5),
+            'edited': {'ts': '0'},
+        },
+        'attachments': [{'ts': '{:.6f}'.format(SCRUBBED_EPOCH + 3)}],
+    }
+
+
+def test_rtm_recorder(fx_tmpdir):
+    path = str(fx_tmpdir / 'rtm.jsonl.gz')
+    recorder = RTMRecorder(path)
+    recorder.close()
+    assert not (fx_tmpdir / 'rtm.jsonl.gz').exists()
+
+    recorder.record({'type': 'hello'})
+    recorder.record({'type': 'message', 'text': 'hi', 'ts': '1.0'})
+    recorder.close()
+    recorder.record({'type': 'goodbye'})  # reconnected bot appends
+    recorder.close()
+
+    frames = list(read_recording(path))
+    assert [frame['type'] for _, frame in frames] == [
+        'hello',
+        'message',
+        'goodbye',
+    ]
+    assert frames[0][0] <= frames[1][0]
+    assert frames[1][1]['ts'] != '1.0'
+
+    with open(path, 'wb') as f:
+        f.write(gzip.compress(b'{"t":0,"frame":{"type":"hello"}}\n{"t":')[:-8])
+    assert list(read_recording(path)) == [(0, {'type': 'hello'})]
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from yui.metrics import Metrics
+from yui.sandbox import SandboxPool
+
+
+def add(a, b):
+    return a + b
+
+
+def fail():
+    raise ValueError('wrong')
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def burn():
+    while True:
+        pass
+
+
+def allocate(size):
+    return len(bytearray(size))
+
+
+@pytest.mark.asyncio
+async def test_sandbox_pool():
+    metrics = Metrics()
+    pool = SandboxPool(name='test', metrics=metrics)
+    try:
+        assert await pool.run(1, add, 1, b=2) == 3
+        assert len(pool.idle) == 2  # worker and warm spare
+
+        with pytest.raises(ValueError):
+            await pool.run(1, fail)
+
+        pid = await pool.run(1, sleep, 0)
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.run(0.2, sleep, 10)
+        assert metrics.get(
+            'sandbox_killed',
+            pool='test',
+            reason='timeout',
+        ) == 1
+        assert len(pool.idle) == 1  # warm spare is ready
+        assert pool.idle[0].process.is_alive()
+        assert await pool.run(1, sleep, 0) != pid
+    finally:
+        pool.close()
+    assert not pool.idle
+
+
+@pytest.mark.asyncio
+async def test_sandbox_pool_limits():
+    metrics = Metrics()
+    pool = SandboxPool(
+        name='test',
+        spares=0,
+        cpu_limit=1,
+        memory_limit=64 * 1024 * 1024,
+        metrics=metrics,
+    )
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.run(10, burn)
+        assert metrics.get('sandbox_killed', pool='test', reason='cpu') == 1
+
+        with pytest.raises(MemoryError):
+            await pool.run(10, allocate, 128 * 1024 * 1024)
+        assert await pool.run(10, allocate, 1024) == 1024
+    finally:
+        pool.close()
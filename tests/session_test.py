@@ -0,0 +1,59 @@
+import socket
+
+import pytest
+
+from yui.session import (
+    CachedDNSOverHTTPSResolver,
+    SessionPool,
+    SharedSession,
+    client_session,
+)
+
+
+@pytest.mark.asyncio
+async def test_cached_resolver(event_loop, monkeypatch):
+    resolver = CachedDNSOverHTTPSResolver(
+        endpoints=['https://dns.example.com/resolve'],
+        min_ttl=0,
+    )
+    queries = []
+
+    async def query(endpoint, host, port, family):
+        queries.append(host)
+        return [{'hostname': host, 'host': '10.0.0.1', 'port': port}], 60
+
+    monkeypatch.setattr(resolver, 'query', query)
+
+    now = event_loop.time()
+    monkeypatch.setattr(event_loop, 'time', lambda: now)
+    hosts = await resolver.resolve('slack.com', 443, socket.AF_INET)
+    assert hosts[0]['host'] == '10.0.0.1'
+    assert await resolver.resolve('slack.com', 443, socket.AF_INET) == hosts
+    assert queries == ['slack.com']
+
+    monkeypatch.setattr(event_loop, 'time', lambda: now + 61)
+    await resolver.resolve('slack.com', 443, socket.AF_INET)
+    assert queries == ['slack.com', 'slack.com']
+
+
+@pytest.mark.asyncio
+async def test_client_session_shared(monkeypatch):
+    pool = SessionPool()
+    monkeypatch.setattr('yui.session.DEFAULT_POOL', None)
+    pool.install()
+
+    async with client_session(headers={'X-Test': '1'}) as session:
+        assert isinstance(session, SharedSession)
+        assert session.session is pool.session
+        assert session.headers == {'X-Test': '1'}
+    assert not pool.session.closed
+
+    async with client_session(raise_for_status=True) as session:
+        assert not isinstance(session, SharedSession)
+        assert session is not pool.session
+
+    shared = pool.session
+    await pool.close()
+    assert shared.closed
+    assert pool.session is not shared
+    await pool.close()
@@ -14,6 +14,7 @@ import pytest
 from yui.type import (
     AllChannelsError,
     ChannelFromConfig,
+    ChannelTopic,
     ChannelsFromConfig,
     DirectMessageChannel,
     FromChannelID,
@@ -118,6 +119,71 @@ def test_cast():
     assert unexpected.name == 'firefox'
 
 
+def test_cast_plan():
+    ID = NewType('ID', str)
+
+    cast.plans.clear()
+    assert cast(List[int], ('1', '2')) == [1, 2]
+    plan = cast.plans[List[int]]
+    assert cast.get_plan(List[int]) is plan
+    assert cast.plans[int] is cast.get_plan(int)
+
+    assert cast(Optional[int], '3') == 3
+    assert cast(Optional[int], None) is None
+    assert cast(Union[int, str], 'a') == 'a'
+    assert cast(Dict[ID, Tuple[int, str]], {1: ['2', 3]}) == {'1': (2, '3')}
+    assert cast(Set[ID], [1, 1, 2]) == {'1', '2'}
+
+    for t, value in [
+        (int, '1'),
+        (float, 1),
+        (str, b'x'),
+        (bool, ''),
+        (Any, object),
+        (Optional[List[str]], [1]),
+        (Union[float, str], 'x'),
+        (ID, 1),
+    ]:
+        assert cast.cast(t, value) == cast.dispatch(t, value)
+
+
+def test_compact_namespace():
+    user = User(
+        id='U1',
+        name='item4',
+        profile={'image_24': 'https://example.com/24.png', 'team': 123},
+        is_admin=False,
+    )
+    assert set(vars(user)) == {'id', 'name', '_side_store'}
+    assert user.profile.image_24 == 'https://example.com/24.png'
+    assert user.profile.team == '123'
+    assert user.is_admin is False
+    assert not hasattr(user, 'locale')
+    assert user == User(**user.to_dict())
+    assert user.to_dict()['profile'] == {
+        'image_24': 'https://example.com/24.png',
+        'team': 123,
+    }
+
+    user.is_admin = True
+    assert user.is_admin is True
+    assert user.to_dict()['is_admin'] is True
+
+    channel = PublicChannel(
+        id='C1',
+        name='general',
+        members=['U1', 'U2'],
+        topic=ChannelTopic(value='hi', creator='U1', last_set='0'),
+    )
+    assert channel.members == ['U1', 'U2']
+    assert channel.topic == ChannelTopic(value='hi', creator='U1', last_set=0)
+
+    assert vars(PrivateChannel(id='G1', name='secret')) == {
+        'id': 'G1',
+        'name': 'secret',
+    }
+
+
 def test_from_channel_id(fx_config):
     fx_config.CHANNELS = {
         'main': 'general',
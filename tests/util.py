@@ -5,6 +5,8 @@ from typing import Callable, Dict, List, NamedTuple, Optional
 from yui.api import SlackAPI
 from yui.bot import Bot
 from yui.config import Config
+from yui.directory import Directory
+from yui.metrics import Metrics
 from yui.type import (
     BotLinkedNamespace,
     DirectMessageChannel,
@@ -30,6 +32,8 @@ class FakeBot(Bot):
             config = Config()
 
         BotLinkedNamespace._bot = self
+        self.directory = Directory()
+        self.metrics = Metrics()
         self.loop = asyncio.get_event_loop()
         self.call_queue: List[Call] = []
         self.api = SlackAPI(self)
@@ -40,6 +44,7 @@ class FakeBot(Bot):
         self.responses: Dict[str, Callable] = {}
         self.config = config
         self.process_pool_executor = ProcessPoolExecutor()
+        self.process_pool_jobs = 0
         self.thread_pool_executor = ThreadPoolExecutor()
 
     async def call(
@@ -1,4 +1,4 @@
-from typing import Union
+from typing import Optional, Union
 
 from .encoder import bool2str
 from .endpoint import Endpoint
@@ -35,13 +35,21 @@ class Groups(Endpoint):
         self,
         exclude_archived: bool = True,
         exclude_members: bool = True,
+        *,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
     ):
         """https://api.slack.com/methods/groups.list"""
 
-        return await self._call(
-            'list',
-            {
-                'exclude_archived': bool2str(exclude_archived),
-                'exclude_members': bool2str(exclude_members),
-            }
-        )
+        params = {
+            'exclude_archived': bool2str(exclude_archived),
+            'exclude_members': bool2str(exclude_members),
+        }
+
+        if cursor:
+            params['cursor'] = cursor
+
+        if limit:
+            params['limit'] = str(limit)
+
+        return await self._call('list', params)
@@ -0,0 +1,217 @@
+import asyncio
+import contextlib
+import contextvars
+import enum
+import heapq
+import itertools
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..metrics import Metrics
+
+__all__ = (
+    'METHOD_TIERS',
+    'Priority',
+    'Scheduler',
+    'TIER_RATES',
+    'TokenBucket',
+    'current_priority',
+    'priority',
+)
+
+
+class Priority(enum.IntEnum):
+    """Priority of API call. Lower one goes first."""
+
+    INTERACTIVE = 0
+    BULK = 1
+
+
+#: Requests per minute of each tier.
+#: https://api.slack.com/docs/rate-limits
+TIER_RATES: Dict[str, int] = {
+    'tier1': 1,
+    'tier2': 20,
+    'tier3': 50,
+    'tier4': 100,
+    'post': 60,  # chat.postMessage allows about one message per second
+}
+
+#: Tier of methods which yui calls
+METHOD_TIERS: Dict[str, str] = {
+    'channels.history': 'tier3',
+    'channels.info': 'tier3',
+    'channels.list': 'tier2',
+    'chat.delete': 'tier3',
+    'chat.postMessage': 'post',
+    'groups.info': 'tier3',
+    'groups.list': 'tier2',
+    'im.list': 'tier2',
+    'rtm.connect': 'tier1',
+    'rtm.start': 'tier1',
+    'users.info': 'tier4',
+    'users.list': 'tier2',
+}
+
+DEFAULT_TIER = 'tier3'
+
+PRIORITY: 'contextvars.ContextVar[Priority]' = contextvars.ContextVar(
+    'PRIORITY',
+    default=Priority.INTERACTIVE,
+)
+
+
+def current_priority() -> Priority:
+    """Get priority of API calls in current context."""
+
+    return PRIORITY.get()
+
+
+@contextlib.contextmanager
+def priority(value: Priority) -> Iterator[None]:
+    """Call APIs with given priority in this block."""
+
+    token = PRIORITY.set(value)
+    try:
+        yield
+    finally:
+        PRIORITY.reset(token)
+
+
+class TokenBucket:
+    """Token bucket which can be paused by Retry-After."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """Initialize"""
+
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated: Optional[float] = None
+        self.paused_until = 0.0
+
+    def refill(self, now: float) -> None:
+        if self.updated is not None:
+            self.tokens = min(
+                self.capacity,
+                self.tokens + (now - self.updated) * self.rate,
+            )
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds to wait until a token is available."""
+
+        self.refill(now)
+        wait = max(0.0, (1 - self.tokens) / self.rate)
+        return max(wait, self.paused_until - now)
+
+    def take(self, now: float) -> None:
+        self.refill(now)
+        self.tokens -= 1
+
+    def pause(self, now: float, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, now + seconds)
+
+
+class Scheduler:
+    """Schedule outbound API calls by rate limit tier and priority."""
+
+    def __init__(
+        self,
+        *,
+        metrics: Metrics = None,
+        tier_rates: Dict[str, int] = None,
+        method_tiers: Dict[str, str] = None,
+        max_retries: int = 3,
+    ) -> None:
+        """Initialize"""
+
+        self.metrics = metrics or Metrics()
+        self.max_retries = max_retries
+        self.tier_rates = tier_rates or TIER_RATES
+        self.method_tiers = method_tiers or METHOD_TIERS
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.queues: Dict[
+            str,
+            List[Tuple[Priority, int, asyncio.Future]],
+        ] = {}
+        self.dispatchers: Dict[str, asyncio.Future] = {}
+        self.counter = itertools.count()
+
+    def get_tier(self, method: str) -> str:
+        return self.method_tiers.get(method, DEFAULT_TIER)
+
+    def get_bucket(self, tier: str) -> TokenBucket:
+        try:
+            return self.buckets[tier]
+        except KeyError:
+            rate = self.tier_rates.get(tier, self.tier_rates[DEFAULT_TIER])
+            bucket = self.buckets[tier] = TokenBucket(rate / 60, rate)
+            return bucket
+
+    def depth(self, tier: str) -> int:
+        """Count of calls waiting in tier."""
+
+        return len(self.queues.get(tier, ()))
+
+    async def acquire(self, method: str) -> None:
+        """Wait until method can be called."""
+
+        loop = asyncio.get_event_loop()
+        tier = self.get_tier(method)
+        bucket = self.get_bucket(tier)
+        level = current_priority()
+        queue = self.queues.setdefault(tier, [])
+        start = loop.time()
+
+        if not queue and bucket.delay(start) == 0:
+            bucket.take(start)
+        else:
+            future = loop.create_future()
+            heapq.heappush(queue, (level, next(self.counter), future))
+            self.metrics.set('api_queue_depth', len(queue), tier=tier)
+            if tier not in self.dispatchers:
+                self.dispatchers[tier] = asyncio.ensure_future(
+                    self.dispatch(tier),
+                )
+            try:
+                await future
+            finally:
+                future.cancel()
+
+        self.metrics.observe(
+            'api_wait_seconds',
+            loop.time() - start,
+            method=method,
+            priority=level.name.lower(),
+        )
+
+    async def dispatch(self, tier: str) -> None:
+        """Hand tokens of tier to waiting calls in order of priority."""
+
+        loop = asyncio.get_event_loop()
+        bucket = self.get_bucket(tier)
+        queue = self.queues[tier]
+        try:
+            while queue:
+                delay = bucket.delay(loop.time())
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+                _, _, future = heapq.heappop(queue)
+                self.metrics.set('api_queue_depth', len(queue), tier=tier)
+                if future.done():  # caller gave up
+                    continue
+                bucket.take(loop.time())
+                future.set_result(None)
+        finally:
+            del self.dispatchers[tier]
+
+    def retry_after(self, method: str, seconds: float) -> None:
+        """Stop calling tier of method for given seconds."""
+
+        tier = self.get_tier(method)
+        self.metrics.inc('api_rate_limited', method=method)
+        self.get_bucket(tier).pause(
+            asyncio.get_event_loop().time(),
+            seconds,
+        )
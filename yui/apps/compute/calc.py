@@ -12,8 +12,6 @@ import statistics
 from collections.abc import Iterable
 from typing import Any, Dict
 
-from async_timeout import timeout
-
 from ...bot import Bot
 from ...box import box
 from ...event import Message
@@ -68,12 +66,12 @@ async def body(
     result = None
     local = None
     try:
-        async with timeout(TIMEOUT):
-            result, local = await bot.run_in_other_process(
-                calculate,
-                expr,
-                replace_num_to_decimal=num_to_decimal,
-            )
+        result, local = await bot.run_in_sandbox(
+            TIMEOUT,
+            calculate,
+            expr,
+            replace_num_to_decimal=num_to_decimal,
+        )
     except SyntaxError as e:
         await bot.say(
             channel,
@@ -1,32 +1,43 @@
 import asyncio
+import functools
 import logging
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+)
 
+from ..api.scheduler import Priority, priority
 from ..bot import APICallError, BotReconnect
 from ..box import box
+from ..directory import (
+    dump_items,
+    load_items,
+    read_snapshot,
+    write_snapshot,
+)
 from ..event import (
     ChannelArchive,
     ChannelCreated,
     ChannelDeleted,
-    ChannelHistoryChanged,
     ChannelJoined,
     ChannelLeft,
-    ChannelMarked,
     ChannelRename,
     ChannelUnarchive,
     ChatterboxSystemStart,
     GroupArchive,
     GroupClose,
-    GroupHistoryChanged,
     GroupJoined,
     GroupLeft,
-    GroupMarked,
     GroupOpen,
     GroupRename,
     GroupUnarchive,
     IMClose,
     IMCreated,
-    IMHistoryChanged,
-    IMMarked,
     IMOpen,
     TeamJoin,
     TeamMigrationStarted,
@@ -41,6 +52,9 @@ from ..type import (
 
 logger = logging.getLogger(__name__)
 
+#: Count of items per page of list methods
+PAGE_LIMIT = 200
+
 
 async def retry(callback, *args, **kwargs):
     while True:
@@ -52,59 +66,240 @@ async def retry(callback, *args, **kwargs):
             raise
 
 
-@box.on(ChatterboxSystemStart)
-async def on_start(bot):
-    async def channel():
-        cursor = None
-        bot.channels.clear()
-        while True:
-            result = await retry(bot.api.channels.list, cursor)
-            cursor = None
-            if 'response_metadata' in result:
-                cursor = result['response_metadata'].get('next_cursor')
-            for c in result['channels']:
-                res = await retry(bot.api.channels.info, c['id'])
-                bot.channels.append(PublicChannel(**res['channel']))
-            if not cursor:
-                break
-
-    async def im():
-        bot.ims.clear()
-        result = await retry(bot.api.im.list)
-        for d in result['ims']:
-            bot.ims.append(DirectMessageChannel(**d))
-
-    async def groups():
-        bot.groups.clear()
-        result = await retry(bot.api.groups.list)
-        for g in result['groups']:
-            res = await retry(bot.api.groups.info, g['id'])
-            bot.groups.append(PrivateChannel(**res['group']))
-
-    async def users():
-        bot.users.clear()
-        result = await retry(bot.api.users.list, presence=False)
-        for u in result['members']:
-            bot.users[u['id']] = User(**u)
-
-    await asyncio.wait(
-        (
-            channel(),
-            im(),
-            groups(),
-            users(),
+async def paginate(call: Callable[[Optional[str]], Awaitable[Dict]]) \
+        -> AsyncIterator[Dict]:
+    """Call list method page by page with cursor."""
+
+    cursor = None
+    while True:
+        result = await retry(call, cursor)
+        yield result
+        cursor = result.get('response_metadata', {}).get('next_cursor')
+        if not cursor:
+            break
+
+
+async def sync(
+    bot,
+    kind: str,
+    call: Callable[[Optional[str]], Awaitable[Dict]],
+    key: str,
+    make: Callable[[Dict], Any],
+    detail: Optional[Callable[[Dict], Awaitable[Optional[Dict]]]] = None,
+):
+    """Load every item of kind into directory.
+
+    Detail calls run concurrently, bounded by ``BOOTSTRAP_CONCURRENCY``.
+    If directory has nothing of kind yet, items are published as they
+    arrive. Otherwise old items are served until new ones are ready.
+
+    """
+
+    directory = bot.directory
+    partial = not getattr(directory, kind)
+    semaphore = asyncio.Semaphore(bot.config.BOOTSTRAP_CONCURRENCY)
+    results: List[Any] = []
+    tasks = []
+    directory.progress[kind] = 0
+
+    async def load(index: int, data: Dict):
+        if detail is not None:
+            async with semaphore:
+                detailed = await detail(data)
+            if detailed is None:
+                return
+            data = detailed
+        item = results[index] = make(data)
+        directory.progress[kind] += 1
+        if partial:
+            directory.publish(kind, item)
+
+    try:
+        async for page in paginate(call):
+            for data in page.get(key, []):
+                results.append(None)
+                tasks.append(asyncio.ensure_future(
+                    load(len(results) - 1, data),
+                ))
+            logger.info(
+                'sync %s: %d listed, %d loaded',
+                kind,
+                len(results),
+                directory.progress[kind],
+            )
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    directory.replace(kind, [x for x in results if x is not None])
+    logger.info('sync %s: done, %d loaded', kind, directory.progress[kind])
+
+
+async def channel_info(bot, data: Dict) -> Optional[Dict]:
+    res = await retry(bot.api.channels.info, data['id'])
+    return res.get('channel')
+
+
+async def group_info(bot, data: Dict) -> Optional[Dict]:
+    res = await retry(bot.api.groups.info, data['id'])
+    return res.get('group')
+
+
+async def sync_channels(bot, detail: bool = False):
+    await sync(
+        bot,
+        'channels',
+        lambda cursor: bot.api.channels.list(cursor, limit=PAGE_LIMIT),
+        'channels',
+        lambda data: PublicChannel(**data),
+        functools.partial(channel_info, bot) if detail else None,
+    )
+
+
+async def sync_ims(bot):
+    await sync(
+        bot,
+        'ims',
+        lambda cursor: bot.api.im.list(cursor, limit=PAGE_LIMIT),
+        'ims',
+        lambda data: DirectMessageChannel(**data),
+    )
+
+
+async def sync_groups(bot, detail: bool = False):
+    await sync(
+        bot,
+        'groups',
+        lambda cursor: bot.api.groups.list(cursor=cursor, limit=PAGE_LIMIT),
+        'groups',
+        lambda data: PrivateChannel(**data),
+        functools.partial(group_info, bot) if detail else None,
+    )
+
+
+async def sync_users(bot):
+    await sync(
+        bot,
+        'users',
+        lambda cursor: bot.api.users.list(
+            cursor,
+            limit=PAGE_LIMIT,
+            presence=False,
         ),
-        return_when=asyncio.FIRST_EXCEPTION,
+        'members',
+        lambda data: User(**data),
     )
 
+
+#: Resync of each kind from list methods only, without a detail call per item
+SYNC = {
+    'channels': sync_channels,
+    'groups': sync_groups,
+    'ims': sync_ims,
+    'users': sync_users,
+}
+
+
+def read_items(path: str) -> Dict[str, List]:
+    return load_items(read_snapshot(path))
+
+
+def write_items(path: str, items: Dict[str, List]) -> None:
+    write_snapshot(path, dump_items(items))
+
+
+async def load_snapshot(bot) -> bool:
+    path = bot.config.DIRECTORY_SNAPSHOT_PATH
+    if not path:
+        return False
+    try:
+        items = await bot.run_in_other_thread(read_items, path)
+    except FileNotFoundError:
+        return False
+    except (OSError, TypeError, ValueError):
+        logger.exception('fail to read directory snapshot')
+        return False
+    bot.directory.restore(items)
+    logger.info('directory is loaded from snapshot')
     return True
 
 
+async def save_snapshot(bot):
+    path = bot.config.DIRECTORY_SNAPSHOT_PATH
+    directory = bot.directory
+    if not path or directory.version == directory.saved_version:
+        return
+    version = directory.version
+    # only copying containers runs on loop
+    await bot.run_in_other_thread(write_items, path, directory.copy_items())
+    directory.saved_version = version
+
+
+@box.on(ChatterboxSystemStart)
+async def on_start(bot):
+    directory = bot.directory
+    if directory.seeded:
+        # rtm.start sent whole state of workspace with this connection
+        directory.seeded = False
+        directory.stale.clear()
+        await save_snapshot(bot)
+        return True
+
+    if directory.is_ready() or await load_snapshot(bot):
+        # serve known state now and resync in background
+        directory.stale.update(SYNC)
+        return True
+
+    directory.stale.clear()
+    with priority(Priority.BULK):
+        # detail calls fill fields which list methods omit, only once
+        await asyncio.gather(
+            sync_channels(bot, detail=True),
+            sync_groups(bot, detail=True),
+            sync_ims(bot),
+            sync_users(bot),
+        )
+    logger.info('directory is ready')
+    await save_snapshot(bot)
+
+    return True
+
+
+@box.crontab('* * * * *')
+async def reconcile_directory(bot):
+    """Resync containers which events could not update in place.
+
+    Requests made between runs are coalesced into one resync per kind.
+
+    """
+
+    stale = bot.directory.stale
+    if not stale:
+        return
+    kinds = sorted(stale)
+    stale.clear()
+    logger.info('reconcile directory: %s', ', '.join(kinds))
+    with priority(Priority.BULK):
+        for kind in kinds:
+            await SYNC[kind](bot)
+
+
+@box.crontab('0 * * * *')
+async def schedule_full_reconcile(bot):
+    bot.directory.stale.update(SYNC)
+
+
+@box.crontab('*/5 * * * *')
+async def save_directory(bot):
+    await save_snapshot(bot)
+
+
 @box.on(TeamJoin)
 async def on_team_join(bot, event: TeamJoin):
     logger.info('on team join start')
     res = await retry(bot.api.users.info, event.user)
-    bot.users[res['user']['id']] = User(**res['user'])
+    bot.directory.publish('users', User(**res['user']))
     logger.info('on team join end')
 
     return True
@@ -114,75 +309,91 @@ async def on_team_join(bot, event: TeamJoin):
 async def on_user_change(bot, event: UserChange):
     logger.info('on user change start')
     res = await retry(bot.api.users.info, event.user)
-    bot.users[res['user']['id']] = User(**res['user'])
+    bot.directory.publish('users', User(**res['user']))
     logger.info('on user change end')
 
     return True
 
 
-@box.on(ChannelArchive)
+def mark_stale(bot, channel_id: str) -> None:
+    if channel_id.startswith('C'):
+        bot.directory.stale.add('channels')
+    elif channel_id.startswith('D'):
+        bot.directory.stale.add('ims')
+    elif channel_id.startswith('G'):
+        bot.directory.stale.add('groups')
+
+
+def update_channel(bot, channel_id: str, **fields) -> None:
+    if not bot.directory.update(channel_id, **fields):
+        mark_stale(bot, channel_id)
+
+
 @box.on(ChannelCreated)
-@box.on(ChannelDeleted)
-@box.on(ChannelHistoryChanged)
+async def channel_created(bot, event: ChannelCreated):
+    # payload has only id and name of channel, so load it on next reconcile
+    mark_stale(bot, event.channel.id)
+    return True
+
+
 @box.on(ChannelJoined)
-@box.on(ChannelLeft)
-@box.on(ChannelMarked)
-@box.on(ChannelUnarchive)
-@box.on(ChannelRename)
-async def public_channel_mutation_detected(bot):
-    logger.info('public_channel_mutation_detected start')
-    cursor = None
-    new_channels = []
-    while True:
-        result = await retry(bot.api.channels.list, cursor)
-        cursor = result.get('response_metadata', {}).get('next_cursor')
-        for c in result['channels']:
-            res = await retry(bot.api.channels.info, c['id'])
-            new_channels.append(PublicChannel(**res['channel']))
-        if not cursor:
-            break
+@box.on(GroupJoined)
+@box.on(IMCreated)
+async def channel_added(bot, event):
+    bot.directory.upsert(event.channel)
+    return True
+
 
-    bot.channels[:] = new_channels
-    logger.info('public_channel_mutation_detected end')
+@box.on(ChannelRename)
+@box.on(GroupRename)
+async def channel_renamed(bot, event):
+    update_channel(
+        bot,
+        event.channel.id,
+        name=event.channel.name,
+        name_normalized=None,
+    )
     return True
 
 
+@box.on(ChannelArchive)
 @box.on(GroupArchive)
-@box.on(GroupClose)
-@box.on(GroupHistoryChanged)
-@box.on(GroupJoined)
+async def channel_archived(bot, event):
+    update_channel(bot, event.channel.id, is_archived=True)
+    return True
+
+
+@box.on(ChannelUnarchive)
+@box.on(GroupUnarchive)
+async def channel_unarchived(bot, event):
+    update_channel(bot, event.channel.id, is_archived=False)
+    return True
+
+
+@box.on(ChannelDeleted)
 @box.on(GroupLeft)
-@box.on(GroupMarked)
+async def channel_removed(bot, event):
+    bot.directory.discard(event.channel.id)
+    return True
+
+
+@box.on(ChannelLeft)
+async def channel_left(bot, event: ChannelLeft):
+    update_channel(bot, event.channel.id, is_member=False)
+    return True
+
+
 @box.on(GroupOpen)
-@box.on(GroupRename)
-@box.on(GroupUnarchive)
-async def private_channel_mutation_detected(bot):
-    logger.info('private_channel_mutation_detected start')
-    new_groups = []
-    result = await retry(bot.api.groups.list)
-    for g in result['groups']:
-        res = await retry(bot.api.groups.info, g['id'])
-        new_groups.append(PrivateChannel(**res['group']))
-
-    bot.groups[:] = new_groups
-    logger.info('private_channel_mutation_detected start')
+@box.on(IMOpen)
+async def channel_opened(bot, event):
+    update_channel(bot, event.channel.id, is_open=True)
     return True
 
 
+@box.on(GroupClose)
 @box.on(IMClose)
-@box.on(IMCreated)
-@box.on(IMHistoryChanged)
-@box.on(IMMarked)
-@box.on(IMOpen)
-async def direct_message_channel_mutation_detected(bot):
-    logger.info('direct_message_channel_mutation_detected start')
-    new_ims = []
-    result = await retry(bot.api.im.list)
-    for d in result['ims']:
-        new_ims.append(DirectMessageChannel(**d))
-
-    bot.ims[:] = new_ims
-    logger.info('direct_message_channel_mutation_detected end')
+async def channel_closed(bot, event):
+    update_channel(bot, event.channel.id, is_open=False)
     return True
 
 
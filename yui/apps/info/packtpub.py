@@ -1,8 +1,7 @@
 from typing import Optional
 from urllib.parse import quote
 
-from lxml.html import fromstring
-
+from ..shared.html import HTMLSource, parse_html
 from ...api import Attachment
 from ...bot import Bot
 from ...box import box
@@ -15,8 +14,11 @@ box.assert_channel_required('general')
 PACKTPUB_URL = 'https://www.packtpub.com/packt/offers/free-learning'
 
 
-def parse_packtpub_dotd(html: str) -> Optional[Attachment]:
-    h = fromstring(html)
+def parse_packtpub_dotd(
+    html: HTMLSource,
+    encoding: str = None,
+) -> Optional[Attachment]:
+    h = parse_html(html, encoding)
     title_els = h.cssselect('.dotd-title')
     image_els = h.cssselect('.imagecache-dotd_main_image')
     if not title_els:
@@ -42,11 +44,13 @@ def parse_packtpub_dotd(html: str) -> Optional[Attachment]:
 async def say_packtpub_dotd(bot: Bot, channel):
     async with client_session() as session:
         async with session.get(PACKTPUB_URL) as resp:
-            html = await resp.text()
+            html = await resp.read()
+            encoding = resp.get_encoding()
 
     attachment = await bot.run_in_other_process(
         parse_packtpub_dotd,
         html,
+        encoding,
     )
 
     if attachment is None:
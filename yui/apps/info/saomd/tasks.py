@@ -3,8 +3,6 @@ import logging
 from typing import Dict, List
 from urllib.parse import parse_qs, urlparse
 
-from lxml.html import fromstring
-
 from sqlalchemy.orm.exc import NoResultFound
 
 from .models import (
@@ -12,6 +10,7 @@ from .models import (
     SERVER_LABEL,
     Server,
 )
+from ...shared.html import HTMLSource, parse_html
 from ....api import Attachment
 from ....bot import Bot
 from ....box import box
@@ -33,12 +32,13 @@ NOTICE_URLS: Dict[Server, str] = {
 
 def process(
     server: Server,
-    html: str,
+    html: HTMLSource,
     engine_config: EngineConfig,
+    encoding: str = None,
 ) -> List[Attachment]:
 
     base = '{u.scheme}://{u.netloc}'.format(u=urlparse(NOTICE_URLS[server]))
-    h = fromstring(html)
+    h = parse_html(html, encoding)
     dls = h.cssselect('dl')
 
     attachments: List[Attachment] = []
@@ -196,16 +196,17 @@ def process(
 @box.crontab('*/1 * * * *')
 async def watch_notice(bot: Bot, engine_config: EngineConfig):
     async def watch(server: Server):
-        html = ''
         async with client_session() as session:
             async with session.get(NOTICE_URLS[server]) as resp:
-                html = await resp.text()
+                html = await resp.read()
+                encoding = resp.get_encoding()
 
         attachments = await bot.run_in_other_process(
             process,
             server,
             html,
             engine_config,
+            encoding,
         )
         if attachments:
             await bot.api.chat.postMessage(
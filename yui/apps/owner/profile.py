@@ -0,0 +1,34 @@
+from ...box import box
+from ...command import option
+from ...event import Message
+from ...transform import value_range
+
+box.assert_config_required('OWNER_ID', str)
+
+
+@box.command('profile', aliases=['프로파일'])
+@option('--seconds', '-s', default=10,
+        transform_func=value_range(1, 60, autofix=True))
+@option('--top', '-t', default=10,
+        transform_func=value_range(1, 30, autofix=True))
+async def profile(bot, event: Message, seconds: int, top: int):
+    """
+    봇의 이벤트 루프를 프로파일링합니다
+
+    `{PREFIX}profile` (10초 동안 측정)
+    `{PREFIX}profile --seconds=30 --top=20` (30초 동안 측정하고 상위 20개 표시)
+
+    봇 주인만 사용 가능합니다.
+
+    """
+
+    if event.user.id != bot.config.OWNER_ID:
+        await bot.say(
+            event.channel,
+            '<@{}> 이 명령어는 아빠만 사용할 수 있어요!'.format(event.user.name)
+        )
+        return
+
+    await bot.say(event.channel, f'{seconds}초 동안 프로파일링할게요!')
+    result = await bot.profile(seconds)
+    await bot.say(event.channel, '```\n{}\n```'.format(result.format(top)))
@@ -2,8 +2,7 @@ import re
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlencode
 
-from lxml.html import fromstring
-
+from ..shared.html import HTMLSource, parse_html
 from ...api import Attachment
 from ...bot import Bot
 from ...box import box
@@ -53,8 +52,11 @@ def fix_blank(text: str) -> str:
     return BLANK_RE.sub('', text)
 
 
-def parse(html: str) -> Tuple[Optional[str], List[Attachment]]:
-    h = fromstring(html)
+def parse(
+    html: HTMLSource,
+    encoding: str = None,
+) -> Tuple[Optional[str], List[Attachment]]:
+    h = parse_html(html, encoding)
     meta = h.cssselect('meta[http-equiv=Refresh]')
     if meta:
         return fix_url(meta[0].get('content')[7:]), []
@@ -103,12 +105,16 @@ async def dic(bot: Bot, event: Message, category: str, keyword: str):
             'dic': DICS[category],
         })
     )
-    html = ''
     async with client_session() as session:
         async with session.get(url) as res:
-            html = await res.text()
+            html = await res.read()
+            encoding = res.get_encoding()
 
-    redirect, attachments = await bot.run_in_other_process(parse, html)
+    redirect, attachments = await bot.run_in_other_process(
+        parse,
+        html,
+        encoding,
+    )
 
     if redirect:
         await bot.say(
@@ -4,11 +4,10 @@ from typing import Dict, List, Tuple
 
 from fuzzywuzzy import fuzz
 
-from lxml.html import fromstring
-
 from sqlalchemy.orm.exc import NoResultFound
 
 from ..shared.cache import JSONCache
+from ..shared.html import HTMLSource, parse_html
 from ...bot import Bot
 from ...box import box
 from ...command import argument
@@ -35,8 +34,13 @@ def fetch_or_create_cache(name: str, sess) -> JSONCache:
     return ref
 
 
-def parse(html: str, selector: str, url_prefix: str) -> List[Tuple[str, str]]:
-    h = fromstring(html)
+def parse(
+    html: HTMLSource,
+    selector: str,
+    url_prefix: str,
+    encoding: str = None,
+) -> List[Tuple[str, str]]:
+    h = parse_html(html, encoding)
     a_tags = h.cssselect(selector)
 
     result = []
@@ -58,13 +62,15 @@ async def fetch_css_ref(bot: Bot, sess):
     url = 'https://developer.mozilla.org/en-US/docs/Web/CSS/Reference'
     async with client_session() as session:
         async with session.get(url) as res:
-            html = await res.text()
+            html = await res.read()
+            encoding = res.get_encoding()
 
     body = await bot.run_in_other_process(
         parse,
         html,
         'a[href^=\\/en-US\\/docs\\/Web\\/CSS\\/]',
         'https://developer.mozilla.org',
+        encoding=encoding,
     )
 
     ref.body = body
@@ -84,13 +90,15 @@ async def fetch_html_ref(bot: Bot, sess):
     url = 'https://developer.mozilla.org/en-US/docs/Web/HTML/Element'
     async with client_session() as session:
         async with session.get(url) as res:
-            html = await res.text()
+            html = await res.read()
+            encoding = res.get_encoding()
 
     body = await bot.run_in_other_process(
         parse,
         html,
         'a[href^=\\/en-US\\/docs\\/Web\\/HTML\\/Element\\/]',
         'https://developer.mozilla.org',
+        encoding=encoding,
     )
 
     ref.body = body
@@ -102,8 +110,11 @@ async def fetch_html_ref(bot: Bot, sess):
     logger.info(f'fetch html ref end')
 
 
-def parse_python(html: str) -> List[Tuple[str, str, str]]:
-    h = fromstring(html)
+def parse_python(
+    html: HTMLSource,
+    encoding: str = None,
+) -> List[Tuple[str, str, str]]:
+    h = parse_html(html, encoding)
     a_tags = h.cssselect('a.reference.internal')
 
     result = []
@@ -135,11 +146,13 @@ async def fetch_python_ref(bot: Bot, sess):
     url = 'https://docs.python.org/3/library/'
     async with client_session() as session:
         async with session.get(url) as res:
-            html = await res.text()
+            html = await res.read()
+            encoding = res.get_encoding()
 
     body = await bot.run_in_other_process(
         parse_python,
         html,
+        encoding=encoding,
     )
 
     ref.body = body
@@ -1 +1,2 @@
 from .cache import *  # noqa
+from .html import *  # noqa
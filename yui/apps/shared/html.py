@@ -0,0 +1,29 @@
+import io
+import mmap
+from typing import Optional, Union
+
+from lxml.html import HTMLParser, HtmlElement, fromstring, parse
+
+__all__ = 'HTMLSource', 'parse_html'
+
+#: HTML document as text, bytes or shared buffer
+HTMLSource = Union[str, bytes, mmap.mmap]
+
+
+def parse_html(
+    html: HTMLSource,
+    encoding: Optional[str] = None,
+) -> HtmlElement:
+    """Parse HTML document.
+
+    Bytes and shared buffers are parsed as they are without decoding them
+    to str first.
+
+    """
+
+    if isinstance(html, str):
+        return fromstring(html)
+    parser = HTMLParser(encoding=encoding) if encoding else None
+    if isinstance(html, bytes):
+        html = io.BytesIO(html)  # type: ignore
+    return parse(html, parser=parser).getroot()
@@ -3,9 +3,8 @@ from typing import List
 
 import aiohttp
 
-import lxml.html
-
 from .models import AWS
+from ...shared.html import HTMLSource, parse_html
 from ....bot import Bot
 from ....box import box
 from ....orm import EngineConfig, subprocess_session_manager
@@ -13,9 +12,13 @@ from ....session import client_session
 from ....util import truncate_table
 
 
-def process(html: str, engine_config: EngineConfig):
+def process(
+    html: HTMLSource,
+    engine_config: EngineConfig,
+    encoding: str = None,
+):
     with subprocess_session_manager(engine_config) as sess:
-        h = lxml.html.fromstring(html)
+        h = parse_html(html, encoding)
         try:
             observed_at = datetime.datetime.strptime(
                 h.cssselect('span.ehead')[0].text_content().replace(
@@ -129,15 +132,15 @@ def process(html: str, engine_config: EngineConfig):
 async def crawl(bot: Bot, engine_config: EngineConfig):
     """Crawl from Korea Meteorological Administration AWS."""
 
-    html = ''
     url = 'http://www.kma.go.kr/cgi-bin/aws/nph-aws_txt_min'
     try:
         async with client_session() as session:
             async with session.get(url) as res:
-                html = await res.text()
+                html = await res.read()
+                encoding = res.get_encoding()
     except aiohttp.client_exceptions.ClientConnectorError:
         return
     except aiohttp.client_exceptions.ServerDisconnectedError:
         return
 
-    await bot.run_in_other_process(process, html, engine_config)
+    await bot.run_in_other_process(process, html, engine_config, encoding)
@@ -0,0 +1,210 @@
+""":mod:`yui.bench` --- replay recorded RTM frames to measure dispatching
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Frames recorded by :class:`~yui.recorder.RTMRecorder` are parsed by
+:meth:`Bot.make_event` and put in queue of bot, as fast as possible or at
+recorded pace. :meth:`Bot.process` dispatches them to handlers of configured
+box like on real bot, so channel lanes and ``DISPATCH_WORKERS`` are measured
+too. Calls of Slack API are answered at once without network, so the numbers
+show cost of parsing, casting, dispatching and handlers. Other I/O of handlers
+such as DB and HTTP is not faked.
+
+"""
+
+import asyncio
+import collections
+import logging
+import math
+import time
+from typing import (
+    Any,
+    Counter,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from .bot import Bot
+from .config import Config
+from .directory import read_snapshot
+from .metrics import Metrics
+from .recorder import read_recording
+
+__all__ = (
+    'BenchBot',
+    'BenchMetrics',
+    'BenchResult',
+    'percentile',
+    'replay',
+    'run_bench',
+)
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+
+    if not values:
+        return 0.0
+    return values[max(math.ceil(q / 100 * len(values)) - 1, 0)]
+
+
+class BenchResult(NamedTuple):
+    """Result of replay."""
+
+    frames: int
+    events: int
+    errors: int
+    seconds: float
+    #: Sorted seconds which each run of handler took
+    latencies: List[float]
+    api_calls: Counter[str]
+
+    @property
+    def events_per_second(self) -> float:
+        """Dispatched events per second. Dropped frames are not counted."""
+
+        if not self.seconds:
+            return 0.0
+        return self.events / self.seconds
+
+    def format(self) -> str:
+        lines = [
+            f'frames: {self.frames} ({self.events} dispatched, '
+            f'{self.errors} errors)',
+            f'elapsed: {self.seconds:.3f}s',
+            f'events/sec: {self.events_per_second:.1f}',
+            'handler latency: p50 {:.3f}ms / p99 {:.3f}ms ({} runs)'.format(
+                percentile(self.latencies, 50) * 1000,
+                percentile(self.latencies, 99) * 1000,
+                len(self.latencies),
+            ),
+        ]
+        for method, count in sorted(self.api_calls.items()):
+            lines.append(f'api call: {method} x{count}')
+        return '\n'.join(lines)
+
+
+class BenchMetrics(Metrics):
+    """Metrics which also keep each observed seconds of handlers."""
+
+    def __init__(self) -> None:
+        """Initialize"""
+
+        super(BenchMetrics, self).__init__()
+        self.latencies: List[float] = []
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        super(BenchMetrics, self).observe(name, value, **labels)
+        if name == 'handler_seconds':
+            self.latencies.append(value)
+
+
+class BenchBot(Bot):
+    """Bot whose calls of Slack API are answered at once without network."""
+
+    metrics: BenchMetrics
+
+    def __init__(self, config: Config, **kwargs) -> None:
+        """Initialize"""
+
+        kwargs.setdefault('metrics', BenchMetrics())
+        super(BenchBot, self).__init__(config, **kwargs)
+        self.api_calls: Counter[str] = collections.Counter()
+
+    async def call(
+        self,
+        method: str,
+        data: Dict[str, str] = None,
+        *,
+        token: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        self.api_calls[method] += 1
+        self.metrics.inc('api_calls', method=method, status=200)
+        result: Dict[str, Any] = {'ok': True, 'ts': f'{time.time():.6f}'}
+        if data and 'channel' in data:
+            result['channel'] = data['channel']
+        return result
+
+
+async def replay(
+    bot: BenchBot,
+    frames: Iterable[Tuple[float, Dict[str, Any]]],
+    *,
+    pace: bool = False,
+) -> BenchResult:
+    """Replay frames to handlers of bot.
+
+    Events are put in queue of bot as fast as possible by default.
+    With ``pace``, each event is put at its recorded time.
+    Either way :meth:`Bot.process` dispatches them like on real bot.
+
+    """
+
+    logger = logging.getLogger(f'{__name__}.replay')
+    latencies = bot.metrics.latencies
+    handled = len(latencies)
+    failed = sum(bot.metrics.counters['handler_errors'].values())
+    count = 0
+    events = 0
+    errors = 0
+
+    started_at = time.monotonic()
+    process = asyncio.ensure_future(bot.process())
+    try:
+        for offset, frame in frames:
+            count += 1
+            if pace:
+                delay = started_at + offset - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            try:
+                event = bot.make_event(frame)
+            except Exception:
+                logger.exception('fail to make event of %s', frame)
+                errors += 1
+                continue
+            if event is None:
+                continue
+            events += 1
+            bot.queue.put_nowait(event)
+        await bot.queue.join()
+    finally:
+        process.cancel()
+    errors += sum(bot.metrics.counters['handler_errors'].values()) - failed
+
+    return BenchResult(
+        frames=count,
+        events=events,
+        errors=errors,
+        seconds=time.monotonic() - started_at,
+        latencies=sorted(latencies[handled:]),
+        api_calls=bot.api_calls,
+    )
+
+
+def run_bench(config: Config, path: str, *, pace: bool = False) -> BenchResult:
+    """Replay recording at given path with :class:`BenchBot`."""
+
+    logger = logging.getLogger(f'{__name__}.run_bench')
+
+    config.REGISTER_CRONTAB = False
+    bot = BenchBot(config)
+    if config.DIRECTORY_SNAPSHOT_PATH:
+        try:
+            bot.directory.load(read_snapshot(config.DIRECTORY_SNAPSHOT_PATH))
+        except (OSError, ValueError):
+            logger.exception('fail to load directory snapshot')
+    frames = list(read_recording(path))
+
+    bot.session_pool.install()
+    loop = asyncio.get_event_loop()
+    bot.loop = loop
+    try:
+        return loop.run_until_complete(replay(bot, frames, pace=pace))
+    finally:
+        loop.run_until_complete(bot.session_pool.close())
+        bot.sandbox_pool.close()
@@ -1,12 +1,24 @@
 import asyncio
+import collections
 import functools
 import importlib
 import inspect
 import logging
 import logging.config
+import threading
+import time
 import traceback
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
-from typing import Any, Callable, Dict, List, TypeVar, Union
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    TypeVar,
+    Union,
+)
 
 import aiocron
 
@@ -17,11 +29,25 @@ import async_timeout
 import ujson
 
 from .api import SlackAPI
+from .api.scheduler import Scheduler, TIER_RATES
 from .box import Box, Crontab, box
+from .buffer import call_with_buffers, share_large_bytes
 from .config import Config
-from .event import create_event
-from .orm import Base, EngineConfig, get_database_engine, make_session
-from .session import client_session
+from .directory import Directory
+from .event import Event, create_event
+from .metrics import Metrics
+from .orm import (
+    AsyncDB,
+    Base,
+    EngineConfig,
+    get_database_engine,
+    init_worker,
+    make_session,
+)
+from .profiler import Profile, StallWatchdog, sample
+from .recorder import RTMRecorder
+from .sandbox import SandboxPool
+from .session import SessionPool
 from .type import (
     BotLinkedNamespace,
     Channel,
@@ -34,11 +60,39 @@ from .type import (
 )
 
 
-__all__ = 'APICallError', 'Bot', 'BotReconnect'
+__all__ = 'APICallError', 'Bot', 'BotReconnect', 'get_channel_key'
 
 R = TypeVar('R')
 
 
+def get_channel_key(event: Event) -> Optional[str]:
+    """Get key of channel to keep order of events.
+
+    :meth:`Bot.make_event` caches it in ``_channel_key``, so channel of lazy
+    event is cast where errors of malformed frame are caught.
+
+    """
+
+    if '_channel_key' in event.__dict__:
+        return event.__dict__['_channel_key']
+    channel = getattr(event, 'channel', None)
+    if channel is None or isinstance(channel, str):
+        return channel
+    return getattr(channel, 'id', None)
+
+
+def get_handler_name(handler) -> str:
+    """Get name of handler for labels of metrics."""
+
+    name = getattr(handler, 'name', None)
+    if name:
+        return name
+    callback = getattr(handler, 'callback', None)
+    if callback is not None:
+        return callback.__qualname__
+    return type(handler).__name__
+
+
 class BotReconnect(Exception):
     """Exception for reconnect bot"""
 
@@ -72,6 +126,7 @@ class Bot:
         *,
         orm_base=None,
         using_box: Box = None,
+        metrics: Metrics = None,
     ) -> None:
         """Initialize"""
 
@@ -83,7 +138,14 @@ class Bot:
 
         BotLinkedNamespace._bot = self
 
-        self.process_pool_executor = ProcessPoolExecutor()
+        self.process_pool_jobs = 0
+        self.process_pool_executor = ProcessPoolExecutor(
+            initializer=init_worker,
+            initargs=(EngineConfig(
+                url=config.DATABASE_URL,
+                echo=config.DATABASE_ECHO,
+            ),),
+        )
         self.thread_pool_executor = ThreadPoolExecutor()
 
         logger.info('connect to DB')
@@ -99,11 +161,35 @@ class Bot:
         self.orm_base = orm_base or Base
         self.box = using_box or box
         self.queue: asyncio.Queue = asyncio.Queue()
+        self.metrics = metrics or Metrics()
+        self.metrics.add_collector(self.collect_metrics)
+        self.db = AsyncDB(config.DATABASE_ENGINE, metrics=self.metrics)
+        self.session_pool = SessionPool(
+            limit=self.config.HTTP_POOL_LIMIT,
+            keepalive_timeout=self.config.HTTP_KEEPALIVE_TIMEOUT,
+        )
+        self.scheduler = Scheduler(
+            metrics=self.metrics,
+            tier_rates={**TIER_RATES, **self.config.API_TIER_RATES},
+        )
+        self.sandbox_pool = SandboxPool(
+            size=self.config.SANDBOX_WORKERS,
+            spares=self.config.SANDBOX_SPARES,
+            cpu_limit=self.config.SANDBOX_CPU_LIMIT,
+            memory_limit=self.config.SANDBOX_MEMORY_LIMIT,
+            metrics=self.metrics,
+        )
+        self.watchdog: Optional[StallWatchdog] = None
+        if self.config.STALL_THRESHOLD:
+            self.watchdog = StallWatchdog(
+                threshold=self.config.STALL_THRESHOLD,
+                metrics=self.metrics,
+            )
+        self.recorder: Optional[RTMRecorder] = None
+        if self.config.RTM_RECORD_PATH:
+            self.recorder = RTMRecorder(self.config.RTM_RECORD_PATH)
         self.api = SlackAPI(self)
-        self.channels: List[PublicChannel] = []
-        self.ims: List[DirectMessageChannel] = []
-        self.groups: List[PrivateChannel] = []
-        self.users: Dict[UserID, User] = {}
+        self.directory = Directory()
         self.restart = False
 
         self.config.check_and_cast(self.box.config_required)
@@ -116,6 +202,40 @@ class Bot:
             logger.info('register crontab')
             self.register_crontab()
 
+    @property
+    def channels(self) -> List[PublicChannel]:
+        return self.directory.channels
+
+    @channels.setter
+    def channels(self, value: List[PublicChannel]):
+        self.directory.channels[:] = value
+
+    @property
+    def ims(self) -> List[DirectMessageChannel]:
+        return self.directory.ims
+
+    @ims.setter
+    def ims(self, value: List[DirectMessageChannel]):
+        self.directory.ims[:] = value
+
+    @property
+    def groups(self) -> List[PrivateChannel]:
+        return self.directory.groups
+
+    @groups.setter
+    def groups(self, value: List[PrivateChannel]):
+        self.directory.groups[:] = value
+
+    @property
+    def users(self) -> Dict[UserID, User]:
+        return self.directory.users
+
+    @users.setter
+    def users(self, value: Dict[UserID, User]):
+        if value is not self.directory.users:
+            self.directory.users.clear()
+            self.directory.users.update(value)
+
     def register_crontab(self):
         """Register cronjob to bot from box."""
 
@@ -130,18 +250,25 @@ class Bot:
             kw: Dict[str, Any] = {}
             if 'bot' in func_params:
                 kw['bot'] = self
+            if 'db' in func_params:
+                kw['db'] = self.db
 
             @aiocron.crontab(c.spec, *c.args, **c.kwargs)
             async def task():
+                name = c.func.__qualname__
                 if lock.locked():
+                    self.metrics.inc('crontab_overruns', job=name)
                     return
                 async with lock:
                     if 'loop' in func_params:
                         kw['loop'] = self.loop
 
-                    sess = make_session(bind=self.config.DATABASE_ENGINE)
+                    sess = None
                     if 'sess' in func_params:
-                        kw['sess'] = sess
+                        sess = kw['sess'] = make_session(
+                            bind=self.config.DATABASE_ENGINE,
+                        )
+                        self.metrics.inc('db_sessions', source='crontab')
 
                     if 'engine_config' in func_params:
                         kw['engine_config'] = EngineConfig(
@@ -150,6 +277,7 @@ class Bot:
                         )
 
                     logger.debug(f'hit and start to run {c}')
+                    start = time.monotonic()
                     try:
                         await c.func(**kw)
                     except:  # noqa: E722
@@ -161,7 +289,13 @@ class Bot:
                             )
                         )
                     finally:
-                        sess.close()
+                        if sess is not None:
+                            sess.close()
+                        self.metrics.observe(
+                            'crontab_seconds',
+                            time.monotonic() - start,
+                            job=name,
+                        )
                     logger.debug(f'end {c}')
 
             c.start = task.start
@@ -173,19 +307,47 @@ class Bot:
     def run(self):
         """Run"""
 
+        logger = logging.getLogger(f'{__name__}.Bot.run')
+
+        self.session_pool.install()
         while True:
             loop = asyncio.get_event_loop()
             loop.set_debug(self.config.DEBUG)
             self.loop = loop
-            loop.run_until_complete(
-                asyncio.wait(
-                    (
-                        self.receive(),
-                        self.process(),
-                    ),
-                    return_when=asyncio.FIRST_EXCEPTION,
+            metrics_server = None
+            if self.config.METRICS_PORT:
+                try:
+                    metrics_server = loop.run_until_complete(
+                        self.metrics.serve(
+                            self.config.METRICS_HOST,
+                            self.config.METRICS_PORT,
+                        ),
+                    )
+                except OSError:
+                    logger.exception('fail to start metrics server')
+            heartbeat = None
+            if self.watchdog is not None:
+                heartbeat = self.watchdog.start()
+            try:
+                loop.run_until_complete(
+                    asyncio.wait(
+                        (
+                            self.receive(),
+                            self.process(),
+                        ),
+                        return_when=asyncio.FIRST_EXCEPTION,
+                    )
                 )
-            )
+            finally:
+                if heartbeat is not None:
+                    heartbeat.cancel()
+                    self.watchdog.stop()
+                loop.run_until_complete(self.session_pool.close())
+                self.sandbox_pool.close()
+                if self.recorder is not None:
+                    self.recorder.close()
+                if metrics_server is not None:
+                    loop.run_until_complete(metrics_server.cleanup())
             loop.close()
 
     async def run_in_other_process(
@@ -194,10 +356,39 @@ class Bot:
         *args,
         **kwargs,
     ) -> R:
-        return await self.loop.run_in_executor(
-            executor=self.process_pool_executor,
-            func=functools.partial(f, *args, **kwargs),
-        )
+        """Run f in process pool.
+
+        Large bytes in arguments are handed through shared memory and f
+        gets them as :class:`mmap.mmap`.
+
+        """
+
+        args, kwargs, buffers = share_large_bytes(args, kwargs)
+        if buffers:
+            func = functools.partial(call_with_buffers, f, args, kwargs)
+        else:
+            func = functools.partial(f, *args, **kwargs)
+        self.process_pool_jobs += 1
+        try:
+            return await self.loop.run_in_executor(
+                executor=self.process_pool_executor,
+                func=func,
+            )
+        finally:
+            self.process_pool_jobs -= 1
+            for buffer in buffers:
+                buffer.unlink()
+
+    async def run_in_sandbox(
+        self,
+        timeout: float,
+        f: Callable[..., R],
+        *args,
+        **kwargs,
+    ) -> R:
+        """Run untrusted job in worker which is killed on timeout."""
+
+        return await self.sandbox_pool.run(timeout, f, *args, **kwargs)
 
     async def run_in_other_thread(
         self,
@@ -210,6 +401,15 @@ class Bot:
             func=functools.partial(f, *args, **kwargs),
         )
 
+    async def profile(self, seconds: float) -> Profile:
+        """Sample stack of event loop thread for given seconds."""
+
+        return await self.run_in_other_thread(
+            sample,
+            threading.get_ident(),
+            seconds,
+        )
+
     async def call(
         self,
         method: str,
@@ -219,14 +419,36 @@ class Bot:
     ) -> Dict[str, Any]:
         """Call API methods."""
 
-        async with client_session() as session:
+        retries = 0
+        while True:
+            await self.scheduler.acquire(method)
+            session = self.session_pool.session
             form = aiohttp.FormData(data or {})
             form.add_field('token', token or self.config.TOKEN)
+            start = time.monotonic()
             try:
                 async with session.post(
-                    'https://slack.com/api/{}'.format(method),
+                    '{}{}'.format(self.config.SLACK_API_URL, method),
                     data=form
                 ) as response:
+                    self.metrics.observe(
+                        'api_call_seconds',
+                        time.monotonic() - start,
+                        method=method,
+                    )
+                    self.metrics.inc(
+                        'api_calls',
+                        method=method,
+                        status=response.status,
+                    )
+                    if response.status == 429 and \
+                            retries < self.scheduler.max_retries:
+                        self.scheduler.retry_after(
+                            method,
+                            float(response.headers.get('Retry-After', 1)),
+                        )
+                        retries += 1
+                        continue
                     try:
                         result = await response.json(loads=ujson.loads)
                     except aiohttp.client_exceptions.ContentTypeError:
@@ -250,6 +472,7 @@ class Bot:
                             headers=response.headers,
                         )
             except aiohttp.client_exceptions.ClientConnectorError:
+                self.metrics.inc('api_calls', method=method, status='error')
                 raise APICallError('fail to call {} with {}'.format(
                     method, data
                 ))
@@ -271,11 +494,22 @@ class Bot:
         )
 
     async def process(self):
-        """Process messages."""
+        """Process messages.
+
+        Events are dispatched to a bounded pool of workers.
+        Events from same channel are handled in arrival order.
+        Each event of :attr:`queue` is marked as done after it is dispatched,
+        so ``queue.join()`` waits until queued events are handled.
+
+        """
 
         logger = logging.getLogger(f'{__name__}.Bot.process')
 
+        pending: Dict[Optional[str], Deque[Event]] = {}
+        ready: asyncio.Queue = asyncio.Queue()
+
         async def handle(handler, event):
+            start = time.monotonic()
             try:
                 return await handler.run(self, event)
             except SystemExit:
@@ -286,6 +520,10 @@ class Bot:
                 self.restart = True
                 return False
             except:  # noqa: E722
+                self.metrics.inc(
+                    'handler_errors',
+                    handler=get_handler_name(handler),
+                )
                 logger.error(
                     f'Event: {event} / '
                     f'Traceback: {traceback.format_exc()}'
@@ -299,17 +537,94 @@ class Bot:
                     )
                 )
                 return False
+            finally:
+                self.metrics.observe(
+                    'handler_seconds',
+                    time.monotonic() - start,
+                    handler=get_handler_name(handler),
+                )
 
-        while True:
-            event = await self.queue.get()
-
+        async def dispatch(event):
             logger.info(event)
 
-            for handler in self.box.handlers:
+            for handler in self.box.get_handlers(event, self.config.PREFIX):
                 result = await handle(handler, event)
                 if not result:
                     break
 
+        async def worker():
+            while True:
+                key = await ready.get()
+                events = pending[key]
+                try:
+                    while events:
+                        event = events.popleft()
+                        try:
+                            await dispatch(event)
+                        except asyncio.CancelledError:
+                            raise
+                        except Exception:
+                            logger.exception('fail to dispatch %s', event)
+                        finally:
+                            self.queue.task_done()
+                finally:
+                    del pending[key]
+
+        async def distribute():
+            while True:
+                event = await self.queue.get()
+                try:
+                    key = get_channel_key(event)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception('fail to get channel of %s', event)
+                    self.queue.task_done()
+                    continue
+                if key in pending:
+                    pending[key].append(event)
+                else:
+                    pending[key] = collections.deque([event])
+                    ready.put_nowait(key)
+
+        tasks = [
+            asyncio.ensure_future(worker())
+            for _ in range(max(self.config.DISPATCH_WORKERS, 1))
+        ]
+        tasks.append(asyncio.ensure_future(distribute()))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def collect_metrics(self) -> None:
+        """Update gauges which are read when metrics are rendered."""
+
+        self.metrics.set('queue_depth', self.queue.qsize())
+        for kind, count in self.directory.progress.items():
+            self.metrics.set('directory_loaded', count, kind=kind)
+        self.metrics.set('directory_ready', int(self.directory.is_ready()))
+        self.metrics.set('process_pool_jobs', self.process_pool_jobs)
+
+    def make_event(self, payload: Dict[str, Any]) -> Optional[Event]:
+        """Make event from RTM frame.
+
+        It returns None without parsing if no handler subscribes it.
+
+        """
+
+        type_ = payload.get('type')
+        self.metrics.inc('events_received', type=type_)
+        if type_ is None or \
+                not self.box.subscribes(type_, payload.get('subtype')):
+            self.metrics.inc('events_dropped', type=type_)
+            return None
+
+        event = create_event(payload, lazy=self.config.LAZY_EVENTS)
+        event._channel_key = get_channel_key(event)
+        return event
+
     async def receive(self):
         """Receive stream from slack."""
 
@@ -319,7 +634,7 @@ class Bot:
         sleep = 0
         while True:
             try:
-                rtm = await self.call('rtm.start')
+                rtm = await self.call(self.config.RTM_METHOD)
             except Exception as e:
                 logger.exception(e)
                 await asyncio.sleep((sleep + 1) * 10)
@@ -333,57 +648,64 @@ class Bot:
             else:
                 sleep = 0
 
+            try:
+                self.directory.seed(rtm)
+            except:  # noqa: E722
+                logger.exception('fail to seed directory from rtm')
+
             await self.queue.put(create_event({
                 'type': 'chatterbox_system_start',
             }))
             try:
-                async with client_session() as session:
-                    async with session.ws_connect(rtm['url']) as ws:
-                        while True:
-                            if self.restart:
-                                self.restart = False
-                                await ws.close()
-                                break
-
+                session = self.session_pool.session
+                async with session.ws_connect(rtm['url']) as ws:
+                    while True:
+                        if self.restart:
+                            self.restart = False
+                            await ws.close()
+                            break
+
+                        try:
+                            async with async_timeout.timeout(timeout):
+                                msg: aiohttp.WSMessage = await ws.receive()
+                        except asyncio.TimeoutError:
+                            logger.error(f'receive timeout({timeout})')
+                            await ws.close()
+                            break
+
+                        if msg == aiohttp.http.WS_CLOSED_MESSAGE:
+                            break
+
+                        if msg.type == aiohttp.WSMsgType.TEXT:
                             try:
-                                async with async_timeout.timeout(timeout):
-                                    msg: aiohttp.WSMessage = await ws.receive()
-                            except asyncio.TimeoutError:
-                                logger.error(f'receive timeout({timeout})')
-                                await ws.close()
-                                break
-
-                            if msg == aiohttp.http.WS_CLOSED_MESSAGE:
-                                break
-
-                            if msg.type == aiohttp.WSMsgType.TEXT:
-                                try:
-                                    event = create_event(
-                                        msg.json(loads=ujson.loads)
-                                    )
-                                except:  # noqa: F722
-                                    logger.exception(msg.data)
-                                else:
-                                    await self.queue.put(event)
-                            elif msg.type in (aiohttp.WSMsgType.CLOSE,
-                                              aiohttp.WSMsgType.CLOSED,
-                                              aiohttp.WSMsgType.CLOSING):
-                                logger.info('websocket closed')
-                                break
-                            elif msg.type == aiohttp.WSMsgType.ERROR:
-                                logger.error(msg.data)
-                                break
+                                frame = msg.json(loads=ujson.loads)
+                                if self.recorder is not None:
+                                    self.recorder.record(frame)
+                                event = self.make_event(frame)
+                            except:  # noqa: E722
+                                logger.exception(msg.data)
                             else:
-                                logger.error(
-                                    'Type: %s / MSG: %s',
-                                    msg.type,
-                                    msg,
-                                )
-                                break
+                                if event is not None:
+                                    await self.queue.put(event)
+                        elif msg.type in (aiohttp.WSMsgType.CLOSE,
+                                          aiohttp.WSMsgType.CLOSED,
+                                          aiohttp.WSMsgType.CLOSING):
+                            logger.info('websocket closed')
+                            break
+                        elif msg.type == aiohttp.WSMsgType.ERROR:
+                            logger.error(msg.data)
+                            break
+                        else:
+                            logger.error(
+                                'Type: %s / MSG: %s',
+                                msg.type,
+                                msg,
+                            )
+                            break
                 raise BotReconnect()
             except BotReconnect:
                 logger.info('BotReconnect raised. I will reconnect to rtm.')
-                continue
+            except asyncio.CancelledError:
+                raise
             except:  # noqa
                 logger.exception('Unexpected Exception raised')
-                continue
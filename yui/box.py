@@ -1,16 +1,23 @@
 from __future__ import annotations
 
+import collections
 import contextlib
 import functools
+import heapq
 import html
 import inspect
 import re
 import shlex
+import types
 from typing import (
+    AbstractSet,
     Any,
     Awaitable,
     Callable,
+    DefaultDict,
     Dict,
+    FrozenSet,
+    Iterable,
     List,
     Mapping,
     NamedTuple,
@@ -34,12 +41,21 @@ if TYPE_CHECKING:
 
 __all__ = (
     'BaseHandler',
+    'ArgumentSpec',
     'Box',
     'CommandMappingHandler',
     'CommandMappingUnit',
+    'CommandSpec',
     'Crontab',
     'Handler',
+    'OptionSpec',
+    'ParsedMessage',
+    'Router',
     'box',
+    'compile_spec',
+    'get_message_text',
+    'get_spec',
+    'parse_message',
     'parse_option_and_arguments',
 )
 
@@ -48,207 +64,391 @@ SPACE_RE = re.compile(r'\s+')
 
 KWARGS_DICT = Dict[str, Any]
 
+INDEXED_HANDLERS = List[Tuple[int, 'BaseHandler']]
 
-def parse_option_and_arguments(
-    callback,
-    chunks: List[str],
-) -> Tuple[KWARGS_DICT, List[str]]:
-    end = False
+SPECS: Dict[Callable, 'CommandSpec'] = {}
 
-    result: KWARGS_DICT = {}
-    options: List[Option] = getattr(callback, '__options__', [])
-    arguments: List[Argument] = getattr(callback, '__arguments__', [])
-    signature = inspect.signature(callback)
 
-    for o in options:
-        if o.type_ is None:
-            type_ = signature.parameters[o.dest].annotation
+INJECTABLES = frozenset({
+    'bot',
+    'db',
+    'engine_config',
+    'event',
+    'loop',
+    'raw',
+    'remain_chunks',
+    'sess',
+})
 
-            if type_ == inspect._empty:  # type: ignore
-                type_ = str
-            else:
-                if o.transform_func:
-                    type_ = str
 
-            o.type_ = type_
+class OptionSpec(NamedTuple):
+    """Compiled option."""
 
-    for a in arguments:
-        if a.type_ is None:
-            type_ = signature.parameters[a.dest].annotation
+    option: Option
+    type_: Any
+    cast: Callable[[List[str]], Any]
+    transform: Optional[Callable[[Any], Any]]
 
-            if type_ == inspect._empty:  # type: ignore
-                type_ = str
-            else:
-                if a.transform_func:
-                    type_ = str
 
-            a.type_ = type_
-            if is_container(a.type_):
-                a.container_cls = None
-                a.typing_has_container = True
+class ArgumentSpec(NamedTuple):
+    """Compiled argument."""
 
-    required = {o.dest for o in options if o.required}
+    argument: Argument
+    type_: Any
+    cast: Callable[[List[str]], Any]
+    transform: Optional[Callable[[Any], Any]]
 
-    for option in options:
-        if option.multiple:
-            result[option.dest] = []
-        else:
-            if callable(option.default):
-                result[option.dest] = option.default()
+
+class CommandSpec(NamedTuple):
+    """Compiled specification of command callback."""
+
+    params: FrozenSet[str]
+    injectables: FrozenSet[str]
+    options: Tuple[OptionSpec, ...]
+    options_by_name: Mapping[str, OptionSpec]
+    arguments: Tuple[ArgumentSpec, ...]
+    remain_chunks_as_str: bool
+
+    def parse(self, chunks: List[str]) -> Tuple[KWARGS_DICT, List[str]]:
+        """Parse options and arguments from given chunks.
+
+        It walk chunks only once with cursor, so it takes linear time.
+
+        """
+
+        result: KWARGS_DICT = {}
+        options = self.options
+        options_by_name = self.options_by_name
+        arguments = self.arguments
+        chunks = list(chunks)
+        size = len(chunks)
+        pos = 0
+
+        required = {o.option.dest for o in options if o.option.required}
+
+        for x in options:
+            option = x.option
+            if option.multiple:
+                result[option.dest] = []
             else:
-                result[option.dest] = option.default
+                if callable(option.default):
+                    result[option.dest] = option.default()
+                else:
+                    result[option.dest] = option.default
+
+        o: Optional[OptionSpec]
+        while options_by_name and pos < size:
+            name = chunks[pos]
+            o = options_by_name.get(name)
+            if o is not None:
+                pos += 1
+            elif '=' in name:
+                name, value = name.split('=', 1)
+                o = options_by_name.get(name)
+                if o is not None:
+                    # keep value of ``--name=value`` at the cursor
+                    chunks[pos] = value
+            if o is None:
+                break
 
-    while not end and chunks:
-        for option in options:
-            name = chunks.pop(0)
-            if name.startswith(option.name + '='):
-                name, new_chunk = name.split('=', 1)
-                chunks.insert(0, new_chunk)
+            option = o.option
+            required.discard(option.dest)
 
-            if name == option.name:
-                if option.dest in required:
-                    required.remove(option.dest)
+            if option.nargs == 0:
+                result[option.dest] = option.value
+                continue
 
-                if option.nargs == 0:
-                    result[option.dest] = option.value
-                    break
+            if size - pos < option.nargs:
+                raise SyntaxError(
+                    option.count_error.format(
+                        name=option.name,
+                        expected=option.nargs,
+                        given=size - pos,
+                    )
+                )
+            args = chunks[pos:pos + option.nargs]
+            pos += option.nargs
+            try:
+                r = o.cast(args)
+            except ValueError as e:
+                raise SyntaxError(
+                    option.type_error.format(name=option.name, e=e)
+                )
 
-                length = len(chunks)
+            if o.transform:
                 try:
-                    args = [chunks.pop(0) for _ in range(option.nargs)]
-                except IndexError:
+                    r = o.transform(r)
+                except ValueError as e:
                     raise SyntaxError(
-                        option.count_error.format(
+                        option.transform_error.format(
                             name=option.name,
-                            expected=option.nargs,
-                            given=length,
+                            e=e,
                         )
                     )
-                try:
-                    if option.container_cls:
-                        if option.multiple:
-                            r = cast(option.type_, args)
-                        else:
-                            r = option.container_cls(
-                                cast(option.type_, x) for x in args
-                            )
-                    else:
-                        r = cast(option.type_, args[0])
-                except ValueError as e:
-                    raise SyntaxError(
-                        option.type_error.format(name=option.name, e=e)
-                    )
 
-                if option.transform_func:
-                    if option.container_cls:
-                        try:
-                            r = option.container_cls(
-                                option.transform_func(x)
-                                for x in r
-                            )
-                        except ValueError as e:
-                            raise SyntaxError(
-                                option.transform_error.format(
-                                    name=option.name,
-                                    e=e,
-                                )
-                            )
-                    else:
-                        try:
-                            r = option.transform_func(r)
-                        except ValueError as e:
-                            raise SyntaxError(
-                                option.transform_error.format(
-                                    name=option.name,
-                                    e=e,
-                                )
-                            )
-
-                if option.multiple:
-                    result[option.dest].append(r[0])
-                else:
-                    result[option.dest] = r
+            if option.multiple:
+                result[option.dest].append(r[0])
+            else:
+                result[option.dest] = r
 
-                break
-            chunks.insert(0, name)
-        else:
-            end = True
-
-    if required:
-        raise SyntaxError(
-            '\n'.join(o.count_error.format(
-                name=o.name,
-                expected=o.nargs,
-                given=0,
-            ) for o in (
-                list(filter(lambda x: x.dest == o, options))[0]
-                for o in required
-            ))
-        )
+        if required:
+            raise SyntaxError(
+                '\n'.join(o.count_error.format(
+                    name=o.name,
+                    expected=o.nargs,
+                    given=0,
+                ) for o in (
+                    [x.option for x in options if x.option.dest == dest][0]
+                    for dest in required
+                ))
+            )
 
-    for i, argument in enumerate(arguments):
-        length = argument.nargs
-        if argument.nargs < 0:
-            length = len(chunks) - sum(a.nargs for a in arguments[i:]) - 1
-
-        if length < 1:
-            raise SyntaxError(argument.count_error.format(
-                name=argument.name,
-                expected='>0',
-                given=0,
-            ))
-        if length <= len(chunks):
-            args = [chunks.pop(0) for _ in range(length)]
-        else:
-            raise SyntaxError(argument.count_error.format(
-                name=argument.name,
-                expected=argument.nargs,
-                given=len(chunks),
-            ))
-        try:
-            if argument.concat:
-                r = ' '.join(args)
-            elif argument.container_cls:
-                r = argument.container_cls(
-                    cast(argument.type_, x) for x in args
-                )
-            elif argument.typing_has_container:
-                r = cast(argument.type_, args)
+        nargs_left = sum(a.argument.nargs for a in arguments)
+        for a in arguments:
+            argument = a.argument
+            length = argument.nargs
+            if argument.nargs < 0:
+                length = size - pos - nargs_left - 1
+            nargs_left -= argument.nargs
+
+            if length < 1:
+                raise SyntaxError(argument.count_error.format(
+                    name=argument.name,
+                    expected='>0',
+                    given=0,
+                ))
+            if length <= size - pos:
+                args = chunks[pos:pos + length]
+                pos += length
             else:
-                r = cast(argument.type_, args[0])
-        except ValueError as e:
-            raise SyntaxError(
-                argument.type_error.format(
+                raise SyntaxError(argument.count_error.format(
                     name=argument.name,
-                    e=e,
+                    expected=argument.nargs,
+                    given=size - pos,
+                ))
+            try:
+                r = a.cast(args)
+            except ValueError as e:
+                raise SyntaxError(
+                    argument.type_error.format(
+                        name=argument.name,
+                        e=e,
+                    )
                 )
-            )
 
-        if argument.transform_func:
-            if argument.container_cls and r:
+            if a.transform:
                 try:
-                    r = argument.container_cls(
-                        argument.transform_func(x)
-                        for x in r
-                    )
+                    r = a.transform(r)
                 except ValueError as e:
                     raise SyntaxError(argument.transform_error.format(
                         name=argument.name,
                         e=e,
                     ))
-            else:
+
+            if r is not None:
+                result[argument.dest] = r
+
+        return result, chunks[pos:]
+
+
+def resolve_type(
+    x: Union[Argument, Option],
+    params: Mapping[str, inspect.Parameter],
+):
+    """Resolve value type of argument or option from signature."""
+
+    if x.type_ is not None:
+        return x.type_
+
+    try:
+        type_ = params[x.dest].annotation
+    except KeyError:
+        type_ = inspect.Parameter.empty
+
+    if type_ is inspect.Parameter.empty or x.transform_func:
+        return str
+    return type_
+
+
+def compile_option(
+    option: Option,
+    params: Mapping[str, inspect.Parameter],
+) -> OptionSpec:
+    """Compile option with resolving types."""
+
+    type_ = resolve_type(option, params)
+    container_cls = option.container_cls
+    transform_func = option.transform_func
+
+    caster: Callable[[List[str]], Any]
+    if container_cls:
+        if option.multiple:
+            def caster(args):
+                return cast(type_, args)
+        else:
+            def caster(args):
+                return container_cls(cast(type_, x) for x in args)
+    else:
+        def caster(args):
+            return cast(type_, args[0])
+
+    transform: Optional[Callable[[Any], Any]] = transform_func
+    if transform_func and container_cls:
+        def transform_each(r):
+            return container_cls(transform_func(x) for x in r)
+
+        transform = transform_each
+
+    return OptionSpec(option, type_, caster, transform)
+
+
+def compile_argument(
+    argument: Argument,
+    params: Mapping[str, inspect.Parameter],
+) -> ArgumentSpec:
+    """Compile argument with resolving types."""
+
+    type_ = resolve_type(argument, params)
+    container_cls = argument.container_cls
+    typing_has_container = argument.typing_has_container
+    transform_func = argument.transform_func
+    if argument.type_ is None and is_container(type_):
+        container_cls = None
+        typing_has_container = True
+
+    caster: Callable[[List[str]], Any]
+    if argument.concat:
+        def caster(args):
+            return ' '.join(args)
+    elif container_cls:
+        def caster(args):
+            return container_cls(cast(type_, x) for x in args)
+    elif typing_has_container:
+        def caster(args):
+            return cast(type_, args)
+    else:
+        def caster(args):
+            return cast(type_, args[0])
+
+    transform: Optional[Callable[[Any], Any]] = transform_func
+    if transform_func and container_cls:
+        def transform_each(r):
+            if r:
+                return container_cls(transform_func(x) for x in r)
+            return transform_func(r)
+
+        transform = transform_each
+
+    return ArgumentSpec(argument, type_, caster, transform)
+
+
+def compile_spec(callback) -> CommandSpec:
+    """Compile callback to :class:`CommandSpec`."""
+
+    params = inspect.signature(callback).parameters
+    names = frozenset(params)
+    remain_chunks_as_str = True
+    if 'remain_chunks' in params:
+        remain_chunks_as_str = params['remain_chunks'].annotation in [
+            str,
+            inspect.Parameter.empty,
+        ]
+
+    options = tuple(
+        compile_option(o, params)
+        for o in getattr(callback, '__options__', [])
+    )
+    options_by_name: Dict[str, OptionSpec] = {}
+    for o in options:
+        options_by_name.setdefault(o.option.name, o)
+
+    return CommandSpec(
+        params=names,
+        injectables=names & INJECTABLES,
+        options=options,
+        options_by_name=types.MappingProxyType(options_by_name),
+        arguments=tuple(
+            compile_argument(a, params)
+            for a in getattr(callback, '__arguments__', [])
+        ),
+        remain_chunks_as_str=remain_chunks_as_str,
+    )
+
+
+def get_spec(callback) -> CommandSpec:
+    """Get compiled spec of callback. It compile spec only once."""
+
+    try:
+        return SPECS[callback]
+    except KeyError:
+        spec = SPECS[callback] = compile_spec(callback)
+        return spec
+
+
+def parse_option_and_arguments(
+    callback,
+    chunks: List[str],
+) -> Tuple[KWARGS_DICT, List[str]]:
+    return get_spec(callback).parse(chunks)
+
+
+class ParsedMessage:
+    """Tokenized view of message text, shared by all handlers of an event."""
+
+    def __init__(self, text: Optional[str]) -> None:
+        """Initialize"""
+
+        self.call = ''
+        self.args = ''
+        if text:
+            try:
+                self.call, self.args = SPACE_RE.split(text, 1)
+            except ValueError:
+                self.call = text
+        self.raw = html.unescape(self.args)
+        self._chunks: Dict[bool, Optional[List[str]]] = {}
+
+    def get_chunks(self, use_shlex: bool) -> List[str]:
+        """Split raw arguments. Raise ValueError if shlex can not split it."""
+
+        try:
+            chunks = self._chunks[use_shlex]
+        except KeyError:
+            if use_shlex:
                 try:
-                    r = argument.transform_func(r)
-                except ValueError as e:
-                    raise SyntaxError(argument.transform_error.format(
-                        name=argument.name,
-                        e=e,
-                    ))
+                    chunks = shlex.split(self.raw)
+                except ValueError:
+                    chunks = None
+            else:
+                chunks = self.raw.split(' ')
+            self._chunks[use_shlex] = chunks
 
-        if r is not None:
-            result[argument.dest] = r
+        if chunks is None:
+            raise ValueError('Can not parse this command')
+        return chunks
 
-    return result, chunks
+
+def get_message_text(event: Message) -> Optional[str]:
+    """Get text of message event."""
+
+    if hasattr(event, 'text'):
+        return event.text
+    elif hasattr(event, 'message') and event.message and \
+            hasattr(event.message, 'text'):
+        return event.message.text
+    return None
+
+
+def parse_message(event: Message) -> ParsedMessage:
+    """Get tokenized view of message. It is made once per event."""
+
+    try:
+        return event._parsed_message
+    except AttributeError:
+        parsed = event._parsed_message = ParsedMessage(
+            get_message_text(event),
+        )
+        return parsed
 
 
 class BaseHandler:
@@ -285,19 +485,24 @@ class BaseHandler:
         *,
         bot: Bot,
         event: Event,
-        func_params: Mapping[str, inspect.Parameter],
+        injectables: AbstractSet[str],
         **kwargs,
     ):
-        sess = make_session(bind=bot.config.DATABASE_ENGINE)
-        if 'bot' in func_params:
+        sess = None
+        if 'bot' in injectables:
             kwargs['bot'] = bot
-        if 'loop' in func_params:
+        if 'loop' in injectables:
             kwargs['loop'] = bot.loop
-        if 'event' in func_params:
+        if 'db' in injectables:
+            kwargs['db'] = bot.db
+        if 'event' in injectables:
             kwargs['event'] = event
-        if 'sess' in func_params:
-            kwargs['sess'] = sess
-        if 'engine_config' in func_params:
+        if 'sess' in injectables:
+            sess = kwargs['sess'] = make_session(
+                bind=bot.config.DATABASE_ENGINE,
+            )
+            bot.metrics.inc('db_sessions', source='handler')
+        if 'engine_config' in injectables:
             kwargs['engine_config'] = EngineConfig(
                 url=bot.config.DATABASE_URL,
                 echo=bot.config.DATABASE_ECHO,
@@ -306,7 +511,8 @@ class BaseHandler:
         try:
             yield kwargs
         finally:
-            sess.close()
+            if sess is not None:
+                sess.close()
 
 
 class CommandMappingUnit(NamedTuple):
@@ -333,21 +539,11 @@ class CommandMappingHandler(BaseHandler):
         if not isinstance(event, Message):
             return True
 
-        root_args = ''
-        root_call = ''
+        parsed = parse_message(event)
+        root_call = parsed.call
+        root_args = parsed.args
         args = ''
         command = None
-        if hasattr(event, 'text'):
-            try:
-                root_call, root_args = SPACE_RE.split(event.text, 1)
-            except ValueError:
-                root_call = event.text
-        elif hasattr(event, 'message') and event.message and \
-                hasattr(event.message, 'text'):
-            try:
-                root_call, root_args = SPACE_RE.split(event.message.text, 1)
-            except ValueError:
-                root_call = event.message.text
 
         if root_call == bot.config.PREFIX + self.name:
             for c in self.command_map:
@@ -370,7 +566,7 @@ class CommandMappingHandler(BaseHandler):
 
         if command:
             raw = html.unescape(args)
-            func_params = inspect.signature(command).parameters
+            spec = get_spec(command)
             if self.use_shlex:
                 try:
                     chunks = shlex.split(raw)
@@ -384,17 +580,14 @@ class CommandMappingHandler(BaseHandler):
                 chunks = raw.split(' ')
 
             try:
-                kw, remain_chunks = parse_option_and_arguments(
-                    command,
-                    chunks,
-                )
+                kw, remain_chunks = spec.parse(chunks)
             except SyntaxError as e:
                 await bot.say(event.channel, '*Error*\n{}'.format(e))
                 return False
             with self.prepare_kwargs(
                 bot=bot,
                 event=event,
-                func_params=func_params,
+                injectables=spec.injectables,
                 **kw,
             ) as kwargs:  # type: KWARGS_DICT
                 return await command(**kwargs)
@@ -424,6 +617,7 @@ class Handler(BaseHandler):
         self.type = type
         self.subtype = subtype
         self.callback = callback
+        self.spec = get_spec(callback)
         self.name = name
         self.aliases: List[str] = [] if aliases is None else aliases
         self.names: List[str] = self.aliases[:]
@@ -479,7 +673,7 @@ class Handler(BaseHandler):
             with self.prepare_kwargs(
                 bot=bot,
                 event=event,
-                func_params=inspect.signature(self.callback).parameters,
+                injectables=self.spec.injectables,
             ) as kwargs:  # type: KWARGS_DICT
                 res = await self.callback(**kwargs)
 
@@ -487,47 +681,29 @@ class Handler(BaseHandler):
 
     async def _run_message_event(self, bot: Bot, event: Message):
         res = True
-        call = ''
-        args = ''
-        if hasattr(event, 'text'):
-            try:
-                call, args = SPACE_RE.split(event.text, 1)
-            except ValueError:
-                call = event.text
-        elif hasattr(event, 'message') and event.message and \
-                hasattr(event.message, 'text'):
-            try:
-                call, args = SPACE_RE.split(event.message.text, 1)
-            except ValueError:
-                call = event.message.text
-
-        raw = html.unescape(args)
+        parsed = parse_message(event)
+        raw = parsed.raw
 
         match = True
         if self.is_command:
+            call = parsed.call
             match = any(
                 call == bot.config.PREFIX + name for name in self.names
             )
 
         if match:
-            func_params = inspect.signature(self.callback).parameters
-            if self.use_shlex:
-                try:
-                    chunks = shlex.split(raw)
-                except ValueError:
-                    await bot.say(
-                        event.channel,
-                        '*Error*: Can not parse this command'
-                    )
-                    return False
-            else:
-                chunks = raw.split(' ')
-
+            spec = self.spec
             try:
-                kw, remain_chunks = parse_option_and_arguments(
-                    self.callback,
-                    chunks,
+                chunks = parsed.get_chunks(self.use_shlex)
+            except ValueError:
+                await bot.say(
+                    event.channel,
+                    '*Error*: Can not parse this command'
                 )
+                return False
+
+            try:
+                kw, remain_chunks = spec.parse(chunks)
             except SyntaxError as e:
                 await bot.say(event.channel, '*Error*\n{}'.format(e))
                 return False
@@ -538,11 +714,10 @@ class Handler(BaseHandler):
                 validation = await self.channel_validator(self, event)
 
             if validation:
-                if 'raw' in func_params:
+                if 'raw' in spec.injectables:
                     kw['raw'] = raw
-                if 'remain_chunks' in func_params:
-                    annotation = func_params['remain_chunks'].annotation
-                    if annotation in [str, inspect._empty]:  # type: ignore
+                if 'remain_chunks' in spec.injectables:
+                    if spec.remain_chunks_as_str:
                         kw['remain_chunks'] = ' '.join(
                             remain_chunks
                         )
@@ -551,7 +726,7 @@ class Handler(BaseHandler):
                 with self.prepare_kwargs(
                     bot=bot,
                     event=event,
-                    func_params=func_params,
+                    injectables=spec.injectables,
                     **kw,
                 ) as kwargs:  # type: KWARGS_DICT
                     res = await self.callback(**kwargs)
@@ -559,6 +734,89 @@ class Handler(BaseHandler):
         return bool(res)
 
 
+class Router:
+    """Index of handlers for finding handlers of event with few lookups."""
+
+    def __init__(self, handlers: List[BaseHandler]) -> None:
+        """Initialize"""
+
+        self.size = len(handlers)
+        self.plain: DefaultDict[
+            Tuple[str, Optional[str]],
+            INDEXED_HANDLERS,
+        ] = collections.defaultdict(list)
+        self.commands: DefaultDict[
+            Tuple[str, Optional[str]],
+            DefaultDict[str, INDEXED_HANDLERS],
+        ] = collections.defaultdict(lambda: collections.defaultdict(list))
+        #: Command handlers of each key without duplicates of aliases
+        self.unique_commands: DefaultDict[
+            Tuple[str, Optional[str]],
+            INDEXED_HANDLERS,
+        ] = collections.defaultdict(list)
+        self.command_mappings: DefaultDict[
+            str,
+            INDEXED_HANDLERS,
+        ] = collections.defaultdict(list)
+        self.others: INDEXED_HANDLERS = []
+
+        for i, handler in enumerate(handlers):
+            if isinstance(handler, Handler):
+                key = (handler.type, handler.subtype)
+                if handler.is_command:
+                    for name in set(handler.names):
+                        self.commands[key][name].append((i, handler))
+                    self.unique_commands[key].append((i, handler))
+                else:
+                    self.plain[key].append((i, handler))
+            elif isinstance(handler, CommandMappingHandler):
+                for name in set(handler.names):
+                    self.command_mappings[name].append((i, handler))
+            else:
+                self.others.append((i, handler))
+
+    def subscribes(self, type_: str, subtype: Optional[str]) -> bool:
+        """Check any handler can process event of given type and subtype."""
+
+        if self.others:
+            return True
+        if type_ == Message.type and self.command_mappings:
+            return True
+        key = (type_, subtype)
+        return key in self.plain or key in self.commands
+
+    def route(self, event: Event, prefix: str) -> List[BaseHandler]:
+        """Find handlers which can process given event."""
+
+        key = (event.type, event.subtype)
+        candidates = [self.plain.get(key, []), self.others]
+        commands = self.commands.get(key)
+        if isinstance(event, Message):
+            call = parse_message(event).call
+            if call.startswith(prefix):
+                name = call[len(prefix):]
+                if commands:
+                    candidates.append(commands.get(name, []))
+                candidates.append(self.command_mappings.get(name, []))
+        else:
+            candidates.append(self.unique_commands.get(key, []))
+
+        return merge_handlers(candidates)
+
+
+def merge_handlers(
+    candidates: Iterable[INDEXED_HANDLERS],
+) -> List[BaseHandler]:
+    """Merge indexed handlers with keeping registration order."""
+
+    non_empty = [c for c in candidates if c]
+    if not non_empty:
+        return []
+    if len(non_empty) == 1:
+        return [h for _, h in non_empty[0]]
+    return [h for _, h in heapq.merge(*non_empty, key=lambda x: x[0])]
+
+
 class Box:
     """Box, collection of handlers and aliases"""
 
@@ -570,11 +828,36 @@ class Box:
         self.channels_required: Set[str] = set()
         self.handlers: List[BaseHandler] = []
         self.crontabs: List[Crontab] = []
+        self._router: Optional[Router] = None
 
     def register(self, handler: BaseHandler):
         """Register Handler manually."""
 
+        if isinstance(handler, CommandMappingHandler):
+            for unit in handler.command_map:
+                get_spec(unit.callback)
+            get_spec(handler.fallback)
+
         self.handlers.append(handler)
+        self._router = None
+
+    def get_router(self) -> Router:
+        """Get router of handlers. It is rebuilt after registration."""
+
+        router = self._router
+        if router is None or router.size != len(self.handlers):
+            router = self._router = Router(self.handlers)
+        return router
+
+    def get_handlers(self, event: Event, prefix: str) -> List[BaseHandler]:
+        """Get handlers which can process given event in registration order."""
+
+        return self.get_router().route(event, prefix)
+
+    def subscribes(self, type_: str, subtype: Optional[str] = None) -> bool:
+        """Check any handler can process event of given type and subtype."""
+
+        return self.get_router().subscribes(type_, subtype)
 
     def assert_config_required(self, key: str, type):
         """Mark required configuration key and type."""
@@ -628,7 +911,7 @@ class Box:
 
             @functools.wraps(func)
             def internal(func_):
-                self.handlers.append(Handler(
+                self.register(Handler(
                     'message',
                     subtype,
                     func_,
@@ -669,7 +952,7 @@ class Box:
 
             @functools.wraps(func)
             def internal(func_):
-                self.handlers.append(Handler(
+                self.register(Handler(
                     type_,
                     subtype,
                     func,
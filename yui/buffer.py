@@ -0,0 +1,94 @@
+""":mod:`yui.buffer` --- hand large bytes to worker processes
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Arguments of jobs of process pool are pickled and copied through a pipe.
+Large bytes such as downloaded HTML pages are written to a file in shared
+memory instead, and worker maps the file. Only path of the file goes through
+the pipe.
+
+"""
+
+import contextlib
+import mmap
+import os
+import tempfile
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Tuple
+
+__all__ = (
+    'SHARED_BUFFER_THRESHOLD',
+    'SharedBuffer',
+    'call_with_buffers',
+    'share_large_bytes',
+)
+
+#: Bytes longer than this are handed to worker through shared memory
+SHARED_BUFFER_THRESHOLD = 64 * 1024
+
+#: Directory for files of shared buffers. ``/dev/shm`` is in memory.
+SHARED_BUFFER_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
+class SharedBuffer(NamedTuple):
+    """Handle of bytes in shared memory. Only handle is pickled."""
+
+    path: str
+    size: int
+
+    @classmethod
+    def create(cls, data: bytes) -> 'SharedBuffer':
+        fd, path = tempfile.mkstemp(dir=SHARED_BUFFER_DIR, prefix='yui-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        return cls(path, len(data))
+
+    @contextlib.contextmanager
+    def open(self) -> Iterator[mmap.mmap]:
+        """Map bytes to memory. Map works like both bytes and file."""
+
+        with open(self.path, 'rb') as f, mmap.mmap(
+            f.fileno(),
+            self.size,
+            access=mmap.ACCESS_READ,
+        ) as buffer:
+            yield buffer
+
+    def unlink(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def share_large_bytes(
+    args: Tuple,
+    kwargs: Dict[str, Any],
+) -> Tuple[Tuple, Dict[str, Any], List[SharedBuffer]]:
+    """Replace large bytes in arguments with handles of shared buffer."""
+
+    buffers: List[SharedBuffer] = []
+
+    def share(value):
+        if isinstance(value, bytes) and len(value) > SHARED_BUFFER_THRESHOLD:
+            buffer = SharedBuffer.create(value)
+            buffers.append(buffer)
+            return buffer
+        return value
+
+    args = tuple(share(x) for x in args)
+    kwargs = {k: share(v) for k, v in kwargs.items()}
+    return args, kwargs, buffers
+
+
+def call_with_buffers(f: Callable, args: Tuple, kwargs: Dict[str, Any]):
+    """Call f in worker with shared buffers mapped to memory."""
+
+    with contextlib.ExitStack() as stack:
+        def open_(value):
+            if isinstance(value, SharedBuffer):
+                return stack.enter_context(value.open())
+            return value
+
+        return f(
+            *(open_(x) for x in args),
+            **{k: open_(v) for k, v in kwargs.items()},
+        )
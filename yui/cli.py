@@ -1,15 +1,19 @@
+import asyncio
 import functools
 import os.path
 import pathlib
-from typing import Optional
+from typing import Optional, Tuple
 
 from alembic import command
 from alembic.config import Config as AlembicConfig
 
 import click
 
+from .bench import run_bench
 from .bot import Bot
 from .config import ConfigurationError, load
+from .fakeslack import FakeSlack, make_workspace
+from .recorder import read_recording
 
 
 __all__ = 'error', 'load_config', 'main', 'yui'
@@ -69,6 +73,91 @@ def run(config):
         bot.run()
 
 
+@yui.command()
+@click.option('--pace', is_flag=True, default=False,
+              help='Replay frames at recorded pace.')
+@click.argument('recording', type=click.Path(exists=True))
+@load_config
+def bench(config, recording: str, pace: bool):
+    """Replay recorded RTM frames and report speed of handlers."""
+
+    try:
+        result = run_bench(config, recording, pace=pace)
+    except ConfigurationError as e:
+        error(str(e))
+    else:
+        click.echo(result.format())
+
+
+@yui.command()
+@click.option('--host', default='127.0.0.1')
+@click.option('--port', default=8000)
+@click.option('--users', default=100)
+@click.option('--channels', default=20)
+@click.option('--text', '-t', 'texts', multiple=True,
+              help='Text of synthetic messages.')
+@click.option('--rate', default=0.0,
+              help='Synthetic messages per second of each websocket.')
+@click.option('--recording', type=click.Path(exists=True),
+              help='Push recorded RTM frames instead of synthetic ones.')
+@click.option('--speed', default=1.0, help='Multiplier of recorded pace.')
+@click.option('--latency', default=0.0, help='Seconds of Web API latency.')
+@click.option('--jitter', default=0.0, help='Max random seconds of latency.')
+@click.option('--rate-limit-ratio', default=0.0,
+              help='Ratio of Web API calls answered with 429.')
+@click.option('--retry-after', default=1.0)
+@click.option('--disconnect-after', default=0.0,
+              help='Seconds until websocket is closed.')
+def fake_slack(
+    host: str,
+    port: int,
+    users: int,
+    channels: int,
+    texts: Tuple[str, ...],
+    rate: float,
+    recording: Optional[str],
+    speed: float,
+    latency: float,
+    jitter: float,
+    rate_limit_ratio: float,
+    retry_after: float,
+    disconnect_after: float,
+):
+    """Run local fake Slack for load test."""
+
+    slack = FakeSlack(
+        workspace=make_workspace(users=users, channels=channels),
+        texts=texts or ('hi',),
+        event_rate=rate,
+        frames=list(read_recording(recording)) if recording else (),
+        speed=speed,
+        latency=latency,
+        jitter=jitter,
+        rate_limit_ratio=rate_limit_ratio,
+        retry_after=retry_after,
+        disconnect_after=disconnect_after,
+    )
+    loop = asyncio.get_event_loop()
+    runner = loop.run_until_complete(slack.serve(host, port))
+    click.echo(f'Set SLACK_API_URL = {slack.api_url!r}')
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(runner.cleanup())
+    click.echo(
+        f'connections: {slack.connections}, '
+        f'events sent: {slack.events_sent}, '
+        f'messages posted: {len(slack.messages)}'
+    )
+    for method, count in sorted(slack.api_calls.items()):
+        click.echo(
+            f'api call: {method} x{count} '
+            f'({slack.rate_limited[method]} rate limited)'
+        )
+
+
 @yui.command()
 @load_config
 def init_db(config):
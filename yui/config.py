@@ -15,6 +15,23 @@ __all__ = 'Config', 'ConfigurationError', 'DEFAULT', 'error', 'load',
 DEFAULT = {
     'DEBUG': False,
     'RECEIVE_TIMEOUT': 300,  # 60 * 5 seconds
+    'DISPATCH_WORKERS': 8,
+    'LAZY_EVENTS': False,
+    'HTTP_POOL_LIMIT': 100,
+    'HTTP_KEEPALIVE_TIMEOUT': 30,
+    'BOOTSTRAP_CONCURRENCY': 8,
+    'DIRECTORY_SNAPSHOT_PATH': '',
+    'RTM_METHOD': 'rtm.start',
+    'SLACK_API_URL': 'https://slack.com/api/',
+    'API_TIER_RATES': {},
+    'SANDBOX_WORKERS': 1,
+    'SANDBOX_SPARES': 1,
+    'SANDBOX_CPU_LIMIT': 2,
+    'SANDBOX_MEMORY_LIMIT': 256 * 1024 * 1024,
+    'METRICS_HOST': '127.0.0.1',
+    'METRICS_PORT': 0,
+    'STALL_THRESHOLD': 0.5,
+    'RTM_RECORD_PATH': '',
     'REGISTER_CRONTAB': True,
     'PREFIX': '',
     'APPS': (),
@@ -68,6 +85,23 @@ class Config(Namespace):
 
     TOKEN: str
     RECEIVE_TIMEOUT: int
+    DISPATCH_WORKERS: int
+    LAZY_EVENTS: bool
+    HTTP_POOL_LIMIT: int
+    HTTP_KEEPALIVE_TIMEOUT: float
+    BOOTSTRAP_CONCURRENCY: int
+    DIRECTORY_SNAPSHOT_PATH: str
+    RTM_METHOD: str
+    SLACK_API_URL: str
+    API_TIER_RATES: Dict[str, int]
+    SANDBOX_WORKERS: int
+    SANDBOX_SPARES: int
+    SANDBOX_CPU_LIMIT: float
+    SANDBOX_MEMORY_LIMIT: int
+    METRICS_HOST: str
+    METRICS_PORT: int
+    STALL_THRESHOLD: float
+    RTM_RECORD_PATH: str
     DEBUG: bool
     PREFIX: str
     APPS: List[str]
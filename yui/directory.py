@@ -0,0 +1,472 @@
+""":mod:`yui.directory` --- indexed channels and users of workspace
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Channels and users which bot knows, with hash indexes for looking them up
+by ID, name and so on.
+
+Containers are plain :class:`list` and :class:`dict` so code which reads or
+mutates ``bot.channels`` or ``bot.users`` directly keeps working.
+Appending keeps indexes up to date. Any other mutation marks them dirty and
+they are rebuilt on next lookup.
+
+Directory can be saved to a gzipped JSON snapshot on local disk, so bot can
+answer commands right after restart and resync in background.
+
+"""
+
+import functools
+import gzip
+import os
+import tempfile
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Type,
+    Union,
+)
+
+import ujson
+
+from .type import (
+    DirectMessageChannel,
+    Namespace,
+    PrivateChannel,
+    PublicChannel,
+    User,
+    plain,
+)
+
+__all__ = (
+    'Directory',
+    'IndexedDict',
+    'IndexedList',
+    'dump_items',
+    'load_items',
+    'read_snapshot',
+    'write_snapshot',
+)
+
+INDEX = Dict[str, Dict[Any, Any]]
+
+#: Kinds of containers in directory
+KINDS = ('channels', 'groups', 'ims', 'users')
+
+#: Type of items of each kind
+ITEM_TYPES: Dict[str, Type[Namespace]] = {
+    'channels': PublicChannel,
+    'groups': PrivateChannel,
+    'ims': DirectMessageChannel,
+    'users': User,
+}
+
+SNAPSHOT_VERSION = 1
+
+CHANNEL_FIELDS = ('id', 'name', 'name_normalized')
+DM_FIELDS = ('id', 'user')
+USER_FIELDS = ('name',)
+
+#: Indexed fields of items of each kind
+INDEXED_FIELDS: Dict[str, Sequence[str]] = {
+    'channels': CHANNEL_FIELDS,
+    'groups': CHANNEL_FIELDS,
+    'ims': DM_FIELDS,
+    'users': USER_FIELDS,
+}
+
+# indexes are rebuilt often, so indexed fields must not be in side store
+assert all(
+    set(fields) <= getattr(ITEM_TYPES[kind], '__hot_fields__', set(fields))
+    for kind, fields in INDEXED_FIELDS.items()
+), 'indexed fields must be hot fields'
+
+
+def write_snapshot(path: str, data: Dict[str, Any]) -> None:
+    """Write snapshot atomically."""
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.directory-')
+    try:
+        with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(
+            fileobj=raw,
+            mode='wb',
+        ) as f:
+            f.write(ujson.dumps(data).encode())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def read_snapshot(path: str) -> Dict[str, Any]:
+    """Read snapshot. Raise ValueError if it is broken or outdated."""
+
+    try:
+        with gzip.open(path, 'rb') as f:
+            data = ujson.loads(f.read())
+    except FileNotFoundError:
+        raise
+    except (EOFError, OSError) as e:
+        raise ValueError(f'broken snapshot: {e}')
+    if not isinstance(data, dict) or \
+            data.get('version') != SNAPSHOT_VERSION:
+        raise ValueError('unknown version of snapshot')
+    return data
+
+
+def dump_items(items: Dict[str, List]) -> Dict[str, Any]:
+    """Dump items of each kind to plain data for snapshot."""
+
+    data: Dict[str, Any] = {'version': SNAPSHOT_VERSION}
+    for kind in KINDS:
+        data[kind] = plain(items[kind])
+    return data
+
+
+def load_items(data: Dict[str, Any]) -> Dict[str, List]:
+    """Make items of each kind from snapshot."""
+
+    return {
+        kind: [item_type(**x) for x in data.get(kind, [])]
+        for kind, item_type in ITEM_TYPES.items()
+    }
+
+
+def make_indexes(fields: Sequence[str]) -> INDEX:
+    return {field: {} for field in fields}
+
+
+def index_item(indexes: INDEX, item) -> None:
+    for field, index in indexes.items():
+        key = getattr(item, field, None)
+        if key is not None:
+            index.setdefault(key, item)  # first one wins like linear scan
+
+
+def dirty_method(base: type, name: str):
+    """Wrap method of base which marks indexes dirty."""
+
+    method = getattr(base, name)
+
+    @functools.wraps(method)
+    def mutate(self, *args, **kwargs):
+        self.dirty = True
+        return method(self, *args, **kwargs)
+
+    return mutate
+
+
+class IndexedList(list):
+    """List which keeps indexes of its items by given fields."""
+
+    dirty = True
+
+    def __init__(self, iterable: Iterable = (), *, fields=()) -> None:
+        """Initialize"""
+
+        super(IndexedList, self).__init__(iterable)
+        self.indexes = make_indexes(fields)
+        self.dirty = True
+
+    def invalidate(self) -> None:
+        """Rebuild indexes on next lookup.
+
+        Call it after you change fields of items in place.
+
+        """
+
+        self.dirty = True
+
+    def rebuild(self) -> None:
+        for index in self.indexes.values():
+            index.clear()
+        for item in self:
+            index_item(self.indexes, item)
+        self.dirty = False
+
+    def find(self, field: str, key, default=None):
+        """Find first item whose field equals to key."""
+
+        if self.dirty:
+            self.rebuild()
+        return self.indexes[field].get(key, default)
+
+    def append(self, item) -> None:
+        super(IndexedList, self).append(item)
+        if not self.dirty:
+            index_item(self.indexes, item)
+
+    def extend(self, items: Iterable) -> None:
+        for item in items:
+            self.append(item)
+
+    def __iadd__(self, items):  # type: ignore
+        self.extend(items)
+        return self
+
+    insert = dirty_method(list, 'insert')
+    remove = dirty_method(list, 'remove')
+    pop = dirty_method(list, 'pop')
+    clear = dirty_method(list, 'clear')
+    sort = dirty_method(list, 'sort')
+    reverse = dirty_method(list, 'reverse')
+    __setitem__ = dirty_method(list, '__setitem__')
+    __delitem__ = dirty_method(list, '__delitem__')
+    __imul__ = dirty_method(list, '__imul__')
+
+
+class IndexedDict(dict):
+    """Dict which keeps indexes of its values by given fields."""
+
+    dirty = True
+
+    def __init__(self, *args, fields=(), **kwargs) -> None:
+        """Initialize"""
+
+        super(IndexedDict, self).__init__(*args, **kwargs)
+        self.indexes = make_indexes(fields)
+        self.dirty = True
+
+    def invalidate(self) -> None:
+        """Rebuild indexes on next lookup.
+
+        Call it after you change fields of values in place.
+
+        """
+
+        self.dirty = True
+
+    def rebuild(self) -> None:
+        for index in self.indexes.values():
+            index.clear()
+        for value in self.values():
+            index_item(self.indexes, value)
+        self.dirty = False
+
+    def find(self, field: str, key, default=None):
+        """Find first value whose field equals to key."""
+
+        if self.dirty:
+            self.rebuild()
+        return self.indexes[field].get(key, default)
+
+    def __setitem__(self, key, value) -> None:
+        if key in self:
+            self.dirty = True
+        super(IndexedDict, self).__setitem__(key, value)
+        if not self.dirty:
+            index_item(self.indexes, value)
+
+    clear = dirty_method(dict, 'clear')
+    pop = dirty_method(dict, 'pop')
+    popitem = dirty_method(dict, 'popitem')
+    setdefault = dirty_method(dict, 'setdefault')
+    update = dirty_method(dict, 'update')
+    __delitem__ = dirty_method(dict, '__delitem__')
+
+
+class Directory:
+    """Channels and users of workspace."""
+
+    def __init__(self) -> None:
+        """Initialize"""
+
+        self.channels = IndexedList(fields=INDEXED_FIELDS['channels'])
+        self.ims = IndexedList(fields=INDEXED_FIELDS['ims'])
+        self.groups = IndexedList(fields=INDEXED_FIELDS['groups'])
+        self.users = IndexedDict(fields=INDEXED_FIELDS['users'])
+        #: Kinds of containers to resync with Slack
+        self.stale: Set[str] = set()
+        #: Kinds of containers loaded completely at least once
+        self.loaded: Set[str] = set()
+        #: Count of items loaded by running sync of each kind
+        self.progress: Dict[str, int] = {}
+        #: Increased when directory is changed
+        self.version = 0
+        #: Whether :meth:`seed` loaded whole state from RTM payload
+        self.seeded = False
+        #: Version written to snapshot last time
+        self.saved_version = 0
+
+    def is_ready(self) -> bool:
+        """Check every kind of containers was loaded."""
+
+        return self.loaded.issuperset(KINDS)
+
+    def publish(self, kind: str, item) -> None:
+        """Add item which arrived while loading container."""
+
+        if kind == 'users':
+            self.users[item.id] = item
+        else:
+            getattr(self, kind).append(item)
+        self.version += 1
+
+    def replace(self, kind: str, items: List) -> None:
+        """Replace container with completely loaded items."""
+
+        if kind == 'users':
+            self.users.clear()
+            self.users.update((item.id, item) for item in items)
+        else:
+            getattr(self, kind)[:] = items
+        self.progress[kind] = len(items)
+        self.loaded.add(kind)
+        self.version += 1
+
+    def seed(self, payload: Dict[str, Any]) -> bool:
+        """Load containers from payload of ``rtm.start``.
+
+        Return True if payload had every kind of containers.
+        Payload of ``rtm.connect`` has nothing to load.
+
+        """
+
+        kinds = [
+            kind for kind in ITEM_TYPES
+            if isinstance(payload.get(kind), list)
+        ]
+        if not kinds:
+            return False
+        for kind in kinds:
+            self.replace(
+                kind,
+                [ITEM_TYPES[kind](**x) for x in payload[kind]],
+            )
+            self.stale.discard(kind)
+        self.seeded = len(kinds) == len(ITEM_TYPES)
+        return self.seeded
+
+    def copy_items(self) -> Dict[str, List]:
+        """Copy items of each kind.
+
+        Copies are cheap and can be dumped in other thread while containers
+        keep changing.
+
+        """
+
+        return {
+            'channels': list(self.channels),
+            'groups': list(self.groups),
+            'ims': list(self.ims),
+            'users': list(self.users.values()),
+        }
+
+    def restore(self, items: Dict[str, List]) -> None:
+        """Replace containers with items made by :func:`load_items`."""
+
+        for kind in ITEM_TYPES:
+            self.replace(kind, items[kind])
+        self.saved_version = self.version
+
+    def dump(self) -> Dict[str, Any]:
+        """Dump containers to plain data for snapshot."""
+
+        return dump_items(self.copy_items())
+
+    def load(self, data: Dict[str, Any]) -> None:
+        """Load containers from snapshot."""
+
+        self.restore(load_items(data))
+
+    def get_container(self, id: str) -> Optional[IndexedList]:
+        """Get container which channel of given ID belongs to."""
+
+        if id.startswith('C'):
+            return self.channels
+        elif id.startswith('D'):
+            return self.ims
+        elif id.startswith('G'):
+            return self.groups
+        return None
+
+    def get_channel(self, id: str) -> Optional[Union[
+        DirectMessageChannel,
+        PrivateChannel,
+        PublicChannel,
+    ]]:
+        """Get channel by ID."""
+
+        container = self.get_container(id)
+        if container is None:
+            return None
+        return container.find('id', id)
+
+    def upsert(self, channel) -> None:
+        """Add channel or replace one which has same ID."""
+
+        container = self.get_container(channel.id)
+        if container is None:
+            raise ValueError(f'Unknown type of channel: {channel.id}')
+        old = container.find('id', channel.id)
+        if old is None:
+            container.append(channel)
+        else:
+            container[container.index(old)] = channel
+        self.version += 1
+
+    def update(self, id: str, **fields) -> bool:
+        """Change fields of channel in place.
+
+        Return False if there is no such channel.
+
+        """
+
+        container = self.get_container(id)
+        if container is None:
+            return False
+        channel = container.find('id', id)
+        if channel is None:
+            return False
+        indexed = False
+        for key, value in fields.items():
+            if key in container.indexes and \
+                    getattr(channel, key, None) != value:
+                indexed = True
+            setattr(channel, key, value)
+        if indexed:
+            container.invalidate()
+        self.version += 1
+        return True
+
+    def discard(self, id: str) -> None:
+        """Remove channel of given ID if exists."""
+
+        container = self.get_container(id)
+        if container is not None:
+            channel = container.find('id', id)
+            if channel is not None:
+                container.remove(channel)
+                self.version += 1
+
+    def get_channel_by_name(self, name: str) -> Optional[Union[
+        PrivateChannel,
+        PublicChannel,
+    ]]:
+        """Get public or private channel by its name."""
+
+        for field in ('name', 'name_normalized'):
+            for channels in (self.channels, self.groups):
+                channel = channels.find(field, name)
+                if channel is not None:
+                    return channel
+        return None
+
+    def get_dm(self, user: str) -> Optional[DirectMessageChannel]:
+        """Get direct message channel with given user ID."""
+
+        return self.ims.find('user', user)
+
+    def get_user(self, id: str) -> Optional[User]:
+        """Get user by ID."""
+
+        return self.users.get(id)
+
+    def get_user_by_name(self, name: str) -> Optional[User]:
+        """Get user by name."""
+
+        return self.users.find('name', name)
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Type, Union
 
 from .type import (
     Bot,
@@ -20,6 +20,7 @@ from .type import (
     TeamID,
     Ts,
     User,
+    cast,
 )
 
 __all__ = (
@@ -38,6 +39,7 @@ __all__ = (
     'ChatterboxSystemStart',
     'DnDUpdated',
     'DnDUpdatedUser',
+    'EVENT_TYPES',
     'EmailDomainChanged',
     'EmojiChanged',
     'Event',
@@ -99,12 +101,73 @@ __all__ = (
 )
 
 
+#: Mapping of event type to event class. It is filled when class is defined.
+EVENT_TYPES: Dict[str, Type['Event']] = {}
+
+
 class Event(Namespace):
-    """Event from RTM."""
+    """Event from RTM.
+
+    Attributes start with underscore are private cache of handlers.
+    They are not shown in repr and not compared.
+
+    """
 
     type: str
     subtype: Optional[str] = None
 
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)  # type: ignore
+        if Event in cls.__bases__:
+            EVENT_TYPES[cls.type] = cls
+
+    @classmethod
+    def lazy(cls, d: Dict[str, Any]) -> 'Event':
+        """Make event which cast each field when it is read first time."""
+
+        event = cls.__new__(cls)
+        event.__dict__['type'] = d['type']
+        if 'subtype' in d:
+            event.__dict__['subtype'] = d['subtype']
+        event.__dict__['_raw'] = d
+        return event
+
+    def __getattr__(self, name: str):
+        raw = self.__dict__.get('_raw')
+        if raw is None or name[0] == '_' or name not in raw:
+            raise AttributeError(name)
+        value = raw[name]
+        t = getattr(self, '__annotations__', {}).get(name)
+        if t:
+            value = cast(t, value)
+        self.__dict__[name] = value
+        return value
+
+    def _materialize(self):
+        raw = self.__dict__.get('_raw')
+        if raw is not None:
+            for key in raw:
+                getattr(self, key)
+            del self.__dict__['_raw']
+
+    def _public_dict(self) -> Dict[str, Any]:
+        return {k: v for k, v in self.__dict__.items() if k[0] != '_'}
+
+    def __repr__(self) -> str:
+        items = dict(self.__dict__.get('_raw', {}))
+        items.update(self._public_dict())
+        return '{}({})'.format(
+            self.__class__.__name__,
+            ', '.join(f'{k}={v!r}' for k, v in items.items()),
+        )
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Event):
+            return NotImplemented
+        self._materialize()
+        other._materialize()
+        return self._public_dict() == other._public_dict()
+
 
 class AccountsChanged(Event):
     """The list of accounts a user is signed into has changed."""
@@ -678,9 +741,14 @@ class ChatterboxSystemStart(Event):
     type: str = 'chatterbox_system_start'
 
 
-def create_event(d: Dict) -> Event:
-    """Create Event"""
+def create_event(d: Dict, *, lazy: bool = False) -> Event:
+    """Create Event
+
+    If lazy is true, fields of event are cast when they are read first time.
+
+    """
 
-    return {
-        cls.type: cls for cls in Event.__subclasses__()
-    }.get(d['type'], Event)(**d)
+    cls = EVENT_TYPES.get(d['type'], Event)
+    if lazy:
+        return cls.lazy(d)
+    return cls(**d)
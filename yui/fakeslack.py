@@ -0,0 +1,321 @@
+""":mod:`yui.fakeslack` --- local stand-in of Slack for load test
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:class:`FakeSlack` serves Web API methods which Yui uses and RTM websocket
+over HTTP on local address. It pushes synthetic or recorded events at
+configured rate, and can inject latency, rate limit and disconnection.
+Set ``SLACK_API_URL`` of bot to :attr:`FakeSlack.api_url` to run real
+:class:`~yui.bot.Bot` against it without network. Bot still schedules calls
+by rate limit tiers of Slack, so reconnection takes a minute unless
+``API_TIER_RATES`` of bot raises them.
+
+"""
+
+import asyncio
+import collections
+import itertools
+import logging
+import random
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Counter,
+    Dict,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+)
+
+from aiohttp import WSMsgType, web
+
+import async_timeout
+
+__all__ = 'FakeSlack', 'make_workspace'
+
+METHOD = Callable[[Dict[str, str]], Awaitable[Dict[str, Any]]]
+
+
+def make_workspace(
+    *,
+    users: int = 100,
+    channels: int = 20,
+    groups: int = 5,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Make lists of users and channels in shape of ``rtm.start``."""
+
+    user_ids = [f'U{i:08d}' for i in range(1, users + 1)]
+    return {
+        'users': [
+            {
+                'id': id,
+                'name': f'user{i}',
+                'real_name': f'User {i}',
+                'deleted': False,
+                'is_bot': False,
+            } for i, id in enumerate(user_ids, 1)
+        ],
+        'channels': [
+            {
+                'id': f'C{i:08d}',
+                'name': 'general' if i == 1 else f'channel{i}',
+                'name_normalized': 'general' if i == 1 else f'channel{i}',
+                'is_archived': False,
+                'is_general': i == 1,
+                'is_member': True,
+                'members': user_ids,
+            } for i in range(1, channels + 1)
+        ],
+        'groups': [
+            {
+                'id': f'G{i:08d}',
+                'name': f'group{i}',
+                'is_archived': False,
+            } for i in range(1, groups + 1)
+        ],
+        'ims': [
+            {
+                'id': f'D{i:08d}',
+                'user': id,
+            } for i, id in enumerate(user_ids, 1)
+        ],
+    }
+
+
+class FakeSlack:
+    """Fake Slack server for load test of bot."""
+
+    def __init__(
+        self,
+        *,
+        workspace: Dict[str, List[Dict[str, Any]]] = None,
+        texts: Sequence[str] = ('hi',),
+        event_rate: float = 0,
+        frames: Sequence[Tuple[float, Dict[str, Any]]] = (),
+        speed: float = 1.0,
+        latency: float = 0,
+        jitter: float = 0,
+        rate_limit_ratio: float = 0,
+        retry_after: float = 1,
+        disconnect_after: float = 0,
+        seed: int = None,
+    ) -> None:
+        """Initialize
+
+        :param event_rate: synthetic messages per second of each websocket
+        :param frames: recorded frames to push instead of synthetic ones
+        :param speed: multiplier of pace of recorded frames
+        :param latency: seconds to wait before answering Web API call
+        :param jitter: max random seconds to add to latency
+        :param rate_limit_ratio: ratio of Web API calls answered with 429
+        :param disconnect_after: seconds until websocket is closed
+
+        """
+
+        self.workspace = workspace or make_workspace()
+        self.texts = texts
+        self.event_rate = event_rate
+        self.frames = frames
+        self.speed = speed
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after = retry_after
+        self.disconnect_after = disconnect_after
+        self.random = random.Random(seed)
+        self.logger = logging.getLogger(f'{__name__}.FakeSlack')
+        self.url = ''
+        self.api_calls: Counter[str] = collections.Counter()
+        self.rate_limited: Counter[str] = collections.Counter()
+        self.connections = 0
+        self.events_sent = 0
+        self.messages: List[Dict[str, Any]] = []
+        self.websockets: List[web.WebSocketResponse] = []
+        self.clock = itertools.count(1)
+        self.methods: Dict[str, METHOD] = {
+            'rtm.start': self.rtm_start,
+            'rtm.connect': self.rtm_connect,
+            'chat.postMessage': self.chat_post_message,
+            'chat.delete': self.chat_delete,
+            'channels.history': self.channels_history,
+            'channels.info': self.make_info('channels', 'channel'),
+            'channels.list': self.make_list('channels', 'channels'),
+            'groups.info': self.make_info('groups', 'group'),
+            'groups.list': self.make_list('groups', 'groups'),
+            'im.list': self.make_list('ims', 'ims'),
+            'users.info': self.make_info('users', 'user'),
+            'users.list': self.make_list('users', 'members'),
+        }
+
+    @property
+    def api_url(self) -> str:
+        return f'{self.url}/api/'
+
+    def make_ts(self) -> str:
+        return f'{time.time():.0f}.{next(self.clock) % 1000000:06d}'
+
+    async def rtm_start(self, data: Dict[str, str]) -> Dict[str, Any]:
+        result = await self.rtm_connect(data)
+        result.update(self.workspace)
+        return result
+
+    async def rtm_connect(self, data: Dict[str, str]) -> Dict[str, Any]:
+        return {
+            'ok': True,
+            'url': f'{self.url.replace("http", "ws", 1)}/rtm',
+            'self': {'id': 'U00000000', 'name': 'yui'},
+            'team': {'id': 'T00000000', 'name': 'fake'},
+        }
+
+    async def chat_post_message(
+        self,
+        data: Dict[str, str],
+    ) -> Dict[str, Any]:
+        message = dict(data)
+        message.pop('token', None)
+        message['ts'] = self.make_ts()
+        self.messages.append(message)
+        return {
+            'ok': True,
+            'channel': data.get('channel'),
+            'ts': message['ts'],
+            'message': message,
+        }
+
+    async def chat_delete(self, data: Dict[str, str]) -> Dict[str, Any]:
+        return {
+            'ok': True,
+            'channel': data.get('channel'),
+            'ts': data.get('ts'),
+        }
+
+    async def channels_history(
+        self,
+        data: Dict[str, str],
+    ) -> Dict[str, Any]:
+        return {'ok': True, 'messages': [], 'has_more': False}
+
+    def make_info(self, kind: str, key: str) -> METHOD:
+        async def info(data: Dict[str, str]) -> Dict[str, Any]:
+            id = data.get(key) or data.get('channel')
+            for item in self.workspace[kind]:
+                if item['id'] == id:
+                    return {'ok': True, key: item}
+            return {'ok': False, 'error': f'{key}_not_found'}
+        return info
+
+    def make_list(self, kind: str, key: str) -> METHOD:
+        async def list_(data: Dict[str, str]) -> Dict[str, Any]:
+            items = self.workspace[kind]
+            start = int(data.get('cursor') or 0)
+            limit = int(data.get('limit') or 0) or len(items)
+            end = start + limit
+            return {
+                'ok': True,
+                key: items[start:end],
+                'response_metadata': {
+                    'next_cursor': str(end) if end < len(items) else '',
+                },
+            }
+        return list_
+
+    async def handle_api(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        self.api_calls[method] += 1
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.random.random() < self.rate_limit_ratio:
+            self.rate_limited[method] += 1
+            return web.json_response(
+                {'ok': False, 'error': 'ratelimited'},
+                status=429,
+                headers={'Retry-After': str(self.retry_after)},
+            )
+        func = self.methods.get(method)
+        if func is None:
+            return web.json_response({'ok': False, 'error': 'unknown_method'})
+        form = await request.post()
+        data = {k: str(v) for k, v in form.items()}
+        return web.json_response(await func(data))
+
+    def synthetic_events(self) -> Iterator[Tuple[float, Dict[str, Any]]]:
+        """Yield messages to random channels at :attr:`event_rate`."""
+
+        interval = 1 / self.event_rate
+        for i in itertools.count():
+            channel = self.random.choice(self.workspace['channels'])
+            user = self.random.choice(self.workspace['users'])
+            yield i * interval, {
+                'type': 'message',
+                'channel': channel['id'],
+                'user': user['id'],
+                'text': self.random.choice(self.texts),
+                'ts': self.make_ts(),
+            }
+
+    def events(self) -> Iterator[Tuple[float, Dict[str, Any]]]:
+        if self.frames:
+            return ((t / self.speed, frame) for t, frame in self.frames)
+        if self.event_rate > 0:
+            return self.synthetic_events()
+        return iter(())
+
+    async def push(self, ws: web.WebSocketResponse) -> None:
+        started_at = time.monotonic()
+        for offset, frame in self.events():
+            delay = started_at + offset - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if ws.closed:
+                break
+            await ws.send_json(frame)
+            self.events_sent += 1
+
+    async def handle_rtm(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        self.websockets.append(ws)
+        await ws.send_json({'type': 'hello'})
+        pusher = asyncio.ensure_future(self.push(ws))
+        try:
+            async with async_timeout.timeout(self.disconnect_after or None):
+                async for msg in ws:
+                    if msg.type == WSMsgType.ERROR:
+                        break
+        except asyncio.TimeoutError:
+            self.logger.info('disconnect websocket')
+        finally:
+            pusher.cancel()
+            self.websockets.remove(ws)
+            await ws.close()
+        return ws
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/api/{method}', self.handle_api)
+        app.router.add_get('/rtm', self.handle_rtm)
+        return app
+
+    async def serve(self, host: str, port: int) -> web.AppRunner:
+        """Serve at given address.
+
+        Call :meth:`aiohttp.web.AppRunner.cleanup` of returned runner to
+        stop it.
+
+        """
+
+        self.url = f'http://{host}:{port}'
+        runner = web.AppRunner(self.make_app())
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+    async def disconnect(self) -> None:
+        """Close every websocket to make bots reconnect."""
+
+        for ws in list(self.websockets):
+            await ws.close()
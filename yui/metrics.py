@@ -0,0 +1,177 @@
+""":mod:`yui.metrics` --- runtime metrics of bot
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Counters, gauges and summaries for watching what bot is doing.
+They can be served over HTTP in text format of Prometheus.
+
+"""
+
+import bisect
+import collections
+from typing import Callable, Counter, DefaultDict, Dict, List, Tuple
+
+from aiohttp import web
+
+__all__ = 'BUCKETS', 'Metrics', 'Summary'
+
+LABELS = Tuple[Tuple[str, str], ...]
+
+#: Upper bounds of histogram buckets of summaries, in seconds
+BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+#: Prefix of names of metrics served over HTTP
+PREFIX = 'yui_'
+
+
+def make_labels(labels) -> LABELS:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def format_labels(labels: LABELS) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(
+            k,
+            v.replace('\\', '\\\\').replace('"', '\\"').replace(
+                '\n',
+                '\\n',
+            ),
+        ) for k, v in labels
+    ) + '}'
+
+
+class Summary:
+    """Count, sum, max and histogram of observed values."""
+
+    __slots__ = 'count', 'sum', 'max', 'buckets'
+
+    def __init__(self) -> None:
+        """Initialize"""
+
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # last one is +Inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.buckets[bisect.bisect_left(BUCKETS, value)] += 1
+
+
+class Metrics:
+    """Collection of runtime metrics."""
+
+    def __init__(self) -> None:
+        """Initialize"""
+
+        self.counters: DefaultDict[str, Counter[LABELS]] = \
+            collections.defaultdict(collections.Counter)
+        self.gauges: DefaultDict[str, Dict[LABELS, float]] = \
+            collections.defaultdict(dict)
+        self.summaries: DefaultDict[str, Dict[LABELS, Summary]] = \
+            collections.defaultdict(dict)
+        self.collectors: List[Callable[[], None]] = []
+
+    def inc(self, name: str, value: int = 1, **labels) -> None:
+        """Increase counter."""
+
+        self.counters[name][make_labels(labels)] += value
+
+    def get(self, name: str, **labels) -> int:
+        """Get value of counter."""
+
+        return self.counters[name][make_labels(labels)]
+
+    def set(self, name: str, value: float, **labels) -> None:
+        """Set value of gauge."""
+
+        self.gauges[name][make_labels(labels)] = value
+
+    def get_gauge(self, name: str, **labels) -> float:
+        """Get value of gauge."""
+
+        return self.gauges[name].get(make_labels(labels), 0)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Add value to summary."""
+
+        key = make_labels(labels)
+        summaries = self.summaries[name]
+        if key not in summaries:
+            summaries[key] = Summary()
+        summaries[key].add(value)
+
+    def get_summary(self, name: str, **labels) -> Summary:
+        """Get summary of observed values."""
+
+        return self.summaries[name].get(make_labels(labels), Summary())
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Add function which updates gauges right before rendering."""
+
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """Render metrics in text format of Prometheus."""
+
+        for collector in self.collectors:
+            collector()
+
+        lines: List[str] = []
+        for name, counter in sorted(self.counters.items()):
+            metric = f'{PREFIX}{name}_total'
+            lines.append(f'# TYPE {metric} counter')
+            for labels, count in sorted(counter.items()):
+                lines.append(f'{metric}{format_labels(labels)} {count}')
+        for name, gauge in sorted(self.gauges.items()):
+            metric = f'{PREFIX}{name}'
+            lines.append(f'# TYPE {metric} gauge')
+            for labels, value in sorted(gauge.items()):
+                lines.append(f'{metric}{format_labels(labels)} {value}')
+        for name, summaries in sorted(self.summaries.items()):
+            metric = f'{PREFIX}{name}'
+            lines.append(f'# TYPE {metric} histogram')
+            for labels, summary in sorted(summaries.items()):
+                total = 0
+                for bound, count in zip(
+                    [str(x) for x in BUCKETS] + ['+Inf'],
+                    summary.buckets,
+                ):
+                    total += count
+                    bucket_labels = format_labels(labels + (('le', bound),))
+                    lines.append(f'{metric}_bucket{bucket_labels} {total}')
+                lines.append(
+                    f'{metric}_sum{format_labels(labels)} {summary.sum}',
+                )
+                lines.append(
+                    f'{metric}_count{format_labels(labels)} {summary.count}',
+                )
+        return '\n'.join(lines) + '\n'
+
+    async def serve(self, host: str, port: int) -> web.AppRunner:
+        """Serve metrics at ``/metrics`` of given address.
+
+        Call :meth:`aiohttp.web.AppRunner.cleanup` of returned runner to
+        stop it.
+
+        """
+
+        async def handle(request: web.Request) -> web.Response:
+            return web.Response(
+                text=self.render(),
+                headers={
+                    'Content-Type': 'text/plain; version=0.0.4; charset=utf-8',
+                },
+            )
+
+        app = web.Application()
+        app.router.add_get('/metrics', handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
@@ -1,24 +1,49 @@
+import asyncio
 import contextlib
-from typing import Iterator, NamedTuple, Optional, Type
+import logging
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Type,
+    TypeVar,
+)
 
 from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session
-from sqlalchemy.pool import NullPool, Pool
+from sqlalchemy.pool import Pool, QueuePool
 
 from yui.config import Config
+from yui.metrics import Metrics
 
 __all__ = (
+    'AsyncDB',
     'Base',
     'EngineConfig',
     'get_database_engine',
+    'get_pool_size',
+    'get_worker_engine',
+    'init_worker',
     'make_session',
     'subprocess_session_manager',
 )
 
 Base = declarative_base()
 
+R = TypeVar('R')
+
+#: Count of threads for engines whose pool is not bounded
+DEFAULT_POOL_SIZE = 5
+
+logger = logging.getLogger(__name__)
+
 
 class EngineConfig(NamedTuple):
 
@@ -26,25 +51,58 @@ class EngineConfig(NamedTuple):
     echo: bool
 
 
+#: Engines of worker process which are kept across jobs
+WORKER_ENGINES: Dict[EngineConfig, Engine] = {}
+
+
 def make_session(*args, **kwargs) -> Session:  # noqa
     kwargs['autocommit'] = True
     return Session(*args, **kwargs)
 
 
+def get_worker_engine(engine_config: EngineConfig) -> Engine:
+    """Get engine of this process which is kept across jobs."""
+
+    try:
+        return WORKER_ENGINES[engine_config]
+    except KeyError:
+        engine = WORKER_ENGINES[engine_config] = _get_database_engine(
+            engine_config.url,
+            engine_config.echo,
+            QueuePool,
+            pool_size=1,  # worker runs one job at once
+        )
+        return engine
+
+
+def init_worker(*engine_configs: EngineConfig) -> None:
+    """Initialize worker process of process pool.
+
+    It makes engines and connects to database before first job comes.
+
+    """
+
+    # Engines inherited by fork share sockets with parent process
+    WORKER_ENGINES.clear()
+    for engine_config in engine_configs:
+        try:
+            get_worker_engine(engine_config).connect().close()
+        except Exception:
+            logger.exception('failed to connect to DB. retry at first job')
+
+
 @contextlib.contextmanager
 def subprocess_session_manager(
     engine_config: EngineConfig,
     *args,
     **kwargs,
 ) -> Iterator[Session]:
-    engine = _get_database_engine(
-        engine_config.url,
-        engine_config.echo,
-        NullPool,
-    )
+    engine = get_worker_engine(engine_config)
     session = make_session(bind=engine, *args, **kwargs)
-    yield session
-    engine.dispose()
+    try:
+        yield session
+    finally:
+        session.close()
 
 
 def get_database_engine(
@@ -65,10 +123,86 @@ def _get_database_engine(
     url: str,
     echo: bool,
     poolclass: Optional[Type[Pool]] = None,
+    **kwargs,
 ) -> Engine:
     return create_engine(
         url,
         echo=echo,
         poolclass=poolclass,
         pool_pre_ping=True,
+        **kwargs,
     )
+
+
+def get_pool_size(engine: Engine) -> int:
+    """Count of connections which pool of engine hands out at once."""
+
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        return pool.size() + max(pool._max_overflow, 0)
+    return DEFAULT_POOL_SIZE
+
+
+class AsyncDB:
+    """Run queries in thread pool so they do not block event loop.
+
+    Pool has as many threads as connections of engine, so queries wait in
+    the pool instead of holding threads while waiting for connection.
+
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        *,
+        executor: Executor = None,
+        metrics: Metrics = None,
+    ) -> None:
+        """Initialize"""
+
+        self.engine = engine
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=get_pool_size(engine),
+            thread_name_prefix='yui-db',
+        )
+        self.metrics = metrics or Metrics()
+
+    async def run(self, func: Callable[..., R], *args, **kwargs) -> R:
+        """Call func with new session in thread pool.
+
+        Session is given as first argument and closed after func returns.
+
+        .. code-block:: python
+
+           memos = await db.run(
+               lambda sess: sess.query(Memo).filter_by(keyword=keyword).all()
+           )
+
+        """
+
+        elapsed: Any = None
+
+        def work():
+            nonlocal elapsed
+            start = time.monotonic()
+            sess = make_session(bind=self.engine)
+            try:
+                return func(sess, *args, **kwargs)
+            finally:
+                sess.close()
+                elapsed = time.monotonic() - start
+
+        loop = asyncio.get_event_loop()
+        name = getattr(func, '__qualname__', func.__class__.__name__)
+        start = loop.time()
+        self.metrics.inc('db_sessions', source='async')
+        try:
+            return await loop.run_in_executor(self.executor, work)
+        finally:
+            if elapsed is not None:
+                self.metrics.observe('db_query_seconds', elapsed, query=name)
+                self.metrics.observe(
+                    'db_wait_seconds',
+                    loop.time() - start - elapsed,
+                    query=name,
+                )
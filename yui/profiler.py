@@ -0,0 +1,184 @@
+""":mod:`yui.profiler` --- find what blocks event loop
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Every handler of bot shares one event loop, so a callback which does sync
+I/O or parses a large document blocks all of them. :class:`StallWatchdog`
+measures lag of the loop and logs stack of the loop thread while it is
+blocked. :func:`sample` is a sampling profiler which runs in another thread
+and reads stack of the loop thread periodically, so it can run in production
+without restart.
+
+"""
+
+import asyncio
+import collections
+import logging
+import os.path
+import sys
+import threading
+import time
+import traceback
+from types import FrameType
+from typing import Counter, NamedTuple, Optional, Tuple
+
+from .metrics import Metrics
+
+__all__ = 'Profile', 'StallWatchdog', 'get_stack', 'sample'
+
+FRAME = Tuple[str, int, str]
+
+
+class Profile(NamedTuple):
+    """Result of :func:`sample`."""
+
+    samples: int
+    seconds: float
+    #: Count of samples which the frame is on top of stack
+    own: Counter[FRAME]
+    #: Count of samples which the frame is anywhere in stack
+    total: Counter[FRAME]
+
+    def format(self, top: int = 10) -> str:
+        """Format top frames by own and total samples."""
+
+        if not self.samples:
+            return 'no samples'
+
+        def format_frame(frame: FRAME) -> str:
+            filename, lineno, name = frame
+            return f'{os.path.basename(filename)}:{lineno} {name}'
+
+        lines = [f'{self.samples} samples in {self.seconds:.1f}s']
+        for title, counter in [('own', self.own), ('total', self.total)]:
+            lines.append(f'top {top} frames by {title}:')
+            for frame, count in counter.most_common(top):
+                lines.append('{:5.1f}% {}'.format(
+                    count / self.samples * 100,
+                    format_frame(frame),
+                ))
+        return '\n'.join(lines)
+
+
+def get_frame(thread_id: int) -> Optional[FrameType]:
+    return sys._current_frames().get(thread_id)
+
+
+def get_key(frame: FrameType) -> FRAME:
+    code = frame.f_code
+    return code.co_filename, frame.f_lineno, code.co_name
+
+
+def get_stack(thread_id: int) -> str:
+    """Format current stack of given thread."""
+
+    frame = get_frame(thread_id)
+    if frame is None:
+        return ''
+    return ''.join(traceback.format_stack(frame))
+
+
+def sample(
+    thread_id: int,
+    seconds: float,
+    interval: float = 0.005,
+) -> Profile:
+    """Sample stack of given thread for given seconds.
+
+    Call it from another thread. It blocks caller until it ends.
+
+    """
+
+    own: Counter[FRAME] = collections.Counter()
+    total: Counter[FRAME] = collections.Counter()
+    samples = 0
+    started_at = time.monotonic()
+    end = started_at + seconds
+    while time.monotonic() < end:
+        frame = get_frame(thread_id)
+        if frame is not None:
+            samples += 1
+            seen = set()
+            own[get_key(frame)] += 1
+            while frame is not None:
+                key = get_key(frame)
+                if key not in seen:  # count recursive frame once
+                    seen.add(key)
+                    total[key] += 1
+                frame = frame.f_back
+        time.sleep(interval)
+    return Profile(samples, time.monotonic() - started_at, own, total)
+
+
+class StallWatchdog:
+    """Detect stall of event loop and log what blocks it."""
+
+    def __init__(
+        self,
+        *,
+        threshold: float,
+        interval: float = None,
+        metrics: Metrics = None,
+    ) -> None:
+        """Initialize"""
+
+        self.threshold = threshold
+        self.interval = interval or threshold / 2
+        self.metrics = metrics or Metrics()
+        self.logger = logging.getLogger(f'{__name__}.StallWatchdog')
+        self.thread_id: Optional[int] = None
+        self.last_tick = time.monotonic()
+        self.reported_tick: Optional[float] = None
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    async def heartbeat(self) -> None:
+        """Tick periodically on loop and measure lag of the loop."""
+
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.last_tick = now
+            self.metrics.observe('loop_lag_seconds', max(now - expected, 0))
+
+    def check(self) -> Optional[str]:
+        """Capture stack of loop thread if loop did not tick in time."""
+
+        tick = self.last_tick
+        # heartbeat sleeps for interval, so loop is late only after that
+        blocked = time.monotonic() - (tick + self.interval)
+        if blocked < self.threshold or tick == self.reported_tick:
+            return None
+        self.reported_tick = tick
+        stack = get_stack(self.thread_id) if self.thread_id else ''
+        self.metrics.inc('loop_stalls')
+        self.logger.warning(
+            'event loop is blocked for more than %.3f seconds\n%s',
+            blocked,
+            stack,
+        )
+        return stack
+
+    def watch(self) -> None:
+        while not self.stopped.wait(self.interval / 2):
+            self.check()
+
+    def start(self) -> 'asyncio.Task[None]':
+        """Start watchdog thread and heartbeat on current loop."""
+
+        self.thread_id = threading.get_ident()
+        self.last_tick = time.monotonic()
+        self.stopped.clear()
+        self.thread = threading.Thread(
+            target=self.watch,
+            name='yui-watchdog',
+            daemon=True,
+        )
+        self.thread.start()
+        return asyncio.ensure_future(self.heartbeat())
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
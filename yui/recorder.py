@@ -0,0 +1,105 @@
+""":mod:`yui.recorder` --- record RTM frames to replay them later
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Frames are appended to gzipped JSON lines. Each line has seconds since start
+of recording in ``t`` and the frame in ``frame``. Timestamps in frames are
+shifted to a fixed fake epoch, so recordings keep order of messages but do
+not tell when they were sent.
+
+"""
+
+import gzip
+import time
+from typing import Any, Dict, IO, Iterator, Optional, Tuple
+
+import ujson
+
+__all__ = (
+    'RTMRecorder',
+    'SCRUBBED_EPOCH',
+    'SCRUBBED_KEYS',
+    'read_recording',
+    'scrub',
+)
+
+#: Keys of frames which hold Slack timestamps
+SCRUBBED_KEYS = frozenset({
+    'deleted_ts',
+    'event_ts',
+    'last_read',
+    'latest_reply',
+    'thread_ts',
+    'ts',
+})
+
+#: Start of recording is shifted to this Unix time
+SCRUBBED_EPOCH = 1_000_000_000.0
+
+
+def scrub(value: Any, started_at: float) -> Any:
+    """Shift timestamps in frame to :data:`SCRUBBED_EPOCH`."""
+
+    if isinstance(value, dict):
+        result = {}
+        for k, v in value.items():
+            if k in SCRUBBED_KEYS and isinstance(v, (str, int, float)):
+                try:
+                    v = '{:.6f}'.format(
+                        float(v) - started_at + SCRUBBED_EPOCH,
+                    )
+                except ValueError:
+                    v = '0'
+            else:
+                v = scrub(v, started_at)
+            result[k] = v
+        return result
+    if isinstance(value, list):
+        return [scrub(v, started_at) for v in value]
+    return value
+
+
+class RTMRecorder:
+    """Append RTM frames to gzipped JSON lines file."""
+
+    def __init__(self, path: str) -> None:
+        """Initialize"""
+
+        self.path = path
+        self.file: Optional[IO[str]] = None
+        self.started_at = 0.0
+        self.started_at_monotonic = 0.0
+
+    def record(self, frame: Dict[str, Any]) -> None:
+        if self.file is None:
+            self.file = gzip.open(self.path, 'at', encoding='utf-8')
+            self.started_at = time.time()
+            self.started_at_monotonic = time.monotonic()
+        self.file.write(ujson.dumps({
+            't': round(time.monotonic() - self.started_at_monotonic, 6),
+            'frame': scrub(frame, self.started_at),
+        }))
+        self.file.write('\n')
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def read_recording(path: str) -> Iterator[Tuple[float, Dict[str, Any]]]:
+    """Read seconds since start and frame from recording.
+
+    Recording of bot which was killed has no end of gzip stream, so lines
+    until the end of written data are read.
+
+    """
+
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                if not line.endswith('\n'):
+                    break
+                item = ujson.loads(line)
+                yield item['t'], item['frame']
+        except EOFError:
+            pass
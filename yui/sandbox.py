@@ -0,0 +1,248 @@
+""":mod:`yui.sandbox` --- killable worker processes for untrusted code
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Unlike :class:`concurrent.futures.ProcessPoolExecutor`, a job which runs too
+long kills its worker instead of keeping it busy in background. Workers run
+under CPU and memory limits, and a warm spare takes over a killed worker.
+
+"""
+
+import asyncio
+import math
+import multiprocessing
+import signal
+from multiprocessing.connection import Connection
+from typing import Any, Callable, List, Optional, Set, TypeVar
+
+from .metrics import Metrics
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore
+
+__all__ = 'SandboxPool', 'WorkerDiedError'
+
+R = TypeVar('R')
+
+
+class WorkerDiedError(RuntimeError):
+    """Worker process died while running a job."""
+
+
+def get_address_space() -> int:
+    """Bytes of virtual memory which this process uses now."""
+
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return 0
+    return pages * resource.getpagesize()
+
+
+def set_memory_limit(memory_limit: int) -> None:
+    """Let jobs allocate given bytes on top of what worker uses now."""
+
+    if resource is None or not memory_limit:
+        return
+    limit = get_address_space() + memory_limit
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def set_cpu_limit(cpu_limit: float) -> None:
+    """Let job use CPU for given seconds from now."""
+
+    if resource is None or not cpu_limit:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = usage.ru_utime + usage.ru_stime
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = math.ceil(used + cpu_limit)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))  # SIGXCPU kills
+
+
+def worker_main(
+    conn: Connection,
+    parent_conn: Connection,
+    cpu_limit: float,
+    memory_limit: int,
+) -> None:
+    parent_conn.close()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    set_memory_limit(memory_limit)
+    while True:
+        try:
+            f, args, kwargs = conn.recv()
+        except EOFError:
+            return
+        set_cpu_limit(cpu_limit)
+        try:
+            result = ('ok', f(*args, **kwargs))
+        except BaseException as e:
+            result = ('error', e)
+        try:
+            conn.send(result)
+        except Exception as e:  # result or error can not be pickled
+            conn.send(('error', WorkerDiedError(f'{type(e).__name__}: {e}')))
+
+
+class Worker:
+    """Worker process and pipe to it."""
+
+    def __init__(self, cpu_limit: float, memory_limit: int) -> None:
+        """Initialize"""
+
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=worker_main,
+            args=(child_conn, self.conn, cpu_limit, memory_limit),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    async def run(self, f: Callable, args, kwargs) -> Any:
+        loop = asyncio.get_event_loop()
+        self.conn.send((f, args, kwargs))
+        readable = loop.create_future()
+        fd = self.conn.fileno()
+
+        def on_readable():
+            if not readable.done():
+                readable.set_result(None)
+
+        loop.add_reader(fd, on_readable)
+        try:
+            await readable
+        finally:
+            loop.remove_reader(fd)
+        return self.conn.recv()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        if not self.conn.closed:
+            self.conn.close()
+
+
+class SandboxPool:
+    """Pool of worker processes which are killed on timeout."""
+
+    def __init__(
+        self,
+        *,
+        name: str = 'sandbox',
+        size: int = 1,
+        spares: int = 1,
+        cpu_limit: float = 0,
+        memory_limit: int = 0,
+        metrics: Metrics = None,
+    ) -> None:
+        """Initialize"""
+
+        self.name = name
+        self.size = max(size, 1)
+        self.spares = spares
+        self.cpu_limit = cpu_limit
+        self.memory_limit = memory_limit
+        self.metrics = metrics or Metrics()
+        self.idle: List[Worker] = []
+        self.busy: Set[Worker] = set()
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.size)
+        return self._semaphore
+
+    def spawn(self) -> Worker:
+        return Worker(self.cpu_limit, self.memory_limit)
+
+    def fill_spares(self) -> None:
+        """Start workers until there are enough idle ones."""
+
+        while len(self.idle) < self.spares and \
+                len(self.idle) + len(self.busy) < self.size + self.spares:
+            self.idle.append(self.spawn())
+
+    def kill(self, worker: Worker, reason: str) -> None:
+        worker.kill()
+        self.metrics.inc('sandbox_killed', pool=self.name, reason=reason)
+
+    async def run(
+        self,
+        timeout: float,
+        f: Callable[..., R],
+        *args,
+        **kwargs,
+    ) -> R:
+        """Run f in worker. Kill the worker if it does not end in time.
+
+        Raise :exc:`asyncio.TimeoutError` if job took too long time or too
+        much CPU time, and :exc:`WorkerDiedError` if worker died otherwise.
+
+        """
+
+        self.waiting += 1
+        self.metrics.set('sandbox_queue_depth', self.waiting, pool=self.name)
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+            self.metrics.set(
+                'sandbox_queue_depth',
+                self.waiting,
+                pool=self.name,
+            )
+        try:
+            if not self.idle:
+                self.idle.append(self.spawn())
+            worker = self.idle.pop()
+            self.busy.add(worker)
+            self.fill_spares()
+            try:
+                status, value = await asyncio.wait_for(
+                    worker.run(f, args, kwargs),
+                    timeout,
+                )
+            except asyncio.TimeoutError:
+                self.kill(worker, 'timeout')
+                raise
+            except asyncio.CancelledError:
+                self.kill(worker, 'cancelled')
+                raise
+            except (EOFError, OSError):
+                worker.kill()
+                if worker.process.exitcode == -signal.SIGXCPU:
+                    self.kill(worker, 'cpu')
+                    raise asyncio.TimeoutError()
+                self.kill(worker, 'died')
+                raise WorkerDiedError(
+                    f'worker died with exit code {worker.process.exitcode}',
+                )
+            else:
+                self.idle.append(worker)
+            finally:
+                self.busy.discard(worker)
+                self.fill_spares()
+        finally:
+            self.semaphore.release()
+
+        if status == 'error':
+            raise value
+        return value
+
+    def close(self) -> None:
+        """Kill every worker. Next job starts new ones."""
+
+        for worker in self.idle + list(self.busy):
+            worker.kill()
+        self.idle.clear()
+        self.busy.clear()
+        self._semaphore = None
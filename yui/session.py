@@ -1,12 +1,33 @@
+import asyncio
 import socket
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
+import aiohttp
 from aiohttp.resolver import AsyncResolver
 
-from aiohttp_doh import ClientSession
+from aiohttp_doh import ClientSession, DNSOverHTTPSResolver, RecordType
 
 import ujson
 
-__all__ = 'client_session',
+__all__ = (
+    'CachedDNSOverHTTPSResolver',
+    'SessionPool',
+    'SharedSession',
+    'client_session',
+)
+
+#: Default endpoints of DNS over HTTPS
+DOH_ENDPOINTS = [
+    'https://dns.google.com/resolve',
+    'https://cloudflare-dns.com/dns-query',
+]
+
+#: Bounds of seconds to keep resolved address in cache
+MIN_DNS_TTL = 10
+MAX_DNS_TTL = 3600
+
+#: Pool which :func:`client_session` hands out by default
+DEFAULT_POOL: Optional['SessionPool'] = None
 
 
 class YuiAsyncResolver(AsyncResolver):
@@ -19,8 +40,229 @@ class YuiAsyncResolver(AsyncResolver):
         ).resolve(host, port, socket.AF_INET)
 
 
-def client_session(*args, **kwargs) -> ClientSession:
-    """aiohttp.client.ClientSession with DNS over HTTPS"""
+class CachedDNSOverHTTPSResolver(DNSOverHTTPSResolver):
+    """DNS over HTTPS resolver which keeps result until its TTL expires."""
+
+    def __init__(
+        self,
+        *,
+        min_ttl: int = MIN_DNS_TTL,
+        max_ttl: int = MAX_DNS_TTL,
+        **kwargs,
+    ) -> None:
+        """Initialize"""
+
+        super(CachedDNSOverHTTPSResolver, self).__init__(**kwargs)
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.cache: Dict[Tuple[str, int, int], Tuple[float, List[Dict]]] = {}
+
+    async def query(self, endpoint: str, host, port, family) \
+            -> Tuple[List[Dict], int]:
+        """Query to endpoint and return addresses with TTL of them."""
+
+        if family == socket.AF_INET6:
+            record_type = RecordType.AAAA
+        else:
+            record_type = RecordType.A
+
+        params = {
+            'ct': 'application/dns-json',
+            'name': host,
+            'type': record_type.name,
+        }
+
+        connector = aiohttp.TCPConnector(resolver=self.resolveer_class())
+        async with aiohttp.ClientSession(connector=connector) as session:
+            async with session.get(endpoint, params=params) as resp:
+                data = self.json_loads(await resp.text())
+
+        if data['Status'] != 0:
+            raise OSError('DNS lookup failed')
+
+        answers = [
+            r for r in data.get('Answer', [])
+            if r['type'] in (
+                record_type.name,
+                record_type.value,
+            ) and r['data']
+        ]
+        if not answers:
+            raise OSError('DNS lookup failed')
+
+        ttl = min(r.get('TTL', self.min_ttl) for r in answers)
+        return [
+            {
+                'hostname': host,
+                'host': r['data'],
+                'port': port,
+                'family': family,
+                'proto': 0,
+                'flags': socket.AI_NUMERICHOST,
+            } for r in answers
+        ], ttl
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        key = (host, port, family)
+        now = asyncio.get_event_loop().time()
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        tasks = [
+            asyncio.ensure_future(self.query(endpoint, host, port, family))
+            for endpoint in self.endpoints
+        ]
+        try:
+            error: Optional[BaseException] = None
+            for future in asyncio.as_completed(tasks):
+                try:
+                    hosts, ttl = await future
+                except (OSError, aiohttp.ClientError, KeyError) as e:
+                    error = e
+                    continue
+                break
+            else:
+                raise OSError(f'DNS lookup failed: {error}')
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        ttl = max(self.min_ttl, min(ttl, self.max_ttl))
+        self.cache[key] = (now + ttl, hosts)
+        return hosts
+
+
+class SharedSession:
+    """View of shared session.
+
+    It works like :class:`aiohttp.ClientSession` but leaving ``async with``
+    block does not close the shared session.
+
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        *,
+        headers: Mapping[str, str] = None,
+    ) -> None:
+        """Initialize"""
+
+        self.session = session
+        self.headers = dict(headers or {})
+
+    async def __aenter__(self) -> 'SharedSession':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+    @property
+    def closed(self) -> bool:
+        return self.session.closed
+
+    def _merge(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        if self.headers:
+            headers = dict(self.headers)
+            headers.update(kwargs.get('headers') or {})
+            kwargs['headers'] = headers
+        return kwargs
+
+    def request(self, method: str, url, **kwargs):
+        return self.session.request(method, url, **self._merge(kwargs))
+
+    def get(self, url, **kwargs):
+        return self.session.get(url, **self._merge(kwargs))
+
+    def post(self, url, **kwargs):
+        return self.session.post(url, **self._merge(kwargs))
+
+    def put(self, url, **kwargs):
+        return self.session.put(url, **self._merge(kwargs))
+
+    def patch(self, url, **kwargs):
+        return self.session.patch(url, **self._merge(kwargs))
+
+    def delete(self, url, **kwargs):
+        return self.session.delete(url, **self._merge(kwargs))
+
+    def head(self, url, **kwargs):
+        return self.session.head(url, **self._merge(kwargs))
+
+    def options(self, url, **kwargs):
+        return self.session.options(url, **self._merge(kwargs))
+
+    def ws_connect(self, url, **kwargs):
+        return self.session.ws_connect(url, **self._merge(kwargs))
+
+
+class SessionPool:
+    """Long-lived, connection-pooled HTTP session."""
+
+    def __init__(
+        self,
+        *,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 30,
+    ) -> None:
+        """Initialize"""
+
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.resolver = CachedDNSOverHTTPSResolver(
+            endpoints=DOH_ENDPOINTS,
+            json_loads=ujson.loads,
+            resolver_class=YuiAsyncResolver,
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Get shared session. It is made at first use in running loop."""
+
+        loop = asyncio.get_event_loop()
+        if self._session is None or self._session.closed or \
+                self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                resolver=self.resolver,
+                use_dns_cache=False,  # resolver honors TTL of records
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._loop = loop
+        return self._session
+
+    def install(self) -> None:
+        """Make :func:`client_session` hand out this pool by default."""
+
+        global DEFAULT_POOL
+        DEFAULT_POOL = self
+
+    async def close(self) -> None:
+        """Close shared session. Next use opens new one."""
+
+        session, self._session = self._session, None
+        if session is not None and not session.closed:
+            await session.close()
+
+
+def client_session(*args, **kwargs):
+    """HTTP client session.
+
+    It hands out the shared session of bot if there is. Otherwise, or if
+    options other than ``headers`` are given, it makes new
+    aiohttp.client.ClientSession with DNS over HTTPS.
+
+    """
+
+    if DEFAULT_POOL is not None and not args and set(kwargs) <= {'headers'}:
+        return SharedSession(DEFAULT_POOL.session, **kwargs)
 
     return ClientSession(
         *args,
@@ -1,8 +1,13 @@
+import functools
 import inspect
+import zlib
 from types import SimpleNamespace
 from typing import (
     Any,
+    Callable,
+    ClassVar,
     Dict,
+    FrozenSet,
     List,
     NewType,
     Optional,
@@ -12,6 +17,8 @@ from typing import (
     cast as typing_cast,
 )
 
+import ujson
+
 if TYPE_CHECKING:
     from .bot import Bot as _Bot  # noqa
 
@@ -29,6 +36,7 @@ __all__ = (
     'ChannelTopic',
     'Comment',
     'CommentID',
+    'CompactNamespace',
     'DirectMessageChannel',
     'DirectMessageChannelID',
     'DnDStatus',
@@ -129,6 +137,105 @@ class Namespace(SimpleNamespace):
         super(Namespace, self).__init__(**kwargs)  # type: ignore
 
 
+def plain(value):
+    """Turn namespaces in value into plain dicts."""
+
+    if isinstance(value, CompactNamespace):
+        value = value.to_dict()
+    if isinstance(value, SimpleNamespace):
+        return {k: plain(v) for k, v in vars(value).items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(x) for x in value]
+    if isinstance(value, dict):
+        return {k: plain(v) for k, v in value.items()}
+    return value
+
+
+#: Preset dictionary of zlib for side store. Slack repeats same keys and
+#: URL prefixes in every payload, so small payloads compress well with it.
+SIDE_STORE_ZDICT = (
+    b'"avatar_hash":"","display_name":"","display_name_normalized":"",'
+    b'"email":"","fields":null,"first_name":"","image_24":"","image_32":"",'
+    b'"image_48":"","image_72":"","image_192":"","image_512":"",'
+    b'"image_original":"","is_custom_image":false,"last_name":"",'
+    b'"phone":"","real_name":"","real_name_normalized":"","skype":"",'
+    b'"status_emoji":"","status_expiration":0,"status_text":"","team":"",'
+    b'"title":"","creator":"","last_set":0,"value":"","members":[],'
+    b'"purpose":{},"topic":{},"previous_names":[],"color":"","tz":"",'
+    b'"tz_label":"","tz_offset":0,"updated":0,"has_2fa":false,'
+    b'"is_admin":false,"is_app_user":false,"is_owner":false,'
+    b'"is_primary_owner":false,"is_restricted":false,'
+    b'"is_ultra_restricted":false,"locale":"","presence":"","team_id":"",'
+    b'"is_channel":true,"is_general":false,"is_mpim":false,'
+    b'"is_org_shared":false,"is_private":false,"is_shared":false,'
+    b'"has_pins":false,"unlinked":0,"created":0,'
+    b'https://secure.gravatar.com/avatar/'
+    b'https://a.slack-edge.com/df10d/img/avatars/ava_'
+    b'https://avatars.slack-edge.com/'
+)
+
+
+def pack_side_store(data: Dict[str, Any]) -> bytes:
+    compressor = zlib.compressobj(zdict=SIDE_STORE_ZDICT)
+    try:
+        raw = ujson.dumps(data, sort_keys=True)
+    except (TypeError, OverflowError):  # namespaces in it
+        raw = ujson.dumps(plain(data), sort_keys=True)
+    return compressor.compress(raw.encode()) + compressor.flush()
+
+
+def unpack_side_store(data: bytes) -> Dict[str, Any]:
+    decompressor = zlib.decompressobj(zdict=SIDE_STORE_ZDICT)
+    return ujson.loads(decompressor.decompress(data))
+
+
+class CompactNamespace(Namespace):
+    """Typed Namespace which keeps only hot fields as attributes.
+
+    Other fields are compressed into a side store and decoded and cast on
+    each access, so keep fields which code reads often in
+    :attr:`__hot_fields__`.
+
+    """
+
+    #: Fields which are kept as attributes
+    __hot_fields__: ClassVar[FrozenSet[str]] = frozenset()
+
+    def __init__(self, **kwargs) -> None:
+        cold = {
+            k: kwargs.pop(k) for k in list(kwargs)
+            if k not in self.__hot_fields__
+        }
+        if cold:
+            kwargs['_side_store'] = pack_side_store(cold)
+        super(CompactNamespace, self).__init__(**kwargs)
+
+    def __getattr__(self, name: str):
+        data = self.__dict__.get('_side_store')
+        if data is None or name.startswith('__'):
+            raise AttributeError(name)
+        cold = unpack_side_store(data)
+        if name not in cold:
+            raise AttributeError(name)
+        t = getattr(self, '__annotations__', {}).get(name)
+        return cast(t, cold[name]) if t else cold[name]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get every field including ones in side store.
+
+        Fields in side store are not cast, they are plain data as given.
+
+        """
+
+        fields = dict(self.__dict__)
+        data = fields.pop('_side_store', None)
+        if data is None:
+            return fields
+        cold = unpack_side_store(data)
+        cold.update(fields)
+        return cold
+
+
 class ChannelTopic(Namespace):
     """Topic of Channel."""
 
@@ -165,18 +272,9 @@ class FromChannelID(FromID):
     @classmethod
     def from_id(cls, value: Union[str, Dict], raise_error: bool = False):
         if isinstance(value, str):
-            if value.startswith('C'):
-                for c in cls._bot.channels:
-                    if c.id == value:
-                        return c
-            elif value.startswith('D'):
-                for d in cls._bot.ims:
-                    if d.id == value:
-                        return d
-            elif value.startswith('G'):
-                for g in cls._bot.groups:
-                    if g.id == value:
-                        return g
+            channel = cls._bot.directory.get_channel(value)
+            if channel is not None:
+                return channel
             if not raise_error:
                 return UnknownChannel(id=value)
             raise KeyError('Given ID was not found.')
@@ -184,13 +282,10 @@ class FromChannelID(FromID):
 
     @classmethod
     def from_name(cls, name: str):
-        for c in cls._bot.channels:
-            if c.name == name:
-                return c
-        for g in cls._bot.groups:
-            if g.name == name:
-                return g
-        raise KeyError('Channel was not found')
+        channel = cls._bot.directory.get_channel_by_name(name)
+        if channel is None:
+            raise KeyError('Channel was not found')
+        return channel
 
     @classmethod
     def from_config(cls, key: str)\
@@ -222,7 +317,16 @@ class Channel(FromChannelID):
     last_read: Ts
 
 
-class PublicChannel(Channel):
+class PublicChannel(CompactNamespace, Channel):
+
+    __hot_fields__ = frozenset({
+        'id',
+        'name',
+        'name_normalized',
+        'is_archived',
+        'is_general',
+        'is_member',
+    })
 
     name: str
     is_channel: bool
@@ -255,7 +359,14 @@ class DirectMessageChannel(Channel):
         return f'{self.__class__.__name__}(id={self.id!r}, user={self.user!r})'
 
 
-class PrivateChannel(Channel):
+class PrivateChannel(CompactNamespace, Channel):
+
+    __hot_fields__ = frozenset({
+        'id',
+        'name',
+        'name_normalized',
+        'is_archived',
+    })
 
     name: str
     is_group: bool
@@ -299,8 +410,10 @@ class FromUserID(FromID):
     def from_id(cls, value: Union[str, Dict], raise_error: bool = False):
         if isinstance(value, str):
             value = typing_cast(UserID, value)
-            if value.startswith('U') and value in cls._bot.users:
-                return cls._bot.users[value]
+            if value.startswith('U'):
+                user = cls._bot.directory.get_user(value)
+                if user is not None:
+                    return user
             if not raise_error:
                 return UnknownUser(id=value)
             raise KeyError('Given ID was not found.')
@@ -308,10 +421,10 @@ class FromUserID(FromID):
 
     @classmethod
     def from_name(cls, name: str):
-        for c in cls._bot.users.values():
-            if c.name == name:
-                return c
-        raise KeyError('Channel was not found')
+        user = cls._bot.directory.get_user_by_name(name)
+        if user is None:
+            raise KeyError('Channel was not found')
+        return user
 
 
 class UserProfile(Namespace):
@@ -335,7 +448,15 @@ class UserProfile(Namespace):
     team: TeamID
 
 
-class User(FromUserID):
+class User(CompactNamespace, FromUserID):
+
+    __hot_fields__ = frozenset({
+        'id',
+        'name',
+        'real_name',
+        'deleted',
+        'is_bot',
+    })
 
     id: str
     team_id: TeamID
@@ -457,6 +578,11 @@ KNOWN_TYPES = {
     str,
 }
 
+#: Plan returns it if caster can not handle given value.
+SKIP = object()
+
+PLAN = Callable[[Any], Any]
+
 
 class CastError(Exception):
     pass
@@ -464,17 +590,44 @@ class CastError(Exception):
 
 class BaseCaster:
 
+    def check_type(self, t) -> Optional[bool]:
+        """Check caster handles given type without seeing value.
+
+        Return None if it depends on value.
+
+        """
+
+        return None
+
     def check(self, t, value):
         raise NotImplementedError
 
     def cast(self, caster, t, value):
         raise NotImplementedError
 
+    def compile(self, caster, t) -> PLAN:
+        """Make plan to cast value to given type.
+
+        Plan returns :data:`SKIP` if this caster can not handle the value.
+
+        """
+
+        if self.check_type(t):
+            return functools.partial(self.cast, caster, t)
+
+        def plan(value):
+            if self.check(t, value):
+                return self.cast(caster, t, value)
+            return SKIP
+
+        return plan
+
 
 class Caster:
 
     def __init__(self, caster: List[BaseCaster]) -> None:
         self.caster = caster
+        self.plans: Dict[Any, PLAN] = {}
 
     def __call__(self, t, value):
         try:
@@ -489,6 +642,49 @@ class Caster:
         ]
 
     def cast(self, t, value):
+        return self.get_plan(t)(value)
+
+    def get_plan(self, t) -> PLAN:
+        """Get memoized plan to cast value to given type."""
+
+        try:
+            plan = self.plans[t]
+        except KeyError:
+            plan = self.plans[t] = self.compile(t)
+        except TypeError:  # unhashable type can not be memoized
+            plan = functools.partial(self.dispatch, t)
+        return plan
+
+    def compile(self, t) -> PLAN:
+        """Compile plan to cast value to given type.
+
+        It keeps only casters which can handle given type, in order.
+
+        """
+
+        plans: List[PLAN] = []
+        for caster in self.caster:
+            handle = caster.check_type(t)
+            if handle is False:
+                continue
+            plans.append(caster.compile(self, t))
+            if handle:
+                if len(plans) == 1:
+                    return plans[0]
+                break
+
+        def plan(value):
+            for p in plans:
+                result = p(value)
+                if result is not SKIP:
+                    return result
+            raise CastError
+
+        return plan
+
+    def dispatch(self, t, value):
+        """Cast value with scanning all casters, without plan."""
+
         for caster in self.caster:
             if caster.check(t, value):
                 return caster.cast(self, t, value)
@@ -497,6 +693,9 @@ class Caster:
 
 class BoolCaster(BaseCaster):
 
+    def check_type(self, t):
+        return t == bool
+
     def check(self, t, value):
         return t == bool
 
@@ -506,6 +705,11 @@ class BoolCaster(BaseCaster):
 
 class KnownTypesCaster(BaseCaster):
 
+    def check_type(self, t):
+        if t in KNOWN_TYPES:
+            return None
+        return False
+
     def check(self, t, value):
         if t in KNOWN_TYPES and value is not None:
             try:
@@ -518,15 +722,29 @@ class KnownTypesCaster(BaseCaster):
     def cast(self, caster, t, value):
         return t(value)
 
+    def compile(self, caster, t):
+        def plan(value):
+            if value is None:
+                return SKIP
+            try:
+                return t(value)
+            except ValueError:
+                return SKIP
+
+        return plan
+
 
 class TypeVarCaster(BaseCaster):
 
+    def check_type(self, t):
+        return isinstance(t, TypeVar)
+
     def check(self, t, value):
         return isinstance(t, TypeVar)
 
     def cast(self, caster, t, value):
         if t.__constraints__:
-            types = caster.sort(t.__constraints__)
+            types = caster.sort(t.__constraints__, value)
             for ty in types:
                 try:
                     return caster.cast(ty, value)
@@ -536,27 +754,58 @@ class TypeVarCaster(BaseCaster):
         else:
             return value
 
+    def compile(self, caster, t):
+        if not t.__constraints__:
+            return identity
+
+        plans = [caster.get_plan(ty) for ty in t.__constraints__]
+
+        def plan(value):
+            for p in plans:
+                try:
+                    return p(value)
+                except CastError:
+                    continue
+            raise CastError
+
+        return plan
+
 
 class NewTypeCaster(BaseCaster):
 
+    def check_type(self, t):
+        return hasattr(t, '__supertype__')
+
     def check(self, t, value):
         return hasattr(t, '__supertype__')
 
     def cast(self, caster, t, value):
         return caster.cast(t.__supertype__, value)
 
+    def compile(self, caster, t):
+        return caster.get_plan(t.__supertype__)
+
 
 class AnyCaster(BaseCaster):
 
+    def check_type(self, t):
+        return t == Any
+
     def check(self, t, value):
         return t == Any
 
     def cast(self, caster, t, value):
         return value
 
+    def compile(self, caster, t):
+        return identity
+
 
 class UnionCaster(BaseCaster):
 
+    def check_type(self, t):
+        return getattr(t, '__origin__', None) == Union
+
     def check(self, t, value):
         return getattr(t, '__origin__', None) == Union
 
@@ -569,80 +818,180 @@ class UnionCaster(BaseCaster):
                 continue
         raise ValueError
 
+    def compile(self, caster, t):
+        plans = [caster.get_plan(ty) for ty in t.__args__]
+
+        def plan(value):
+            for p in plans:
+                try:
+                    return p(value)
+                except CastError:
+                    continue
+            raise ValueError
+
+        return plan
+
 
 class TupleCaster(BaseCaster):
 
+    def check_type(self, t):
+        return getattr(t, '__origin__', None) == tuple
+
     def check(self, t, value):
         return getattr(t, '__origin__', None) == tuple
 
     def cast(self, caster, t, value):
-        if t.__args__:
+        args = getattr(t, '__args__', None)
+        if args:
             return tuple(
-                caster.cast(ty, x) for ty, x in zip(t.__args__, value)
+                caster.cast(ty, x) for ty, x in zip(args, value)
             )
         else:
             return tuple(value)
 
+    def compile(self, caster, t):
+        args = getattr(t, '__args__', None)
+        if not args:
+            return tuple
+
+        plans = [caster.get_plan(ty) for ty in args]
+
+        def plan(value):
+            return tuple(p(x) for p, x in zip(plans, value))
+
+        return plan
+
 
 class SetCaster(BaseCaster):
 
+    def check_type(self, t):
+        return getattr(t, '__origin__', None) == set
+
     def check(self, t, value):
         return getattr(t, '__origin__', None) == set
 
     def cast(self, caster, t, value):
-        if t.__args__:
-            return {caster.cast(t.__args__[0], x) for x in value}
+        args = getattr(t, '__args__', None)
+        if args:
+            return {caster.cast(args[0], x) for x in value}
         else:
             return set(value)
 
+    def compile(self, caster, t):
+        args = getattr(t, '__args__', None)
+        if not args:
+            return set
+
+        item = caster.get_plan(args[0])
+
+        def plan(value):
+            return {item(x) for x in value}
+
+        return plan
+
 
 class ListCaster(BaseCaster):
 
+    def check_type(self, t):
+        return getattr(t, '__origin__', None) == list
+
     def check(self, t, value):
         return getattr(t, '__origin__', None) == list
 
     def cast(self, caster, t, value):
-        if t.__args__:
-            return [caster.cast(t.__args__[0], x) for x in value]
+        args = getattr(t, '__args__', None)
+        if args:
+            return [caster.cast(args[0], x) for x in value]
         else:
             return list(value)
 
+    def compile(self, caster, t):
+        args = getattr(t, '__args__', None)
+        if not args:
+            return list
+
+        item = caster.get_plan(args[0])
+
+        def plan(value):
+            return [item(x) for x in value]
+
+        return plan
+
 
 class DictCaster(BaseCaster):
 
+    def check_type(self, t):
+        return getattr(t, '__origin__', None) == dict
+
     def check(self, t, value):
         return getattr(t, '__origin__', None) == dict
 
     def cast(self, caster, t, value):
-        if t.__args__:
+        args = getattr(t, '__args__', None)
+        if args:
             return {
-                caster.cast(t.__args__[0], k): caster.cast(t.__args__[1], v)
+                caster.cast(args[0], k): caster.cast(args[1], v)
                 for k, v in value.items()
             }
         else:
             return dict(value)
 
+    def compile(self, caster, t):
+        args = getattr(t, '__args__', None)
+        if not args:
+            return dict
+
+        key = caster.get_plan(args[0])
+        item = caster.get_plan(args[1])
+
+        def plan(value):
+            return {key(k): item(v) for k, v in value.items()}
+
+        return plan
+
 
 class FromIDCaster(BaseCaster):
 
+    def check_type(self, t):
+        return inspect.isclass(t) and issubclass(t, FromID)
+
     def check(self, t, value):
         return inspect.isclass(t) and issubclass(t, FromID)
 
     def cast(self, caster, t, value):
         return t.from_id(value)
 
+    def compile(self, caster, t):
+        return t.from_id
+
 
 class NamespaceCaster(BaseCaster):
 
+    def check_type(self, t):
+        return inspect.isclass(t) and issubclass(t, Namespace)
+
     def check(self, t, value):
         return inspect.isclass(t) and issubclass(t, Namespace)
 
     def cast(self, caster, t, value):
         return t(**value)
 
+    def compile(self, caster, t):
+        def plan(value):
+            return t(**value)
+
+        return plan
+
 
 class NoHandleCaster(BaseCaster):
 
+    def check_type(self, t):
+        try:
+            isinstance(None, t)
+        except TypeError:
+            return False
+        return None
+
     def check(self, t, value):
         try:
             return isinstance(value, t)
@@ -652,9 +1001,20 @@ class NoHandleCaster(BaseCaster):
     def cast(self, caster, t, value):
         return value
 
+    def compile(self, caster, t):
+        def plan(value):
+            if isinstance(value, t):
+                return value
+            return SKIP
+
+        return plan
+
 
 class NoneTypeCaster(BaseCaster):
 
+    def check_type(self, t):
+        return t == NoneType  # type: ignore
+
     def check(self, t, value):
         return t == NoneType  # type: ignore
 
@@ -662,6 +1022,10 @@ class NoneTypeCaster(BaseCaster):
         return None
 
 
+def identity(value):
+    return value
+
+
 cast = Caster([
     NoHandleCaster(),
     BoolCaster(),